@@ -1,7 +1,9 @@
 import os
 import threading
 import json
-from typing import Any, Dict, Optional
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from google_auth_oauthlib.flow import InstalledAppFlow
 from flask import (Flask, 
@@ -15,25 +17,43 @@ from flask import (Flask,
                    flash,
                    Response)
 
+from openai import OpenAI
+
 from openai_funcs import (
-    init_openai_client,
+    get_openai_client,
+    get_cache_stats,
     generate_video_topic,
     generate_script,
+    generate_script_streaming,
     generate_search_terms,
     generate_detailed_prompts,
     generate_video_title_and_hashtags
 )
-from elevenlabs_funcs import generate_audio_files_elevenlabs
-from gtts_funcs import generate_audio_files_gtts
+from elevenlabs_funcs import (generate_audio_files_elevenlabs,
+                              generate_audio_script_elevenlabs,
+                              synthesize_scene_elevenlabs)
+from gtts_funcs import generate_audio_files_gtts, synthesize_scene_gtts
+from audio_funcs import build_scene_manifest
 from pixabay_funcs import process_videos_pixabay
 from pexels_funcs import process_videos_pexels
 from storyblocks_funcs import process_videos_storyblocks
 from lumaai_funcs import process_videos_luma
 from youtube_funcs import upload_video
-from helper_funcs import (clear_files_in_folder, 
+from helper_funcs import (create_job_workspace,
+                          remove_job_workspace,
                           get_final_filename, 
                           custom_secure_filename,
-                          delete_file)
+                          delete_file,
+                          run_concurrently)
+from job_funcs import submit_job, get_job, update_job
+from metrics_funcs import current_job_id, get_llm_metrics, pop_job_metrics
+from fact_funcs import add_fact
+from config import (DOWNLOAD_TTL_SECS,
+                    ELEVENLABS_TTS_MODE,
+                    ELEVENLABS_CONCURRENCY,
+                    GTTS_WORKERS,
+                    STREAM_SCRIPT,
+                    FACT_STORE_PATH)
 
 
 # Flask app initialization
@@ -41,13 +61,11 @@ app = Flask(__name__)
 app.secret_key = "some_secret_key"
 
 # Define directories
-AUDIO_DIR = os.path.join("temp", "audio")
-VIDEO_TEMP_DIR = os.path.join("temp", "video")
+WORKSPACE_DIR = os.path.join("temp", "jobs")
 FINAL_DIR = "output"
 
 # Ensure directories exist at startup
-os.makedirs(AUDIO_DIR, exist_ok=True)
-os.makedirs(VIDEO_TEMP_DIR, exist_ok=True)
+os.makedirs(WORKSPACE_DIR, exist_ok=True)
 os.makedirs(FINAL_DIR, exist_ok=True)
 
 
@@ -62,15 +80,330 @@ def index() -> Response:
     return render_template("index.html")
 
 
+def run_video_job(job_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the full generation pipeline for a single job on a background worker.
+
+    Generates the topic, script, title, audio and video, then either uploads the result to
+    YouTube or schedules it for local download. Progress is reported through update_job.
+    All intermediate files live in a workspace owned by this job, removed when it finishes.
+    A summary of the job's LLM calls is stored in the job's "metrics" field.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+        params (Dict[str, Any]): Form selections and API keys captured from the request.
+
+    Returns:
+        Dict[str, Any]: The job result containing either a download URL or a YouTube URL.
+
+    Raises:
+        RuntimeError: If a stage of the pipeline fails.
+    """
+    # Each job uses the client for its own key, so concurrent jobs never share credentials
+    client = get_openai_client(params["keys"]["openai"])
+
+    # Attribute LLM calls (including those made on stage threads) to this job
+    job_token = current_job_id.set(job_id)
+    workspace = create_job_workspace(job_id, WORKSPACE_DIR)
+    try:
+        return _run_pipeline(job_id, params, workspace, client)
+    finally:
+        remove_job_workspace(workspace["root"])
+        update_job(job_id, metrics=pop_job_metrics(job_id))
+        current_job_id.reset(job_token)
+
+
+def _generate_audio(scripts: List[str], audio_source: str, audio_dir: str, keys: Dict[str, str]) -> None:
+    """
+    Synthesizes the narration of every scene and records the job's scene manifest.
+
+    Args:
+        scripts (List[str]): The script text of each scene.
+        audio_source (str): The TTS engine ("elevenlabs" or "gtts").
+        audio_dir (str): The job's audio directory.
+        keys (Dict[str, str]): The API keys captured from the request.
+
+    Raises:
+        RuntimeError: If the audio of any scene could not be generated.
+    """
+    audio_durations = None
+    if audio_source == "elevenlabs" and ELEVENLABS_TTS_MODE == "script":
+        audio_durations = generate_audio_script_elevenlabs(scripts, audio_dir, api_key=keys["elevenlabs"])
+        if audio_durations is None:
+            print("Whole-script synthesis failed, falling back to per-scene requests.")
+    if audio_durations is not None:
+        failed_scenes = []
+    elif audio_source == "elevenlabs":
+        failed_scenes = generate_audio_files_elevenlabs(scripts, audio_dir, api_key=keys["elevenlabs"])
+    else:
+        failed_scenes = generate_audio_files_gtts(scripts, audio_dir)
+    if failed_scenes:
+        raise RuntimeError(f"Audio generation failed for scene(s) {', '.join(map(str, failed_scenes))}.")
+
+    # Record each scene's text, audio and duration for the video stage
+    build_scene_manifest(scripts, audio_dir, durations=audio_durations)
+
+
+def _stream_script_with_audio(
+    main_topic: str,
+    audio_source: str,
+    audio_dir: str,
+    keys: Dict[str, str],
+    client: OpenAI
+) -> Tuple[List[str], Optional[Callable[[], None]]]:
+    """
+    Streams the script and starts synthesizing each scene's narration as soon as it is written.
+
+    gTTS scenes are submitted as they arrive. An ElevenLabs scene is submitted once the next
+    scene has arrived (or the script is complete), since the next scene's text is sent along
+    for prosody; the requests are the same as in _generate_audio, so they share its TTS cache.
+
+    Args:
+        main_topic (str): The topic of the video.
+        audio_source (str): The TTS engine ("elevenlabs" or "gtts").
+        audio_dir (str): The job's audio directory.
+        keys (Dict[str, str]): The API keys captured from the request.
+        client (OpenAI): The job's OpenAI client.
+
+    Returns:
+        Tuple[List[str], Optional[Callable[[], None]]]: The scenes, and a function that waits
+            for the narration and records the scene manifest (raising RuntimeError if any scene
+            failed). Both are empty/None if the stream failed, in which case any narration
+            already started for it is discarded.
+    """
+    os.makedirs(audio_dir, exist_ok=True)
+    use_elevenlabs = audio_source == "elevenlabs"
+    executor = ThreadPoolExecutor(max_workers=ELEVENLABS_CONCURRENCY if use_elevenlabs else GTTS_WORKERS)
+    received: List[str] = []
+    futures = {}
+
+    def on_scene(idx: int, scene: str) -> None:
+        received.append(scene)
+        if not use_elevenlabs:
+            futures[idx] = executor.submit(synthesize_scene_gtts, scene, idx, audio_dir)
+        elif idx > 0:
+            futures[idx - 1] = executor.submit(synthesize_scene_elevenlabs, received[:idx + 1], idx - 1,
+                                               audio_dir, keys["elevenlabs"])
+
+    scripts = generate_script_streaming(main_topic, 20, on_scene, client=client)
+    if not scripts:
+        # The stream failed partway: drop the queued narration and let the running ones finish,
+        # so none of them overwrites the audio the fallback script writes next
+        executor.shutdown(wait=True, cancel_futures=True)
+        return [], None
+    if use_elevenlabs:
+        futures[len(scripts) - 1] = executor.submit(synthesize_scene_elevenlabs, scripts, len(scripts) - 1,
+                                                    audio_dir, keys["elevenlabs"])
+
+    def finish_audio() -> None:
+        try:
+            failed_scenes = [idx + 1 for idx, future in sorted(futures.items()) if not future.result()]
+        finally:
+            executor.shutdown()
+        if failed_scenes:
+            raise RuntimeError(f"Audio generation failed for scene(s) {', '.join(map(str, failed_scenes))}.")
+        build_scene_manifest(scripts, audio_dir)
+
+    return scripts, finish_audio
+
+
+def _is_string_list(value: Any) -> bool:
+    """
+    Checks that a value is a list of strings.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if value is a list whose items are all strings.
+    """
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _validate_bundle(bundle: Any) -> None:
+    """
+    Checks that a bundle from bulk_funcs has everything the pipeline reads from it.
+
+    Args:
+        bundle (Any): The decoded bundle.
+
+    Raises:
+        ValueError: If a field is missing or has the wrong type.
+    """
+    if not isinstance(bundle, dict):
+        raise ValueError("expected a JSON object")
+    for field in ("topic", "title"):
+        if not isinstance(bundle.get(field), str) or not bundle[field].strip():
+            raise ValueError(f"{field} must be a non-empty string")
+    if not _is_string_list(bundle.get("scripts")) or not bundle["scripts"]:
+        raise ValueError("scripts must be a non-empty list of strings")
+    for field in ("search_terms", "hashtags"):
+        if field in bundle and not _is_string_list(bundle[field]):
+            raise ValueError(f"{field} must be a list of strings")
+
+
+def _run_pipeline(
+    job_id: str,
+    params: Dict[str, Any],
+    workspace: Dict[str, str],
+    client: OpenAI
+) -> Dict[str, Any]:
+    """
+    Runs the generation stages of a job inside its workspace.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+        params (Dict[str, Any]): Form selections and API keys captured from the request.
+        workspace (Dict[str, str]): The job workspace created by create_job_workspace.
+        client (OpenAI): The job's OpenAI client.
+
+    Returns:
+        Dict[str, Any]: The job result containing either a download URL or a YouTube URL.
+
+    Raises:
+        RuntimeError: If a stage of the pipeline fails.
+    """
+    user_topic = params["user_topic"]
+    user_script = params["user_script"]
+    audio_source = params["audio_source"]
+    video_source = params["video_source"]
+    upload_option = params["upload_option"]
+    keys = params["keys"]
+    audio_dir = workspace["audio"]
+    work_dir = workspace["root"]
+
+    if video_source not in ("luma", "pixabay", "pexels", "storyblocks"):
+        raise RuntimeError("Invalid video source selected.")
+
+    # A bundle from bulk_funcs already carries the topic, script, title and search terms
+    bundle = params.get("bundle")
+    # The subject a new fact was generated for; it is stored only once the job succeeds
+    fact_subject = None
+    if bundle:
+        main_topic = bundle["topic"]
+        scripts = bundle["scripts"]
+        audio_stage = partial(_generate_audio, scripts, audio_source, audio_dir, keys)
+    else:
+        # Determine main topic
+        update_job(job_id, stage="topic", progress=5)
+        if user_script and not user_topic:
+            main_topic = user_script
+        elif user_topic and not user_script:
+            fact_subject = user_topic
+            main_topic = generate_video_topic(fact_subject, client=client)
+        elif user_topic and user_script:
+            main_topic = user_script
+        else:
+            fact_subject = "Fun and lesser known facts"
+            main_topic = generate_video_topic(fact_subject, client=client)
+        if not main_topic or "No new fact found" in main_topic:
+            raise RuntimeError("Could not generate a new fact for this topic.")
+
+        # Generate scripts, narrating scenes while the rest are still being written if enabled
+        update_job(job_id, stage="script", progress=10)
+        scripts, audio_stage = [], None
+        if STREAM_SCRIPT and not (audio_source == "elevenlabs" and ELEVENLABS_TTS_MODE == "script"):
+            scripts, audio_stage = _stream_script_with_audio(main_topic, audio_source, audio_dir, keys, client)
+        if not scripts:
+            scripts = generate_script(main_topic, 20, client=client) or [main_topic]
+            audio_stage = partial(_generate_audio, scripts, audio_source, audio_dir, keys)
+
+    # Title, footage prompts and narration only depend on the topic and the scripts, so
+    # they run side by side
+    update_job(job_id, stage="audio", progress=20)
+    if bundle:
+        title_stage = partial(dict, title=bundle["title"], hashtags=bundle.get("hashtags", []))
+    else:
+        title_stage = partial(generate_video_title_and_hashtags, main_topic, client=client)
+    if video_source == "luma":
+        footage_stage = partial(generate_detailed_prompts, scripts, client=client)
+    elif bundle and len(bundle.get("search_terms", [])) == len(scripts):
+        footage_stage = partial(list, bundle["search_terms"])
+    else:
+        footage_stage = partial(generate_search_terms, main_topic, scripts, client=client)
+    results = run_concurrently({
+        "title": title_stage,
+        "footage": footage_stage,
+        "audio": audio_stage,
+    })
+
+    title_and_hashtags = results["title"]
+    video_title = title_and_hashtags.get("title", "NoTitle")
+    hashtags = title_and_hashtags.get("hashtags", [])
+
+    # Get final filename
+    final_name = get_final_filename(audio_source, video_source, video_title)
+    # Jobs run side by side and titles can repeat, so the file name also carries the job ID
+    secure_name = custom_secure_filename(get_final_filename(audio_source, video_source, video_title,
+                                                            unique_id=job_id[:8]))
+
+    # Define final path
+    final_path = os.path.join(FINAL_DIR, secure_name)
+
+    # Generate video
+    update_job(job_id, stage="video", progress=50)
+    if video_source == "luma":
+        process_videos_luma(results["footage"], audio_dir, final_path, api_key=keys["luma"],
+                            work_dir=work_dir)
+    else:
+        search_terms = results["footage"]
+
+        if video_source == "pexels":
+            process_videos_pexels(scripts, search_terms, audio_dir, final_path, api_key=keys["pexels"],
+                                  work_dir=work_dir)
+
+        elif video_source == "storyblocks":
+            process_videos_storyblocks(scripts, search_terms, audio_dir, final_path,
+                                       private_api_key=keys["storyblocks_private"],
+                                       public_api_key=keys["storyblocks_public"],
+                                       work_dir=work_dir)
+
+        elif video_source == "pixabay":
+            process_videos_pixabay(scripts, search_terms, audio_dir, final_path, api_key=keys["pixabay"],
+                                   work_dir=work_dir)
+
+    if not os.path.exists(final_path):
+        raise RuntimeError("Video rendering failed.")
+
+    # Upload to YouTube if selected
+    if upload_option == "youtube":
+        update_job(job_id, stage="upload", progress=90)
+        youtube_title = f"{final_name.replace('.mp4', '')}"
+        success, message = upload_video(
+            video_file_path=final_path,
+            video_name=youtube_title,
+            video_hashtags=hashtags,
+            token_json=keys["youtube_token"]
+        )
+        if not success:
+            raise RuntimeError(f"YouTube upload failed: {message}")
+
+        # Delete the file immediately after uploading to YouTube
+        delete_file(final_path)
+        job_result = {"upload_to_youtube": True, "youtube_video_url": message}
+    else:
+        # Start timer to delete the file once the download window has passed
+        timer = threading.Timer(DOWNLOAD_TTL_SECS, delete_file, args=[final_path])
+        timer.start()
+        job_result = {"upload_to_youtube": False, "filename": secure_name}
+
+    # Only a finished video uses up its fact, so a failed job can be retried on the same theme
+    if fact_subject and FACT_STORE_PATH:
+        add_fact(fact_subject, main_topic)
+    return job_result
+
+
 @app.route("/generate_video", methods=["POST"])
 def generate_video() -> Response:
     """
-    Handles the video generation process based on user input and selected options.
+    Validates user input and enqueues a video generation job.
 
-    Processes form data, generates scripts, audio, and video, and handles uploading if selected.
+    The pipeline itself runs on the background worker pool; this route returns immediately
+    with the job ID (as JSON for API clients) or redirects to the result page, which polls
+    the job status.
 
     Returns:
-        Response: Redirects to the result page or renders the index with error messages.
+        Response: The job ID, a redirect to the result page, or the index with error messages.
     """
     # Get form data
     user_topic = request.form.get("user_topic", "").strip()
@@ -78,6 +411,7 @@ def generate_video() -> Response:
     audio_source = request.form.get("audio_source", "gtts")
     video_source = request.form.get("video_source", "pixabay")
     upload_option = request.form.get("upload_option", "local")
+    bundle_text = request.form.get("bundle", "").strip()
 
     # Check required keys based on user selections
     user_openai_key = session.get("OPENAI_API_KEY", "")
@@ -116,104 +450,130 @@ def generate_video() -> Response:
             flash("No Storyblocks keys.", "error")
             return render_template("index.html")
 
+    if video_source not in ("luma", "pixabay", "pexels", "storyblocks"):
+        flash("Invalid video source selected.", "error")
+        return render_template("index.html")
+
+    bundle = None
+    if bundle_text:
+        try:
+            bundle = json.loads(bundle_text)
+            _validate_bundle(bundle)
+        except ValueError as e:
+            flash(f"Invalid bundle: {e}", "error")
+            return render_template("index.html")
+
     if upload_option == "youtube":
         if 'YOUTUBE_TOKEN' not in session:
             flash("You need to authorize YouTube in settings.", "error")
             return render_template("index.html")
 
-    # Initialize OpenAI
-    init_openai_client(user_openai_key)
-
-    # Clear temp
-    clear_files_in_folder(AUDIO_DIR)
-    clear_files_in_folder(VIDEO_TEMP_DIR)
-
-    # Determine main topic
-    if user_script and not user_topic:
-        main_topic = user_script
-    elif user_topic and not user_script:
-        main_topic = generate_video_topic(user_topic)
-    elif user_topic and user_script:
-        main_topic = user_script
-    else:
-        main_topic = generate_video_topic("Fun and lesser known facts")
-
-    # Generate scripts
-    scripts = generate_script(main_topic, 20) or [main_topic]
-    if not scripts:
-        flash("No script generated.", "error")
-        return render_template("index.html")
-
-    # Generate title and hashtags
-    title_and_hashtags = generate_video_title_and_hashtags(main_topic)
-    video_title = title_and_hashtags.get("title", "NoTitle")
-    hashtags = title_and_hashtags.get("hashtags", [])
-
-    # Get final filename
-    final_name = get_final_filename(audio_source, video_source, video_title)
-    secure_name = custom_secure_filename(final_name)
-
-    # Generate audio
-    if audio_source == "elevenlabs":
-        generate_audio_files_elevenlabs(scripts, AUDIO_DIR, api_key=elevenlabs_key)
-    else:
-        generate_audio_files_gtts(scripts, AUDIO_DIR)
-
-    # Define final path
-    final_path = os.path.join(FINAL_DIR, secure_name)
-
-    # Generate video
-    if video_source == "luma":
-        detailed_prompts = generate_detailed_prompts(scripts)
-        process_videos_luma(detailed_prompts, AUDIO_DIR, final_path, api_key=luma_key)
-    else:
-        search_terms = generate_search_terms(main_topic, scripts)
-
-        if video_source == "pexels":
-            process_videos_pexels(scripts, search_terms, AUDIO_DIR, final_path, api_key=pexels_key)
+    # Capture everything the job needs, since the worker has no access to the session
+    params = {
+        "user_topic": user_topic,
+        "user_script": user_script,
+        "audio_source": audio_source,
+        "video_source": video_source,
+        "upload_option": upload_option,
+        "bundle": bundle,
+        "keys": {
+            "openai": user_openai_key,
+            "elevenlabs": session.get('ELEVENLABS_API_KEY', ''),
+            "luma": session.get('LUMAAI_API_KEY', ''),
+            "pixabay": session.get('PIXABAY_API_KEY', ''),
+            "pexels": session.get('PEXELS_API_KEY', ''),
+            "storyblocks_public": session.get('STORYBLOCKS_PUBLIC_API_KEY', ''),
+            "storyblocks_private": session.get('STORYBLOCKS_PRIVATE_API_KEY', ''),
+            "youtube_token": session.get('YOUTUBE_TOKEN', ''),
+        },
+    }
+    job_id = submit_job(run_video_job, params)
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for('job_status', job_id=job_id),
+            "result_url": url_for('job_result', job_id=job_id)
+        }), 202
+    return redirect(url_for('result', job_id=job_id))
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str) -> Response:
+    """
+    Reports the status of a video generation job.
 
-        elif video_source == "storyblocks":
-            process_videos_storyblocks(scripts, search_terms, AUDIO_DIR, final_path,
-                                       private_api_key=storyblocks_private_key,
-                                       public_api_key=storyblocks_public_key)
+    Args:
+        job_id (str): The unique identifier of the job.
 
-        elif video_source == "pixabay":
-            process_videos_pixabay(scripts, search_terms, AUDIO_DIR, final_path, api_key=pixabay_key)
-        else:
-            flash("Invalid video source selected.", "error")
-            return render_template("index.html")
+    Returns:
+        Response: JSON with the job status, stage, progress and error message, if any, plus
+                  the summary of the job's LLM calls once it has finished.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found.'}), 404
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'metrics': job['metrics']
+    })
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id: str) -> Response:
+    """
+    Returns the outcome of a finished video generation job.
 
-    # Clear temp files
-    clear_files_in_folder(AUDIO_DIR)
-    clear_files_in_folder(VIDEO_TEMP_DIR)
+    Args:
+        job_id (str): The unique identifier of the job.
 
-    # Upload to YouTube if selected
-    upload_to_youtube = False
-    if upload_option == "youtube":
-        upload_to_youtube = True
-        youtube_title = f"{final_name.replace('.mp4', '')}"
-        success, message = upload_video(
-            video_file_path=final_path,
-            video_name=youtube_title,
-            video_hashtags=hashtags
-        )
-        if not success:
-            flash(f"YouTube upload failed: {message}", "error")
-            return render_template("index.html")
-        
-        # Delete the file immediately after uploading to YouTube
-        delete_file(final_path)
-        
-        # Redirect to result without providing a download link
-        return redirect(url_for('result', upload_to_youtube=upload_to_youtube, youtube_video_url=message))
-    else:
-        # Generate download link and start timer to delete the file after 60 seconds
-        download_url = url_for('download_file', filename=secure_name)
-        timer = threading.Timer(60, delete_file, args=[final_path])
-        timer.start()
+    Returns:
+        Response: JSON with the download URL or YouTube URL, 409 while the job is still
+                  running, or an error message if the job failed or is unknown.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found.'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'status': 'failed', 'message': job['error']}), 500
+    if job['status'] != 'completed':
+        return jsonify({'status': job['status'], 'message': 'Job is not finished yet.'}), 409
+
+    job_output = job['result']
+    if job_output['upload_to_youtube']:
+        return jsonify({
+            'status': 'completed',
+            'upload_to_youtube': True,
+            'youtube_video_url': job_output['youtube_video_url'],
+            'result_page': url_for('result', upload_to_youtube=True,
+                                   youtube_video_url=job_output['youtube_video_url']),
+            'metrics': job['metrics']
+        })
+    return jsonify({
+        'status': 'completed',
+        'upload_to_youtube': False,
+        'download_url': url_for('download_file', filename=job_output['filename']),
+        'result_page': url_for('result', filename=job_output['filename'], upload_to_youtube=False),
+        'metrics': job['metrics']
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics() -> Response:
+    """
+    Exports the LLM call statistics of this process.
 
-        # Redirect to result with download link
-        return redirect(url_for('result', filename=secure_name, upload_to_youtube=upload_to_youtube))
+    Returns:
+        Response: JSON with tokens, latency, cache outcomes, errors and retries, in total and
+                  per calling function, plus the response cache counters.
+    """
+    llm_metrics = get_llm_metrics()
+    llm_metrics['openai_cache'] = get_cache_stats()
+    return jsonify(llm_metrics)
 
 
 @app.route("/result", methods=["GET"])
@@ -221,17 +581,23 @@ def result() -> Response:
     """
     Displays the result of the video generation process.
 
-    Shows download links or YouTube video URLs based on user actions.
+    Shows download links or YouTube video URLs based on user actions, or a progress view
+    that polls the job status while a job is still running.
 
     Returns:
         Response: Rendered HTML of the result page.
     """
-    # Get 'filename' and 'upload_to_youtube' from query parameters
+    # Get 'job_id', 'filename' and 'upload_to_youtube' from query parameters
+    job_id = request.args.get('job_id', default=None, type=str)
     filename = request.args.get('filename', default=None, type=str)
     upload_to_youtube = request.args.get('upload_to_youtube', 'false').lower() == 'true'
     youtube_video_url = request.args.get('youtube_video_url', default=None, type=str)
     
-    if upload_to_youtube:
+    if job_id:
+        if get_job(job_id) is None:
+            return render_template("result.html", error_message="Job not found.")
+        return render_template("result.html", job_id=job_id)
+    elif upload_to_youtube:
         return render_template("result.html", upload_to_youtube=True, youtube_video_url=youtube_video_url)
     elif filename:
         download_url = url_for('download_file', filename=filename)
@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from helper_funcs import get_local_ffmpeg_path, run_in_thread_pool
+from config import SCENE_FETCH_WORKERS
+
+
+MANIFEST_NAME = "manifest.json"
+
+# Bitrates in kbps, indexed by [MPEG-1?][layer][bitrate index]
+MP3_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# Sample rates in Hz, indexed by the version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+# Largest relative difference between a Xing/VBRI frame count and the file size before the
+# frames are walked instead (e.g. concatenated MP3s, whose first header covers one part)
+MP3_HEADER_TOLERANCE = 0.05
+
+
+def _parse_mp3_frame_header(data: bytes, pos: int) -> Optional[Dict[str, Any]]:
+    """
+    Decodes the MPEG audio frame header at the given position.
+
+    Args:
+        data (bytes): The file contents.
+        pos (int): The offset of the candidate header.
+
+    Returns:
+        Optional[Dict[str, Any]]: The frame's "length", "samples", "sample_rate", "bitrate",
+                                  "mpeg1" and "mono" values, or None if there is no valid
+                                  header there.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0x03
+    layer = 4 - ((data[pos + 1] >> 1) & 0x03)
+    bitrate_index = data[pos + 2] >> 4
+    sample_rate_index = (data[pos + 2] >> 2) & 0x03
+    padding = (data[pos + 2] >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    return {
+        "length": length,
+        "samples": samples,
+        "sample_rate": sample_rate,
+        "bitrate": bitrate,
+        "mpeg1": mpeg1,
+        "mono": (data[pos + 3] >> 6) == 3,
+    }
+
+
+def get_mp3_duration(file_path: str) -> Optional[float]:
+    """
+    Computes the duration of an MP3 file from its frame headers, without decoding any audio.
+
+    A Xing/Info or VBRI header gives the frame count directly, as long as it agrees with the
+    file size at the first frame's bitrate to within MP3_HEADER_TOLERANCE. Otherwise every
+    frame header is walked, which is exact for constant and variable bitrate files and for
+    several MP3 streams joined together (as gTTS writes them).
+
+    Args:
+        file_path (str): The path of the MP3 file.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if the file could not be parsed.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    pos = 0
+    # Skip an ID3v2 tag (its size is a 28-bit syncsafe integer, plus an optional footer)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # Find the first frame, requiring the next one to follow to avoid false syncs
+    header = None
+    while pos < len(data) - 4:
+        header = _parse_mp3_frame_header(data, pos)
+        if header and (pos + header["length"] >= len(data)
+                       or _parse_mp3_frame_header(data, pos + header["length"])):
+            break
+        header = None
+        pos += 1
+    if header is None:
+        return None
+
+    frames = None
+    # Xing/Info header of VBR (and LAME CBR) files
+    side_info = (32 if not header["mono"] else 17) if header["mpeg1"] else (17 if not header["mono"] else 9)
+    xing_pos = pos + 4 + side_info
+    if data[xing_pos:xing_pos + 4] in (b"Xing", b"Info") and data[xing_pos + 7] & 0x01:
+        frames = int.from_bytes(data[xing_pos + 8:xing_pos + 12], "big")
+    # VBRI header of Fraunhofer encoders
+    vbri_pos = pos + 36
+    if frames is None and data[vbri_pos:vbri_pos + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri_pos + 14:vbri_pos + 18], "big")
+    if frames:
+        duration = frames * header["samples"] / header["sample_rate"]
+        # The header only describes the stream it starts, so check it against the file size
+        estimate = (len(data) - pos) * 8 / header["bitrate"]
+        if abs(duration - estimate) <= MP3_HEADER_TOLERANCE * estimate:
+            return duration
+
+    sample_rate = header["sample_rate"]
+    total_samples = 0
+    while header:
+        total_samples += header["samples"]
+        pos += header["length"]
+        header = _parse_mp3_frame_header(data, pos)
+    return total_samples / sample_rate
+
+
+def probe_duration_ffmpeg(file_path: str) -> Optional[float]:
+    """
+    Reads a media file's duration from the container header reported by ffmpeg.
+
+    Args:
+        file_path (str): The path of the media file.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if it could not be determined.
+    """
+    try:
+        completed = subprocess.run([get_local_ffmpeg_path(), "-hide_banner", "-i", file_path],
+                                   capture_output=True, text=True)
+    except Exception as e:
+        print(f"Error running ffmpeg: {e}")
+        return None
+    # ffmpeg exits with an error because no output is given, but still prints the input info
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", completed.stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def get_audio_duration(file_path: str) -> Optional[float]:
+    """
+    Returns the duration of an audio file without keeping a decoder open.
+
+    MP3 files are measured from their frame headers in-process; anything else, or an MP3
+    that cannot be parsed, falls back to a single ffmpeg probe.
+
+    Args:
+        file_path (str): The path of the audio file.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if it could not be determined.
+    """
+    if file_path.lower().endswith(".mp3"):
+        try:
+            duration = get_mp3_duration(file_path)
+            if duration:
+                return duration
+        except (OSError, IndexError) as e:
+            print(f"Could not parse MP3 headers of {file_path}: {e}")
+    return probe_duration_ffmpeg(file_path)
+
+
+def build_scene_manifest(
+    scripts: List[str],
+    audio_dir: str,
+    durations: Optional[List[float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Writes the job's scene manifest: the text, audio path and audio duration of every scene.
+
+    Durations that are already known (e.g. from whole-script synthesis) are used as-is; the
+    others are probed. Scenes whose audio is missing or unreadable are left out.
+
+    Args:
+        scripts (List[str]): A list of script texts for each scene.
+        audio_dir (str): Directory containing the scene_N.mp3 files; the manifest is written here.
+        durations (Optional[List[float]]): Known duration of each scene's audio.
+
+    Returns:
+        List[Dict[str, Any]]: Manifest entries with "idx", "text", "audio_path" and "duration" keys.
+    """
+    def probe_scene(idx: int) -> Optional[Dict[str, Any]]:
+        audio_path = os.path.join(audio_dir, f"scene_{idx}.mp3")
+        if not os.path.exists(audio_path):
+            print(f"Audio for scene {idx} not found. Skipping.")
+            return None
+        if durations and idx <= len(durations):
+            duration = durations[idx - 1]
+        else:
+            duration = get_audio_duration(audio_path)
+        if not duration:
+            print(f"Could not determine the duration of {audio_path}. Skipping.")
+            return None
+        return {"idx": idx, "text": scripts[idx - 1], "audio_path": audio_path, "duration": duration}
+
+    # Only the ffmpeg fallback spawns a process, so probes overlap like other per-scene work
+    entries = run_in_thread_pool(probe_scene, range(1, len(scripts) + 1), max_workers=SCENE_FETCH_WORKERS)
+    manifest = [entry for entry in entries if entry]
+
+    with open(os.path.join(audio_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def get_scene_manifest(scripts: List[str], audio_dir: str) -> List[Dict[str, Any]]:
+    """
+    Loads the job's scene manifest, building it first if it does not exist yet.
+
+    Args:
+        scripts (List[str]): A list of script texts for each scene.
+        audio_dir (str): Directory containing the scene audio files and the manifest.
+
+    Returns:
+        List[Dict[str, Any]]: Manifest entries with "idx", "text", "audio_path" and "duration" keys.
+    """
+    manifest_path = os.path.join(audio_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading scene manifest, rebuilding it: {e}")
+    return build_scene_manifest(scripts, audio_dir)
@@ -0,0 +1,684 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from openai import OpenAI
+
+from openai_funcs import get_openai_client, get_async_openai_client, build_chat_payload, call_openai_chat_async
+from fact_funcs import get_shingles, jaccard_similarity, find_similar_fact, add_fact
+from config import (BULK_BACKEND, BULK_BATCH_SIZE, BULK_WORKERS, BULK_POLL_SECS, FACT_STORE_PATH,
+                    FACT_SIMILARITY_THRESHOLD)
+
+
+MODEL = "gpt-4o"
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Batch API states after which a batch makes no more progress
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def _fixed_array(items: Dict[str, Any], count: int, description: str) -> Dict[str, Any]:
+    """
+    Builds a JSON schema array with exactly count items, one per video in a batched prompt.
+
+    Args:
+        items (Dict[str, Any]): The schema of each item.
+        count (int): The number of videos in the prompt.
+        description (str): The description of the array.
+
+    Returns:
+        Dict[str, Any]: The array schema.
+    """
+    return {"type": "array", "items": items, "minItems": count, "maxItems": count, "description": description}
+
+
+def build_topics_request(themes: List[str]) -> Dict[str, Any]:
+    """
+    Builds one request that generates a fact for each of several themes.
+
+    Args:
+        themes (List[str]): The subjects or themes, one per video.
+
+    Returns:
+        Dict[str, Any]: The request, with the arguments of call_openai_chat.
+    """
+    function_definition = [
+        {
+            "name": "generate_topics",
+            "description": "Generates one lesser-known fact for each subject, in order.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "topics": _fixed_array(
+                        {"type": "string", "description": "A single, concise fact."},
+                        len(themes),
+                        "One fact per subject, in the order of the subjects."
+                    ),
+                },
+                "required": ["topics"],
+            },
+        }
+    ]
+
+    themes_text = "\n".join(f"{idx+1}. {theme}" for idx, theme in enumerate(themes))
+    prompt = f"""
+    For each of the following numbered subjects, generate a very specific, interesting, and lesser-known fact.
+    Each fact should be engaging, surprising, and not commonly known. Provide each fact as a single, concise sentence.
+
+    Subjects:
+    {themes_text}
+
+    Important Instructions:
+    - Return exactly one fact per subject, in the same order as the subjects.
+    - Every fact must be different from the others.
+    - Do not include any markdown formatting or code blocks.
+    """
+
+    return {
+        "caller": "bulk_topics",
+        "prompt": prompt,
+        "functions": function_definition,
+        "function_call": {"name": "generate_topics"},
+        "temperature": 0.9,
+        "max_tokens": 200 * len(themes),
+    }
+
+
+def build_scripts_request(topics: List[str], video_duration_secs: int = 20) -> Dict[str, Any]:
+    """
+    Builds one request that writes the scene scripts of several videos.
+
+    Args:
+        topics (List[str]): The topic (fact) of each video.
+        video_duration_secs (int, optional): The target length of each video. Defaults to 20.
+
+    Returns:
+        Dict[str, Any]: The request, with the arguments of call_openai_chat.
+    """
+    scene_list = {
+        "type": "object",
+        "properties": {
+            "scenes": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "description": "A single scene description containing 1-2 sentences.",
+                },
+            },
+        },
+        "required": ["scenes"],
+    }
+    function_definition = [
+        {
+            "name": "generate_scene_lists",
+            "description": f"Generates a structured list of scenes for each of several {video_duration_secs}-second videos.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "scripts": _fixed_array(scene_list, len(topics), "One scene list per fact, in the order of the facts."),
+                },
+                "required": ["scripts"],
+            },
+        }
+    ]
+
+    topics_text = "\n".join(f'{idx+1}. "{topic}"' for idx, topic in enumerate(topics))
+    prompt = f"""
+    You are an assistant that creates structured scripts for {video_duration_secs} seconds YouTube videos based on given topics.
+    Write one script for each of the numbered facts below, in the same order.
+    Each video should be divided into 3-4 scenes, each lasting about 5 seconds to fit the total duration of around {video_duration_secs} seconds.
+
+    Each scene should consist of 1-2 sentences, get straight to the point, and must be related to the subject.
+
+    YOU MUST NOT INCLUDE ANY TYPE OF MARKDOWN OR FORMATTING IN THE SCRIPTS, NEVER USE A TITLE.
+
+    YOU MUST WRITE THE SCRIPTS IN English.
+
+    ONLY RETURN THE RAW CONTENT OF THE SCRIPTS. DO NOT INCLUDE "VOICEOVER", "NARRATOR" OR SIMILAR INDICATORS.
+
+    YOU MUST NOT MENTION THE PROMPT, OR ANYTHING ABOUT THE SCRIPTS THEMSELVES.
+
+    Facts:
+    {topics_text}
+    """
+
+    return {
+        "caller": "bulk_scripts",
+        "prompt": prompt,
+        "functions": function_definition,
+        "function_call": {"name": "generate_scene_lists"},
+        "temperature": 0.7,
+        "max_tokens": 400 * len(topics),
+    }
+
+
+def build_metadata_request(videos: List[Tuple[str, List[str]]]) -> Dict[str, Any]:
+    """
+    Builds one request that generates the title, hashtags and stock search terms of several videos.
+
+    Args:
+        videos (List[Tuple[str, List[str]]]): The topic and scene scripts of each video.
+
+    Returns:
+        Dict[str, Any]: The request, with the arguments of call_openai_chat.
+    """
+    metadata = {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "description": "A catchy title for the YouTube video."},
+            "hashtags": {
+                "type": "array",
+                "items": {"type": "string", "description": "A relevant hashtag for the video."},
+            },
+            "search_terms": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "description": "A concise search term suitable for stock footage APIs like Pixabay or Pexels."
+                },
+                "description": "One search term per scene script, in order."
+            },
+        },
+        "required": ["title", "hashtags", "search_terms"],
+    }
+    function_definition = [
+        {
+            "name": "generate_video_metadata",
+            "description": "Generates the title, hashtags and stock footage search terms of each video, in order.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "videos": _fixed_array(metadata, len(videos), "One entry per video, in the order of the videos."),
+                },
+                "required": ["videos"],
+            },
+        }
+    ]
+
+    prompt = '''
+    For each of the numbered YouTube videos below, generate:
+    - a catchy video title and 5 relevant hashtags, based on the video's fact;
+    - one stock footage search term per scene script, in the same order as the scenes.
+
+    **Search term instructions:**
+    - The search terms must be generic and commonly available in stock footage, such as "people walking", "sunset", "city skyline", "nature landscape", "abstract patterns", "close-up of hands", etc.
+    - Avoid specific names, events, or concepts that are unlikely to be found in stock footage.
+    - Each search term should be concise (1-3 words) and related to the video's fact, not just to an isolated scene.
+
+    Videos:
+    '''
+    for idx, (topic, scripts) in enumerate(videos):
+        prompt += f'\n    Video {idx+1} - Fact: "{topic}"\n'
+        for scene_idx, script in enumerate(scripts):
+            prompt += f"    Scene {scene_idx+1}: {script}\n"
+
+    return {
+        "caller": "bulk_metadata",
+        "prompt": prompt,
+        "functions": function_definition,
+        "function_call": {"name": "generate_video_metadata"},
+        "temperature": 0.7,
+        "max_tokens": 300 * len(videos),
+    }
+
+
+def run_requests_chat(
+    requests: List[Dict[str, Any]],
+    client: OpenAI,
+    max_workers: int = BULK_WORKERS
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Sends batched requests to the Chat Completions API, several at a time.
+
+    All calls are driven by one event loop through call_openai_chat_async, using the pooled
+    asynchronous client for the API key of client.
+
+    Args:
+        requests (List[Dict[str, Any]]): The requests, each with a "custom_id".
+        client (OpenAI): The OpenAI client.
+        max_workers (int, optional): Maximum number of concurrent calls. Defaults to BULK_WORKERS.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: The function-call arguments of each request by
+                                             custom_id, or None where the call failed.
+    """
+    async def send_all() -> List[Optional[Dict[str, Any]]]:
+        async_client = get_async_openai_client(client.api_key)
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def send(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                result = await call_openai_chat_async(
+                    prompt=request["prompt"],
+                    model=MODEL,
+                    max_tokens=request["max_tokens"],
+                    temperature=request["temperature"],
+                    functions=request["functions"],
+                    function_call=request["function_call"],
+                    client=async_client,
+                    caller=request["caller"]
+                )
+            return result if isinstance(result, dict) else None
+
+        return await asyncio.gather(*(send(request) for request in requests))
+
+    results = asyncio.run(send_all())
+    return {request["custom_id"]: result for request, result in zip(requests, results)}
+
+
+def write_batch_file(requests: List[Dict[str, Any]], path: str) -> None:
+    """
+    Writes requests as an OpenAI Batch API input file (one JSON request per line).
+
+    Args:
+        requests (List[Dict[str, Any]]): The requests, each with a "custom_id".
+        path (str): The JSONL file to write.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            body = build_chat_payload(request["prompt"], MODEL, request["max_tokens"], request["temperature"],
+                                      request["functions"], request["function_call"])
+            line = {"custom_id": request["custom_id"], "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+            f.write(json.dumps(line) + "\n")
+
+
+def run_batch_openai(input_path: str, output_path: str, client: OpenAI, poll_secs: float = BULK_POLL_SECS) -> bool:
+    """
+    Runs a Batch API input file on OpenAI and downloads the output file once the batch is done.
+
+    Batches are billed at a discount and complete within 24 hours, which suits nightly runs.
+
+    Args:
+        input_path (str): The Batch API input file.
+        output_path (str): Where the Batch API output file will be saved.
+        client (OpenAI): The OpenAI client.
+        poll_secs (float, optional): Seconds between status checks. Defaults to BULK_POLL_SECS.
+
+    Returns:
+        bool: True if the output file was saved, False otherwise.
+    """
+    try:
+        with open(input_path, "rb") as f:
+            input_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window="24h")
+        print(f"Submitted batch {batch.id} ({input_path}).")
+
+        while batch.status not in BATCH_FINAL_STATES:
+            time.sleep(poll_secs)
+            batch = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts:
+                print(f"Batch {batch.id}: {batch.status}, {counts.completed}/{counts.total} requests done.")
+
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"Batch {batch.id} ended with status {batch.status}.")
+            return False
+        content = client.files.content(batch.output_file_id)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content.text)
+        return True
+    except Exception as e:
+        print(f"An error occurred while running batch {input_path}: {e}")
+        return False
+
+
+def fill_schema(schema: Dict[str, Any], label: str) -> Any:
+    """
+    Builds a placeholder value that satisfies a JSON schema, for the local batch stand-in.
+
+    Arrays get minItems items (three if unset), and strings are derived from the label so
+    that every value is distinct and traceable.
+
+    Args:
+        schema (Dict[str, Any]): The JSON schema.
+        label (str): A prefix identifying the value.
+
+    Returns:
+        Any: The placeholder value.
+    """
+    if schema.get("type") == "object":
+        return {name: fill_schema(sub_schema, f"{label} {name}")
+                for name, sub_schema in schema.get("properties", {}).items()}
+    if schema.get("type") == "array":
+        count = schema.get("minItems", 3)
+        return [fill_schema(schema.get("items", {}), f"{label} {idx+1}") for idx in range(count)]
+    if schema.get("type") in ("integer", "number"):
+        return 0
+    if schema.get("type") == "boolean":
+        return False
+    return label
+
+
+def run_batch_local(input_path: str, output_path: str) -> bool:
+    """
+    Answers a Batch API input file offline, writing a Batch API output file.
+
+    A stand-in for run_batch_openai in tests and dry runs: every request gets a successful
+    response whose function-call arguments are placeholders built from the request's schema,
+    so the whole bulk pipeline can run without an API key.
+
+    Args:
+        input_path (str): The Batch API input file.
+        output_path (str): Where the Batch API output file will be saved.
+
+    Returns:
+        bool: True if the output file was saved, False otherwise.
+    """
+    try:
+        with open(input_path, "r", encoding="utf-8") as f_in, open(output_path, "w", encoding="utf-8") as f_out:
+            for line_number, line in enumerate(f_in, start=1):
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                body = request["body"]
+                name = body["function_call"]["name"]
+                function = next(func for func in body["functions"] if func["name"] == name)
+                arguments = fill_schema(function["parameters"], request["custom_id"])
+                response_body = {
+                    "id": f"chatcmpl-local-{line_number}",
+                    "object": "chat.completion",
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": None,
+                            "function_call": {"name": name, "arguments": json.dumps(arguments)},
+                        },
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }
+                output = {
+                    "id": f"batch_req_local_{line_number}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "request_id": f"local-{line_number}", "body": response_body},
+                    "error": None,
+                }
+                f_out.write(json.dumps(output) + "\n")
+        return True
+    except (OSError, ValueError, KeyError, StopIteration) as e:
+        print(f"Invalid batch input file {input_path}: {e}")
+        return False
+
+
+def read_batch_output(path: str) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Reads the function-call arguments of each request from a Batch API output file.
+
+    Args:
+        path (str): The Batch API output file.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: The arguments by custom_id, or None where the
+                                             request failed.
+    """
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            output = json.loads(line)
+            custom_id = output.get("custom_id")
+            response = output.get("response") or {}
+            try:
+                if output.get("error") or response.get("status_code") != 200:
+                    raise ValueError(output.get("error") or f"HTTP {response.get('status_code')}")
+                function_call = response["body"]["choices"][0]["message"]["function_call"]
+                results[custom_id] = json.loads(function_call["arguments"])
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"Batch request {custom_id} failed: {e}")
+                results[custom_id] = None
+    return results
+
+
+def run_requests(
+    requests: List[Dict[str, Any]],
+    stage: str,
+    backend: str,
+    client: Optional[OpenAI],
+    work_dir: str
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Runs the requests of one bulk stage on the selected backend.
+
+    Args:
+        requests (List[Dict[str, Any]]): The requests, each with a "custom_id".
+        stage (str): The stage name, used for the batch file names.
+        backend (str): "chat" (Chat Completions calls), "batch" (OpenAI Batch API) or
+                       "local" (offline stand-in).
+        client (Optional[OpenAI]): The OpenAI client (not needed for "local").
+        work_dir (str): Directory for the batch input and output files.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: The function-call arguments of each request by
+                                             custom_id, or None where it failed.
+
+    Raises:
+        ValueError: If the backend is unknown, or needs a client and none is given.
+    """
+    if backend not in ("chat", "batch", "local"):
+        raise ValueError(f"Unknown bulk backend: {backend}")
+    if backend != "local" and client is None:
+        raise ValueError(f"The {backend} backend needs an OpenAI client.")
+    if backend == "chat":
+        return run_requests_chat(requests, client)
+
+    os.makedirs(work_dir, exist_ok=True)
+    input_path = os.path.join(work_dir, f"{stage}_requests.jsonl")
+    output_path = os.path.join(work_dir, f"{stage}_results.jsonl")
+    write_batch_file(requests, input_path)
+    if backend == "batch":
+        ok = run_batch_openai(input_path, output_path, client)
+    else:
+        ok = run_batch_local(input_path, output_path)
+    return read_batch_output(output_path) if ok else {}
+
+
+def _run_stage(
+    stage: str,
+    inputs: List[Any],
+    build_request: Callable[[List[Any]], Dict[str, Any]],
+    key: str,
+    backend: str,
+    client: Optional[OpenAI],
+    work_dir: str,
+    batch_size: int
+) -> List[Optional[Any]]:
+    """
+    Runs one bulk stage: groups the inputs into batched prompts and splits the answers again.
+
+    Args:
+        stage (str): The stage name.
+        inputs (List[Any]): One input per video.
+        build_request (Callable[[List[Any]], Dict[str, Any]]): Builds the request for a group of inputs.
+        key (str): The function-call argument holding one answer per input.
+        backend (str): The backend, see run_requests.
+        client (Optional[OpenAI]): The OpenAI client.
+        work_dir (str): Directory for batch files.
+        batch_size (int): Maximum number of videos per prompt, at least 1.
+
+    Returns:
+        List[Optional[Any]]: One answer per input, or None where its group failed.
+    """
+    if not inputs:
+        return []
+    groups = [inputs[start:start + batch_size] for start in range(0, len(inputs), batch_size)]
+    requests = [dict(build_request(group), custom_id=f"{stage}-{idx}") for idx, group in enumerate(groups)]
+    results = run_requests(requests, stage, backend, client, work_dir)
+
+    answers = []
+    for request, group in zip(requests, groups):
+        values = (results.get(request["custom_id"]) or {}).get(key)
+        if not isinstance(values, list) or len(values) != len(group):
+            print(f"Bulk request {request['custom_id']} returned no usable answer for {len(group)} video(s).")
+            values = [None] * len(group)
+        answers.extend(values)
+    return answers
+
+
+def generate_bundles(
+    themes: List[str],
+    backend: str = BULK_BACKEND,
+    client: Optional[OpenAI] = None,
+    work_dir: str = os.path.join("temp", "bulk"),
+    batch_size: int = BULK_BATCH_SIZE,
+    video_duration_secs: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Generates the topic, script, title, hashtags and search terms of one video per theme.
+
+    Instead of four calls per video, each stage (topics, scripts, then title, hashtags and
+    search terms together) sends batch_size videos per prompt. Videos whose answers are
+    missing or malformed, or whose topic repeats a fact in the fact store or an earlier
+    topic of the run, are left out. Only the topics of complete bundles are stored.
+
+    Args:
+        themes (List[str]): The subject or theme of each video.
+        backend (str, optional): "chat", "batch" or "local". Defaults to BULK_BACKEND.
+        client (Optional[OpenAI], optional): The OpenAI client (not needed for "local").
+        work_dir (str, optional): Directory for batch files. Defaults to "temp/bulk".
+        batch_size (int, optional): Maximum number of videos per prompt, raised to 1 if smaller.
+                                    Defaults to BULK_BATCH_SIZE.
+        video_duration_secs (int, optional): The target length of each video. Defaults to 20.
+
+    Returns:
+        List[Dict[str, Any]]: Bundles with "theme", "topic", "scripts", "title", "hashtags"
+                              and "search_terms" keys, in theme order.
+    """
+    batch_size = max(1, batch_size)
+    run_stage = partial(_run_stage, backend=backend, client=client, work_dir=work_dir, batch_size=batch_size)
+
+    topics = run_stage("topics", themes, build_topics_request, "topics")
+    # Drop repeats of facts from earlier runs or of earlier topics in this one; the
+    # placeholders of the local backend are kept out of the store
+    use_fact_store = bool(FACT_STORE_PATH) and backend != "local"
+    if use_fact_store:
+        accepted_shingles = []
+        for idx, topic in enumerate(topics):
+            if not isinstance(topic, str) or not topic.strip():
+                continue
+            shingles = get_shingles(topic)
+            duplicate = next((topics[other] for other, other_shingles in accepted_shingles
+                              if jaccard_similarity(shingles, other_shingles) >= FACT_SIMILARITY_THRESHOLD), None)
+            if duplicate is None:
+                duplicate = find_similar_fact(topic)
+            if duplicate:
+                print(f"Dropping the topic for \"{themes[idx]}\", which repeats \"{duplicate}\".")
+                topics[idx] = None
+            else:
+                accepted_shingles.append((idx, shingles))
+    with_topic = [idx for idx, topic in enumerate(topics) if isinstance(topic, str) and topic.strip()]
+
+    script_lists = run_stage("scripts", [topics[idx] for idx in with_topic],
+                             partial(build_scripts_request, video_duration_secs=video_duration_secs), "scripts")
+    scripts = {
+        idx: script_list["scenes"] for idx, script_list in zip(with_topic, script_lists)
+        if isinstance(script_list, dict) and isinstance(script_list.get("scenes"), list) and script_list["scenes"]
+    }
+    with_script = sorted(scripts)
+
+    metadata = run_stage("metadata", [(topics[idx], scripts[idx]) for idx in with_script],
+                         build_metadata_request, "videos")
+
+    bundles = []
+    for idx, video in zip(with_script, metadata):
+        if not isinstance(video, dict) or not video.get("title"):
+            continue
+        bundles.append({
+            "theme": themes[idx],
+            "topic": topics[idx],
+            "scripts": scripts[idx],
+            "title": video["title"],
+            "hashtags": video.get("hashtags", []),
+            "search_terms": video.get("search_terms", []),
+        })
+
+    # Only complete bundles use up their facts; topics dropped by a later stage can come back
+    if use_fact_store:
+        for bundle in bundles:
+            add_fact(bundle["theme"], bundle["topic"])
+
+    if len(bundles) < len(themes):
+        print(f"Generated {len(bundles)} of {len(themes)} bundles.")
+    return bundles
+
+
+def write_bundle_manifest(bundles: List[Dict[str, Any]], path: str) -> None:
+    """
+    Writes bundles to a JSONL manifest, one bundle per line.
+
+    Args:
+        bundles (List[Dict[str, Any]]): The bundles from generate_bundles.
+        path (str): The manifest path.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.part"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for bundle in bundles:
+            f.write(json.dumps(bundle, ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+
+def read_bundle_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the bundles of a JSONL manifest written by write_bundle_manifest.
+
+    Args:
+        path (str): The manifest path.
+
+    Returns:
+        List[Dict[str, Any]]: The bundles, in file order.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> int:
+    """
+    Command-line entry point: generates bundles for the given themes and writes the manifest.
+
+    Returns:
+        int: The exit status (1 if no bundle could be generated).
+    """
+    parser = argparse.ArgumentParser(description="Generate video topic/script/title/search-term bundles in bulk.")
+    parser.add_argument("themes", nargs="*", help="Subjects or themes, one video each.")
+    parser.add_argument("--themes-file", help="A text file with one theme per line.")
+    parser.add_argument("--output", default="bundles.jsonl", help="The JSONL manifest to write.")
+    parser.add_argument("--backend", choices=("chat", "batch", "local"), default=BULK_BACKEND)
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="Videos per prompt.")
+    parser.add_argument("--duration", type=int, default=20, help="Target video length in seconds.")
+    parser.add_argument("--work-dir", default=os.path.join("temp", "bulk"), help="Directory for batch files.")
+    args = parser.parse_args()
+
+    themes = list(args.themes)
+    if args.themes_file:
+        with open(args.themes_file, "r", encoding="utf-8") as f:
+            themes.extend(line.strip() for line in f if line.strip())
+    if not themes:
+        parser.error("No themes given.")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1.")
+
+    client = None
+    if args.backend != "local":
+        api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not api_key:
+            parser.error("OPENAI_API_KEY is not set.")
+        client = get_openai_client(api_key)
+
+    bundles = generate_bundles(themes, backend=args.backend, client=client, work_dir=args.work_dir,
+                               batch_size=args.batch_size, video_duration_secs=args.duration)
+    write_bundle_manifest(bundles, args.output)
+    print(f"Wrote {len(bundles)} bundle(s) to {args.output}.")
+    return 0 if bundles else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,567 @@
+import os
+import json
+import math
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from helper_funcs import stream_download, fetch_trimmed_clip, open_sqlite_db
+from http_funcs import get_session
+from config import (CLIP_CACHE_DIR, CLIP_CACHE_MAX_BYTES, CACHE_DB_PATH, SEARCH_CACHE_TTL_SECS,
+                    TRIMMED_FETCH, TRIM_MARGIN_SECS, TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES,
+                    OPENAI_CACHE_MAX_ENTRIES)
+
+
+# Serializes eviction passes within this process
+_eviction_lock = threading.Lock()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Builds a stable content address from the given key parts.
+
+    Args:
+        *parts (Any): JSON-serializable values that identify the cached item.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the key parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(cache_dir: str, key: str, suffix: str) -> str:
+    """
+    Returns the location of a cache entry, sharded by the first two key characters.
+
+    Args:
+        cache_dir (str): The root directory of the cache.
+        key (str): The cache key from make_cache_key.
+        suffix (str): The file extension of the entry (e.g. ".mp4").
+
+    Returns:
+        str: The file system path of the entry.
+    """
+    return os.path.join(cache_dir, key[:2], f"{key}{suffix}")
+
+
+def get_cached_file(cache_dir: str, key: str, suffix: str) -> Optional[str]:
+    """
+    Looks up a cache entry and marks it as recently used.
+
+    Args:
+        cache_dir (str): The root directory of the cache.
+        key (str): The cache key from make_cache_key.
+        suffix (str): The file extension of the entry.
+
+    Returns:
+        Optional[str]: The path of the cached file, or None on a miss.
+    """
+    path = _cache_path(cache_dir, key, suffix)
+    try:
+        os.utime(path)  # modification time doubles as the LRU timestamp
+        return path
+    except OSError:
+        return None
+
+
+def evict_cache(cache_dir: str, max_bytes: int) -> None:
+    """
+    Deletes the least recently used entries until the cache fits in its byte budget.
+
+    Args:
+        cache_dir (str): The root directory of the cache.
+        max_bytes (int): The maximum total size of the cache in bytes.
+    """
+    with _eviction_lock:
+        entries = []
+        total_bytes = 0
+        for root, _, files in os.walk(cache_dir):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+                print(f"Evicted cache entry: {path}")
+            except OSError:
+                pass
+
+
+def store_cached_file(cache_dir: str, key: str, source_path: str, suffix: str, max_bytes: int) -> Optional[str]:
+    """
+    Copies a file into the cache atomically and enforces the byte budget.
+
+    Args:
+        cache_dir (str): The root directory of the cache.
+        key (str): The cache key from make_cache_key.
+        source_path (str): The file to store.
+        suffix (str): The file extension of the entry.
+        max_bytes (int): The maximum total size of the cache in bytes.
+
+    Returns:
+        Optional[str]: The path of the cached file, or None if it could not be stored.
+    """
+    path = _cache_path(cache_dir, key, suffix)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        os.close(fd)
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"Error storing cache entry {path}: {e}")
+        if "temp_path" in locals() and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+    evict_cache(cache_dir, max_bytes)
+    return path
+
+
+def materialize_cached_file(cached_path: str, output_path: str) -> None:
+    """
+    Copies a cached file to output_path.
+
+    The entry is copied rather than hard-linked, so a job that later rewrites its scene
+    file in place can never change the entry shared by other jobs. Audio and clips are
+    small enough that the copy costs little next to a download.
+
+    Args:
+        cached_path (str): The path of the cached file.
+        output_path (str): The destination path.
+
+    Raises:
+        OSError: If the cached file could not be copied.
+    """
+    temp_path = f"{output_path}.part"
+    try:
+        shutil.copyfile(cached_path, temp_path)
+        os.replace(temp_path, output_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _materialize_if_cached(key: str, output_path: str) -> bool:
+    """
+    Copies a clip cache entry into place if it exists.
+
+    Args:
+        key (str): The cache key from make_cache_key.
+        output_path (str): The destination path.
+
+    Returns:
+        bool: True if the entry was found and materialized, False otherwise.
+    """
+    cached_path = get_cached_file(CLIP_CACHE_DIR, key, ".mp4")
+    if not cached_path:
+        return False
+    try:
+        materialize_cached_file(cached_path, output_path)
+        return True
+    except OSError as e:
+        print(f"Clip cache entry unavailable, downloading instead: {e}")
+        return False
+
+
+def get_cached_clip(
+    provider: str,
+    asset_id: Any,
+    rendition: str,
+    output_path: str,
+    max_duration: Optional[float] = None
+) -> bool:
+    """
+    Materializes a stock clip from the persistent clip cache, without any network access.
+
+    Looks up the same entries fetch_clip would: the full clip, and with max_duration and
+    TRIMMED_FETCH also the trimmed one.
+
+    Args:
+        provider (str): The name of the clip provider (e.g. "pexels").
+        asset_id (Any): The provider's identifier of the clip.
+        rendition (str): The selected rendition (e.g. a resolution or file ID).
+        output_path (str): The file system path where the clip will be saved.
+        max_duration (Optional[float]): Seconds of the clip the scene will use.
+
+    Returns:
+        bool: True if the clip was found in the cache and placed at output_path.
+    """
+    if CLIP_CACHE_MAX_BYTES <= 0:
+        return False
+    key = make_cache_key("clip", provider, str(asset_id), rendition)
+    if _materialize_if_cached(key, output_path):
+        print(f"Clip cache hit for {provider} {asset_id} ({rendition})")
+        return True
+
+    if max_duration and TRIMMED_FETCH:
+        window = math.ceil(max_duration + TRIM_MARGIN_SECS)
+        trim_key = make_cache_key("clip", provider, str(asset_id), rendition, f"trim{window}")
+        if _materialize_if_cached(trim_key, output_path):
+            print(f"Clip cache hit for {provider} {asset_id} ({rendition}, first {window}s)")
+            return True
+    return False
+
+
+def fetch_clip(
+    provider: str,
+    asset_id: Any,
+    rendition: str,
+    url: str,
+    output_path: str,
+    max_duration: Optional[float] = None
+) -> None:
+    """
+    Downloads a stock clip through the persistent clip cache.
+
+    Clips are keyed by provider, asset ID and rendition, so a clip that was used by an earlier
+    job is copied from disk instead of being downloaded again. Set CLIP_CACHE_MAX_BYTES to 0
+    to disable the cache.
+
+    When max_duration is given and TRIMMED_FETCH is enabled, only the first max_duration
+    seconds (plus TRIM_MARGIN_SECS) are fetched with ffmpeg; if that fails, the full file is
+    downloaded instead. Trimmed clips are cached separately from full ones.
+
+    Args:
+        provider (str): The name of the clip provider (e.g. "pexels").
+        asset_id (Any): The provider's identifier of the clip.
+        rendition (str): The selected rendition (e.g. a resolution or file ID).
+        url (str): The download URL of the rendition.
+        output_path (str): The file system path where the clip will be saved.
+        max_duration (Optional[float]): Seconds of the clip the scene will use. None fetches
+                                        the whole clip.
+
+    Raises:
+        requests.RequestException: If the clip is not cached and the download fails.
+    """
+    if get_cached_clip(provider, asset_id, rendition, output_path, max_duration):
+        return
+
+    use_cache = CLIP_CACHE_MAX_BYTES > 0
+    key = make_cache_key("clip", provider, str(asset_id), rendition)
+    if max_duration and TRIMMED_FETCH:
+        window = math.ceil(max_duration + TRIM_MARGIN_SECS)
+        trim_key = make_cache_key("clip", provider, str(asset_id), rendition, f"trim{window}")
+        if fetch_trimmed_clip(url, output_path, window):
+            print(f"Fetched first {window}s of {provider} {asset_id}")
+            if use_cache:
+                store_cached_file(CLIP_CACHE_DIR, trim_key, output_path, ".mp4", CLIP_CACHE_MAX_BYTES)
+            return
+        print(f"Trimmed fetch failed for {provider} {asset_id}, downloading the full clip.")
+
+    stream_download(url, output_path, session=get_session(provider))
+    if use_cache:
+        store_cached_file(CLIP_CACHE_DIR, key, output_path, ".mp4", CLIP_CACHE_MAX_BYTES)
+
+
+def get_cached_generation(provider: str, params: Dict[str, Any], output_path: str) -> bool:
+    """
+    Materializes a previously generated clip (e.g. from Luma) into the job workspace.
+
+    Generated clips share the clip cache's directory and byte budget, but are keyed by the
+    generation request rather than by a provider asset ID.
+
+    Args:
+        provider (str): The name of the generation provider (e.g. "luma").
+        params (Dict[str, Any]): Everything that determines the clip: prompt, aspect ratio, model.
+        output_path (str): Where the clip should be placed.
+
+    Returns:
+        bool: True on a cache hit, False if the clip has to be generated.
+    """
+    if CLIP_CACHE_MAX_BYTES <= 0:
+        return False
+    return _materialize_if_cached(make_cache_key("generation", provider, params), output_path)
+
+
+def store_cached_generation(provider: str, params: Dict[str, Any], source_path: str) -> None:
+    """
+    Adds a generated clip to the clip cache and enforces its byte budget.
+
+    Args:
+        provider (str): The name of the generation provider (e.g. "luma").
+        params (Dict[str, Any]): The same parameters passed to get_cached_generation.
+        source_path (str): The downloaded clip.
+    """
+    if CLIP_CACHE_MAX_BYTES <= 0:
+        return
+    key = make_cache_key("generation", provider, params)
+    store_cached_file(CLIP_CACHE_DIR, key, source_path, ".mp4", CLIP_CACHE_MAX_BYTES)
+
+
+def get_cached_tts(engine: str, params: Dict[str, Any], output_path: str) -> bool:
+    """
+    Materializes previously synthesized audio into the job's audio directory.
+
+    Args:
+        engine (str): The TTS engine (e.g. "elevenlabs" or "gtts").
+        params (Dict[str, Any]): Everything that affects the audio: voice, model, voice
+                                 settings, text and any context text.
+        output_path (str): Where the scene audio file should be placed.
+
+    Returns:
+        bool: True on a cache hit, False if the audio has to be synthesized.
+    """
+    if TTS_CACHE_MAX_BYTES <= 0:
+        return False
+    key = make_cache_key("tts", engine, params)
+    cached_path = get_cached_file(TTS_CACHE_DIR, key, ".mp3")
+    if not cached_path:
+        return False
+    try:
+        materialize_cached_file(cached_path, output_path)
+        print(f"TTS cache hit: {output_path}")
+        return True
+    except OSError as e:
+        print(f"TTS cache entry unavailable, synthesizing instead: {e}")
+        return False
+
+
+def store_cached_tts(engine: str, params: Dict[str, Any], source_path: str) -> None:
+    """
+    Adds synthesized audio to the TTS cache and enforces its byte budget.
+
+    Args:
+        engine (str): The TTS engine (e.g. "elevenlabs" or "gtts").
+        params (Dict[str, Any]): The same parameters passed to get_cached_tts.
+        source_path (str): The synthesized audio file.
+    """
+    if TTS_CACHE_MAX_BYTES <= 0:
+        return
+    key = make_cache_key("tts", engine, params)
+    store_cached_file(TTS_CACHE_DIR, key, source_path, ".mp3", TTS_CACHE_MAX_BYTES)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    Opens the key-value cache database, creating its table on first use.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: An open connection to the cache database.
+    """
+    conn = open_sqlite_db(db_path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS kv_cache (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+        """
+    )
+    return conn
+
+
+def kv_get(db_path: str, namespace: str, key: str, ttl_secs: Optional[int] = None) -> Optional[Any]:
+    """
+    Reads a JSON value from the key-value cache.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+        namespace (str): The cache namespace (e.g. "search").
+        key (str): The cache key from make_cache_key.
+        ttl_secs (Optional[int]): Maximum age of the entry in seconds. None means no expiry.
+
+    Returns:
+        Optional[Any]: The cached value, or None on a miss or if the entry has expired.
+    """
+    try:
+        conn = _connect(db_path)
+        try:
+            row = conn.execute(
+                "SELECT value, created_at FROM kv_cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            now = time.time()
+            if ttl_secs is not None and now - created_at > ttl_secs:
+                conn.execute("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", (namespace, key))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE kv_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            conn.commit()
+            return json.loads(value)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error reading {namespace} cache: {e}")
+        return None
+
+
+def kv_set(db_path: str, namespace: str, key: str, value: Any) -> None:
+    """
+    Writes a JSON-serializable value to the key-value cache.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+        namespace (str): The cache namespace (e.g. "search").
+        key (str): The cache key from make_cache_key.
+        value (Any): The value to store.
+    """
+    try:
+        conn = _connect(db_path)
+        try:
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO kv_cache (namespace, key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error writing {namespace} cache: {e}")
+
+
+def kv_purge_expired(db_path: str, namespace: str, ttl_secs: int) -> None:
+    """
+    Deletes entries of a namespace that are older than the given TTL.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+        namespace (str): The cache namespace.
+        ttl_secs (int): Maximum age of an entry in seconds.
+    """
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute(
+                "DELETE FROM kv_cache WHERE namespace = ? AND created_at < ?",
+                (namespace, time.time() - ttl_secs)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error purging {namespace} cache: {e}")
+
+
+def kv_evict_lru(db_path: str, namespace: str, max_entries: int) -> None:
+    """
+    Deletes the least recently used entries of a namespace beyond the given count.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+        namespace (str): The cache namespace.
+        max_entries (int): The number of most recently used entries to keep.
+    """
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute(
+                "DELETE FROM kv_cache WHERE namespace = ? AND key NOT IN ("
+                "SELECT key FROM kv_cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT ?)",
+                (namespace, namespace, max_entries)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error evicting {namespace} cache: {e}")
+
+
+def get_cached_search(
+    provider: str,
+    search_term: str,
+    min_duration: Optional[int],
+    filters: Dict[str, Any]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Returns cached stock-footage search results, if they are still fresh.
+
+    Args:
+        provider (str): The name of the stock provider (e.g. "pexels").
+        search_term (str): The search term.
+        min_duration (Optional[int]): The minimum clip duration used for filtering.
+        filters (Dict[str, Any]): Any other request parameters that affect the results.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The cached hits, or None on a miss.
+    """
+    if SEARCH_CACHE_TTL_SECS <= 0:
+        return None
+    key = make_cache_key(provider, search_term.strip().lower(), min_duration, filters)
+    hits = kv_get(CACHE_DB_PATH, "search", key, ttl_secs=SEARCH_CACHE_TTL_SECS)
+    if hits is not None:
+        print(f"Search cache hit for {provider} '{search_term}'")
+    return hits
+
+
+def store_cached_search(
+    provider: str,
+    search_term: str,
+    min_duration: Optional[int],
+    filters: Dict[str, Any],
+    hits: List[Dict[str, Any]]
+) -> None:
+    """
+    Stores stock-footage search results and drops expired ones.
+
+    Args:
+        provider (str): The name of the stock provider (e.g. "pexels").
+        search_term (str): The search term.
+        min_duration (Optional[int]): The minimum clip duration used for filtering.
+        filters (Dict[str, Any]): Any other request parameters that affect the results.
+        hits (List[Dict[str, Any]]): The search results to cache.
+    """
+    if SEARCH_CACHE_TTL_SECS <= 0:
+        return
+    key = make_cache_key(provider, search_term.strip().lower(), min_duration, filters)
+    kv_set(CACHE_DB_PATH, "search", key, hits)
+    kv_purge_expired(CACHE_DB_PATH, "search", SEARCH_CACHE_TTL_SECS)
+
+
+def get_cached_chat(payload: Dict[str, Any]) -> Optional[Any]:
+    """
+    Returns a cached OpenAI chat response for a byte-identical request, if there is one.
+
+    Args:
+        payload (Dict[str, Any]): The chat request: model, messages, max_tokens, temperature
+                                  and any function definitions.
+
+    Returns:
+        Optional[Any]: The parsed response, or None on a miss.
+    """
+    return kv_get(CACHE_DB_PATH, "openai", make_cache_key("openai", payload))
+
+
+def store_cached_chat(payload: Dict[str, Any], result: Any) -> None:
+    """
+    Stores a parsed OpenAI chat response and evicts the least recently used ones.
+
+    Args:
+        payload (Dict[str, Any]): The same request passed to get_cached_chat.
+        result (Any): The parsed response to cache.
+    """
+    kv_set(CACHE_DB_PATH, "openai", make_cache_key("openai", payload), result)
+    kv_evict_lru(CACHE_DB_PATH, "openai", OPENAI_CACHE_MAX_ENTRIES)
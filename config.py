@@ -0,0 +1,157 @@
+import os
+
+from dotenv import load_dotenv
+
+
+# Load overrides from a local .env file, if present
+load_dotenv()
+
+
+def _get_bool(name: str, default: bool) -> bool:
+    """
+    Reads a boolean setting from the environment ("1", "true", "yes" or "on" mean True).
+
+    Args:
+        name (str): The environment variable name.
+        default (bool): The value used when the variable is unset.
+
+    Returns:
+        bool: The configured value.
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _get_int(name: str, default: int) -> int:
+    """
+    Reads an integer setting from the environment.
+
+    Args:
+        name (str): The environment variable name.
+        default (int): The value used when the variable is unset or invalid.
+
+    Returns:
+        int: The configured value.
+    """
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        print(f"Invalid value for {name}, using default {default}.")
+        return default
+
+
+def _get_float(name: str, default: float) -> float:
+    """
+    Reads a float setting from the environment.
+
+    Args:
+        name (str): The environment variable name.
+        default (float): The value used when the variable is unset or invalid.
+
+    Returns:
+        float: The configured value.
+    """
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        print(f"Invalid value for {name}, using default {default}.")
+        return default
+
+
+# Job queue (each job has its own workspace, so jobs can run side by side)
+MAX_JOB_WORKERS = _get_int("MAX_JOB_WORKERS", os.cpu_count() or 1)
+JOB_RETENTION_SECS = _get_int("JOB_RETENTION_SECS", 3600)
+DOWNLOAD_TTL_SECS = _get_int("DOWNLOAD_TTL_SECS", 60)
+
+# Stock footage pipelines
+SCENE_FETCH_WORKERS = _get_int("SCENE_FETCH_WORKERS", 4)
+
+# Rendering ("moviepy", "ffmpeg" or "segments")
+RENDER_ENGINE = os.environ.get("RENDER_ENGINE", "moviepy")
+RENDER_FPS = _get_int("RENDER_FPS", 30)
+RENDER_PROCESSES = _get_int("RENDER_PROCESSES", os.cpu_count() or 1)
+# Fraction of the 1080x1920 output a downloaded rendition's 9:16 crop must cover
+# (0.5 accepts 1080p landscape footage; 1.0 only 4K landscape footage)
+RENDITION_QUALITY_FLOOR = _get_float("RENDITION_QUALITY_FLOOR", 0.5)
+FFMPEG_PRESET = os.environ.get("FFMPEG_PRESET", "medium")
+FFMPEG_CRF = _get_int("FFMPEG_CRF", 23)
+
+# Persistent clip cache (set CLIP_CACHE_MAX_BYTES to 0 to disable)
+CLIP_CACHE_DIR = os.environ.get("CLIP_CACHE_DIR", os.path.join("cache", "clips"))
+CLIP_CACHE_MAX_BYTES = _get_int("CLIP_CACHE_MAX_BYTES", 5 * 1024 ** 3)
+
+# Persistent TTS audio cache (set TTS_CACHE_MAX_BYTES to 0 to disable)
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+TTS_CACHE_MAX_BYTES = _get_int("TTS_CACHE_MAX_BYTES", 512 * 1024 ** 2)
+
+# Fetch only the part of a stock clip a scene uses, with some slack for keyframes
+TRIMMED_FETCH = _get_bool("TRIMMED_FETCH", True)
+TRIM_MARGIN_SECS = _get_float("TRIM_MARGIN_SECS", 1.0)
+
+# Key-value cache database and stock search cache (set SEARCH_CACHE_TTL_SECS to 0 to disable)
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", os.path.join("cache", "cache.sqlite3"))
+SEARCH_CACHE_TTL_SECS = _get_int("SEARCH_CACHE_TTL_SECS", 24 * 3600)
+
+# Pooled HTTP sessions for provider APIs
+HTTP_POOL_SIZE = _get_int("HTTP_POOL_SIZE", 10)
+HTTP_CONNECT_TIMEOUT = _get_float("HTTP_CONNECT_TIMEOUT", 10.0)
+HTTP_READ_TIMEOUT = _get_float("HTTP_READ_TIMEOUT", 60.0)
+HTTP_RETRIES = _get_int("HTTP_RETRIES", 3)
+HTTP_BACKOFF_FACTOR = _get_float("HTTP_BACKOFF_FACTOR", 0.5)
+
+# ElevenLabs synthesis (match ELEVENLABS_CONCURRENCY to the plan's concurrency limit)
+ELEVENLABS_CONCURRENCY = _get_int("ELEVENLABS_CONCURRENCY", 2)
+ELEVENLABS_MAX_RETRIES = _get_int("ELEVENLABS_MAX_RETRIES", 4)
+# Upper bound in seconds on any single retry wait, including a Retry-After from the server
+MAX_RETRY_DELAY = _get_float("MAX_RETRY_DELAY", 60.0)
+# "scenes" (one request per scene) or "script" (one whole-script request with timestamps,
+# cut into scenes locally)
+ELEVENLABS_TTS_MODE = os.environ.get("ELEVENLABS_TTS_MODE", "scenes")
+
+# gTTS synthesis
+GTTS_WORKERS = _get_int("GTTS_WORKERS", 4)
+GTTS_MAX_RETRIES = _get_int("GTTS_MAX_RETRIES", 2)
+
+# Luma generation (LUMA_MODEL empty means the API default; the interval between status
+# checks grows while no clip finishes)
+LUMA_MODEL = os.environ.get("LUMA_MODEL", "")
+LUMA_POLL_MIN_SECS = _get_float("LUMA_POLL_MIN_SECS", 3.0)
+LUMA_POLL_MAX_SECS = _get_float("LUMA_POLL_MAX_SECS", 20.0)
+# A batch of generations is given up on after this long, and a single generation after
+# this many failed status checks in a row
+LUMA_POLL_TIMEOUT_SECS = _get_float("LUMA_POLL_TIMEOUT_SECS", 600.0)
+LUMA_POLL_MAX_ERRORS = _get_int("LUMA_POLL_MAX_ERRORS", 5)
+# Luma clips are retimed to the narration by ffmpeg; interpolation is "none", "blend" or
+# "minterpolate" (smoothest, slowest)
+LUMA_RENDER_ENGINE = os.environ.get("LUMA_RENDER_ENGINE", "ffmpeg_segments")
+LUMA_RETIME_INTERPOLATION = os.environ.get("LUMA_RETIME_INTERPOLATION", "none")
+
+# OpenAI response cache (opt-in); calls above the temperature limit always go to the API
+OPENAI_CACHE = _get_bool("OPENAI_CACHE", False)
+OPENAI_CACHE_MAX_TEMPERATURE = _get_float("OPENAI_CACHE_MAX_TEMPERATURE", 0.8)
+OPENAI_CACHE_MAX_ENTRIES = _get_int("OPENAI_CACHE_MAX_ENTRIES", 1000)
+
+# Stream the script and start narrating each scene as soon as it is written (not used with
+# ELEVENLABS_TTS_MODE=script, which needs the whole script)
+STREAM_SCRIPT = _get_bool("STREAM_SCRIPT", False)
+
+# OpenAI retries (done by call_openai_chat so they show up in the metrics)
+OPENAI_MAX_RETRIES = _get_int("OPENAI_MAX_RETRIES", 3)
+OPENAI_BACKOFF_SECS = _get_float("OPENAI_BACKOFF_SECS", 1.0)
+
+# Fact store of generated topics (set FACT_STORE_PATH to empty to disable). Only the
+# FACT_PROMPT_SAMPLE most recent facts of a subject go into the prompt; older repeats are
+# rejected locally by similarity and regenerated up to FACT_MAX_ATTEMPTS times
+FACT_STORE_PATH = os.environ.get("FACT_STORE_PATH", os.path.join("data", "facts.sqlite3"))
+FACT_PROMPT_SAMPLE = _get_int("FACT_PROMPT_SAMPLE", 20)
+FACT_SIMILARITY_THRESHOLD = _get_float("FACT_SIMILARITY_THRESHOLD", 0.35)
+FACT_MAX_ATTEMPTS = _get_int("FACT_MAX_ATTEMPTS", 3)
+
+# Bulk bundle generation (bulk_funcs.py); BULK_BACKEND is "chat", "batch" (OpenAI Batch
+# API, discounted but asynchronous) or "local" (offline stand-in for tests)
+BULK_BACKEND = os.environ.get("BULK_BACKEND", "chat")
+BULK_BATCH_SIZE = _get_int("BULK_BATCH_SIZE", 5)
+BULK_WORKERS = _get_int("BULK_WORKERS", 4)
+BULK_POLL_SECS = _get_float("BULK_POLL_SECS", 30.0)
@@ -1,60 +1,386 @@
 import os
-from typing import List
+import time
+import base64
+import threading
+from typing import Any, Dict, List, Optional
 
 import requests
 
+from http_funcs import get_session, RETRY_STATUS_CODES
+from helper_funcs import run_in_thread_pool, run_ffmpeg
+from audio_funcs import get_audio_duration
+from cache_funcs import get_cached_tts, store_cached_tts, make_cache_key, kv_get, kv_set
+from config import ELEVENLABS_CONCURRENCY, ELEVENLABS_MAX_RETRIES, MAX_RETRY_DELAY, CACHE_DB_PATH
+
+
+VOICE_ID = 'onwK4e9ZLuTAKqWW03F9'
+MODEL_ID = "eleven_multilingual_v2"
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.5
+}
+URL_TEMPLATE = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
+TIMESTAMPS_URL = f"{URL_TEMPLATE}/with-timestamps"
+OUTPUT_FORMAT = "mp3_44100_128"
+
+# The concurrency limit is per account, so requests of all jobs using a key share its slots
+_request_slots: Dict[str, threading.BoundedSemaphore] = {}
+_request_slots_lock = threading.Lock()
+
+
+def get_request_slots(api_key: str) -> threading.BoundedSemaphore:
+    """
+    Returns the semaphore that bounds the concurrent requests made with an API key.
+
+    Args:
+        api_key (str): The API key for ElevenLabs.
+
+    Returns:
+        threading.BoundedSemaphore: A semaphore with ELEVENLABS_CONCURRENCY slots.
+    """
+    with _request_slots_lock:
+        slots = _request_slots.get(api_key)
+        if slots is None:
+            slots = threading.BoundedSemaphore(max(1, ELEVENLABS_CONCURRENCY))
+            _request_slots[api_key] = slots
+        return slots
+
+
+def get_retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    """
+    Determines how long to wait before retrying a synthesis request.
+
+    Uses the Retry-After header when the API sends one, otherwise exponential backoff;
+    either is capped at MAX_RETRY_DELAY seconds.
+
+    Args:
+        response (Optional[requests.Response]): The failed response, or None on a connection error.
+        attempt (int): The zero-based number of the failed attempt.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(0.0, float(retry_after)), MAX_RETRY_DELAY)
+            except ValueError:
+                pass
+    return min(float(2 ** attempt), MAX_RETRY_DELAY)
+
+
+def post_with_retries(
+    url: str,
+    data: Dict[str, Any],
+    headers: Dict[str, str],
+    label: str,
+    max_retries: int = ELEVENLABS_MAX_RETRIES
+) -> Optional[requests.Response]:
+    """
+    Sends an ElevenLabs request, retrying rate-limited (429) and transient 5xx responses.
+
+    Every attempt holds one of the API key's ELEVENLABS_CONCURRENCY slots until the response
+    body has been read, so concurrent jobs together stay within the account's limit. The
+    slot is released while waiting to retry.
+
+    Args:
+        url (str): The endpoint URL.
+        data (Dict[str, Any]): The JSON request body.
+        headers (Dict[str, str]): The request headers, including the API key.
+        label (str): A description of the request for log messages (e.g. "script 3").
+        max_retries (int, optional): Maximum number of retries. Defaults to ELEVENLABS_MAX_RETRIES.
+
+    Returns:
+        Optional[requests.Response]: The successful response, with its body read, or None
+                                     if the request failed.
+    """
+    # Retries are handled here, so the session must not retry on its own
+    session = get_session("elevenlabs", retries=0)
+    slots = get_request_slots(headers.get("xi-api-key", ""))
+
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            with slots:
+                response = session.post(url, json=data, headers=headers)
+            if response.status_code == 200:
+                return response
+            if response.status_code not in RETRY_STATUS_CODES:
+                print(f"Failed to generate audio for {label}: {response.text}")
+                return None
+            error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+
+        if attempt < max_retries:
+            delay = get_retry_delay(response, attempt)
+            print(f"ElevenLabs request for {label} failed ({error}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+        else:
+            print(f"Failed to generate audio for {label} after {max_retries + 1} attempts: {error}")
+    return None
+
+
+def synthesize_scene_elevenlabs(
+    scripts: List[str],
+    idx: int,
+    output_dir: str,
+    api_key: str,
+    max_retries: int = ELEVENLABS_MAX_RETRIES
+) -> bool:
+    """
+    Generates the MP3 audio file for a single scene using the ElevenLabs Text-to-Speech API.
+
+    The neighbouring scripts are sent as previous_text and next_text so that prosody stays
+    continuous across scenes. Rate-limited (429) and transient 5xx responses are retried with
+    backoff, honouring Retry-After. Audio already in the TTS cache is reused without a request.
+
+    Args:
+        scripts (List[str]): All script texts of the video.
+        idx (int): The zero-based index of the scene to synthesize.
+        output_dir (str): The directory where the audio file will be saved.
+        api_key (str): The API key for ElevenLabs.
+        max_retries (int, optional): Maximum number of retries. Defaults to ELEVENLABS_MAX_RETRIES.
+
+    Returns:
+        bool: True if the audio file was saved, False otherwise.
+    """
+    headers = {
+        "Accept": "audio/mpeg",
+        "Content-Type": "application/json",
+        "xi-api-key": api_key
+    }
+    data = {
+        "text": scripts[idx],
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS,
+        "previous_text": scripts[idx - 1] if idx > 0 else "",
+        "next_text": scripts[idx + 1] if idx < len(scripts) - 1 else ""
+    }
+    output_file = os.path.join(output_dir, f'scene_{idx+1}.mp3')
+    cache_params = {
+        "voice_id": VOICE_ID,
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS,
+        "text": data["text"],
+        "previous_text": data["previous_text"],
+        "next_text": data["next_text"]
+    }
+    if get_cached_tts("elevenlabs", cache_params, output_file):
+        return True
+
+    response = post_with_retries(URL_TEMPLATE, data, headers, f"script {idx+1}", max_retries)
+    if response is None:
+        return False
+
+    temp_file = f"{output_file}.part"
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(response.content)
+        os.replace(temp_file, output_file)
+    except OSError as e:
+        print(f"Failed to save audio for script {idx+1}: {e}")
+        return False
+    finally:
+        response.close()
+    store_cached_tts("elevenlabs", cache_params, output_file)
+    print(f"Audio file saved: {output_file}")
+    return True
+
 
 def generate_audio_files_elevenlabs(
     scripts: List[str],
     output_dir: str,
-    api_key: str
-) -> None:
+    api_key: str,
+    max_workers: int = ELEVENLABS_CONCURRENCY
+) -> List[int]:
     """
     Generates MP3 audio files for each script using the ElevenLabs Text-to-Speech API.
 
+    Scenes are synthesized concurrently, so the total latency is close to that of the
+    slowest scene. The account's concurrency limit is enforced per API key across all jobs
+    by post_with_retries; max_workers only bounds this call's threads.
+
     Args:
         scripts (List[str]): A list of script texts to convert to audio.
         output_dir (str): The directory where the audio files will be saved.
         api_key (str): The API key for ElevenLabs.
+        max_workers (int, optional): Maximum number of concurrent requests. Defaults to ELEVENLABS_CONCURRENCY.
 
     Returns:
-        None
+        List[int]: The 1-based numbers of the scenes whose audio could not be generated.
     """
-    CHUNK_SIZE = 1024
-    VOICE_ID = 'onwK4e9ZLuTAKqWW03F9'
-    URL_TEMPLATE = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
 
-    HEADERS = {
-        "Accept": "audio/mpeg",
+    results = run_in_thread_pool(
+        lambda idx: synthesize_scene_elevenlabs(scripts, idx, output_dir, api_key),
+        range(len(scripts)),
+        max_workers
+    )
+    return [idx + 1 for idx, ok in enumerate(results) if not ok]
+
+
+def get_scene_cut_points(scripts: List[str], alignment: Dict[str, List[Any]], total_duration: float) -> List[float]:
+    """
+    Finds where each scene starts and ends in whole-script audio, using character timestamps.
+
+    The scripts are sent joined by single spaces, so each scene's character range in the
+    alignment is known. Each cut is placed in the middle of the pause between the last
+    character of one scene and the first character of the next.
+
+    Args:
+        scripts (List[str]): The script texts of the scenes, in order.
+        alignment (Dict[str, List[Any]]): The "alignment" object returned by the
+                                          with-timestamps endpoint.
+        total_duration (float): The length of the audio in seconds.
+
+    Returns:
+        List[float]: len(scripts) + 1 cut points, from 0 to total_duration.
+    """
+    starts = alignment["character_start_times_seconds"]
+    ends = alignment["character_end_times_seconds"]
+    cut_points = [0.0]
+    offset = 0
+    for script, next_script in zip(scripts, scripts[1:]):
+        next_offset = offset + len(script) + 1
+        last_char = min(max(offset + len(script.rstrip()) - 1, 0), len(ends) - 1)
+        first_char = min(next_offset + len(next_script) - len(next_script.lstrip()), len(starts) - 1)
+        cut = (ends[last_char] + starts[first_char]) / 2
+        cut_points.append(max(cut, cut_points[-1]))
+        offset = next_offset
+    cut_points.append(max(total_duration, cut_points[-1]))
+    return cut_points
+
+
+def synthesize_script_elevenlabs(
+    scripts: List[str],
+    output_path: str,
+    api_key: str,
+    max_retries: int = ELEVENLABS_MAX_RETRIES
+) -> Optional[Dict[str, Any]]:
+    """
+    Synthesizes the whole script in one request with the with-timestamps endpoint.
+
+    The audio and its character alignment are cached, so a repeated script needs no request.
+
+    Args:
+        scripts (List[str]): The script texts of the scenes, in order.
+        output_path (str): Where the whole-script MP3 will be saved.
+        api_key (str): The API key for ElevenLabs.
+        max_retries (int, optional): Maximum number of retries. Defaults to ELEVENLABS_MAX_RETRIES.
+
+    Returns:
+        Optional[Dict[str, Any]]: The character alignment, or None if synthesis failed.
+    """
+    text = " ".join(scripts)
+    cache_params = {
+        "voice_id": VOICE_ID,
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS,
+        "output_format": OUTPUT_FORMAT,
+        "text": text
+    }
+    alignment_key = make_cache_key("tts_alignment", cache_params)
+    alignment = kv_get(CACHE_DB_PATH, "tts_alignment", alignment_key)
+    if alignment and get_cached_tts("elevenlabs_script", cache_params, output_path):
+        return alignment
+
+    headers = {
+        "Accept": "application/json",
         "Content-Type": "application/json",
         "xi-api-key": api_key
     }
+    data = {
+        "text": text,
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS
+    }
+    url = f"{TIMESTAMPS_URL}?output_format={OUTPUT_FORMAT}"
+    response = post_with_retries(url, data, headers, "the full script", max_retries)
+    if response is None:
+        return None
+
+    try:
+        payload = response.json()
+        audio = base64.b64decode(payload["audio_base64"])
+        alignment = payload["alignment"]
+    except (ValueError, KeyError) as e:
+        print(f"Invalid with-timestamps response from ElevenLabs: {e}")
+        return None
+
+    temp_path = f"{output_path}.part"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, output_path)
+    except OSError as e:
+        print(f"Failed to save the full script audio: {e}")
+        return None
+
+    store_cached_tts("elevenlabs_script", cache_params, output_path)
+    kv_set(CACHE_DB_PATH, "tts_alignment", alignment_key, alignment)
+    print(f"Full script audio saved: {output_path}")
+    return alignment
+
+
+def generate_audio_script_elevenlabs(
+    scripts: List[str],
+    output_dir: str,
+    api_key: str
+) -> Optional[List[float]]:
+    """
+    Generates the scene audio files from a single whole-script ElevenLabs request.
 
+    The script is synthesized in one round-trip, which also keeps the prosody natural
+    across scene joins. The result is then cut into scene_N.mp3 files with ffmpeg at the
+    pauses between scenes, found from the character timestamps.
+
+    Args:
+        scripts (List[str]): A list of script texts to convert to audio.
+        output_dir (str): The directory where the audio files will be saved.
+        api_key (str): The API key for ElevenLabs.
+
+    Returns:
+        Optional[List[float]]: The exact duration of each scene in seconds, or None if the
+                               audio could not be generated or split.
+    """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    total_scripts = len(scripts)
-    for idx, script in enumerate(scripts):
-        # Determine previous_text and next_text
-        previous_text = scripts[idx - 1] if idx > 0 else ""
-        next_text = scripts[idx + 1] if idx < total_scripts - 1 else ""
-
-        data = {
-            "text": script,
-            "model_id": "eleven_multilingual_v2",
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.5
-            },
-            "previous_text": previous_text,
-            "next_text": next_text
-        }
-        response = requests.post(URL_TEMPLATE, json=data, headers=HEADERS)
-        if response.status_code == 200:
-            output_file = os.path.join(output_dir, f'scene_{idx+1}.mp3')
-            with open(output_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
-                    if chunk:
-                        f.write(chunk)
-            print(f"Audio file saved: {output_file}")
-        else:
-            print(f"Failed to generate audio for script {idx+1}: {response.text}")
+
+    full_path = os.path.join(output_dir, "full_script.mp3")
+    alignment = synthesize_script_elevenlabs(scripts, full_path, api_key)
+    if alignment is None:
+        return None
+
+    # Measured from the MP3 frames (or by ffmpeg), so container overhead cannot skew the last cut
+    total_duration = get_audio_duration(full_path)
+    if not total_duration:
+        print("Could not determine the length of the script audio.")
+        return None
+    try:
+        cut_points = get_scene_cut_points(scripts, alignment, total_duration)
+    except (KeyError, IndexError, TypeError) as e:
+        print(f"Could not split the script audio into scenes: {e}")
+        return None
+
+    durations = []
+    for idx in range(len(scripts)):
+        start, end = cut_points[idx], cut_points[idx + 1]
+        scene_path = os.path.join(output_dir, f"scene_{idx+1}.mp3")
+        # Decode-side seeking cuts at the exact sample rather than the nearest MP3 frame
+        if not run_ffmpeg([
+            "-i", full_path,
+            "-ss", f"{start:.3f}",
+            "-t", f"{end - start:.3f}",
+            "-c:a", "libmp3lame",
+            "-b:a", "128k",
+            "-ar", "44100",
+            scene_path
+        ]):
+            print(f"Failed to cut audio for scene {idx+1}.")
+            return None
+        durations.append(end - start)
+        print(f"Audio file saved: {scene_path}")
+    return durations
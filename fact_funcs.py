@@ -0,0 +1,244 @@
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+from typing import List, Optional, Set
+
+from helper_funcs import open_sqlite_db
+from config import FACT_STORE_PATH, FACT_SIMILARITY_THRESHOLD
+
+
+# Facts are compared by their content words, cut to a short prefix so that inflections
+# ("octopus"/"octopuses") match; function words carry no meaning and are dropped
+STEM_LENGTH = 5
+STOP_WORDS = frozenset(
+    "a an the and or but of in on at to for from by with as into about than that this these those "
+    "is are was were be been being has have had do does did can could will would its it their there "
+    "which who whom what when where up not no so".split()
+)
+# MinHash signature length, split into LSH bands of two rows each. Two facts become
+# candidates if any band matches, which happens for about 98% of pairs at a similarity of 0.35
+NUM_PERMUTATIONS = 60
+LSH_BANDS = 30
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+
+
+def normalize_fact(text: str) -> str:
+    """
+    Lowercases a fact and reduces it to letters, digits and single spaces.
+
+    Args:
+        text (str): The fact.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def get_shingles(text: str) -> Set[str]:
+    """
+    Reduces a fact to the set of its stemmed content words.
+
+    Reworded facts keep most of their content words, so their sets overlap strongly even
+    when the sentence structure changes.
+
+    Args:
+        text (str): The fact.
+
+    Returns:
+        Set[str]: The first STEM_LENGTH characters of each word that is not a stop word.
+    """
+    words = normalize_fact(text).split()
+    return {word[:STEM_LENGTH] for word in words if word not in STOP_WORDS} or set(words)
+
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    """
+    Computes the Jaccard similarity of two shingle sets.
+
+    Args:
+        a (Set[str]): The first set.
+        b (Set[str]): The second set.
+
+    Returns:
+        float: The size of the intersection divided by the size of the union.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def compute_minhash(shingles: Set[str]) -> List[int]:
+    """
+    Computes the MinHash signature of a shingle set.
+
+    Args:
+        shingles (Set[str]): The shingles of a fact.
+
+    Returns:
+        List[int]: NUM_PERMUTATIONS minimum hash values.
+    """
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles] or [0]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def get_lsh_buckets(signature: List[int]) -> List[str]:
+    """
+    Hashes each band of a MinHash signature into a bucket.
+
+    Args:
+        signature (List[int]): The signature from compute_minhash.
+
+    Returns:
+        List[str]: The bucket of each of the LSH_BANDS bands.
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        buckets.append(hashlib.blake2b(json.dumps(rows).encode("utf-8"), digest_size=8).hexdigest())
+    return buckets
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    Opens the fact store, creating its tables on first use.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: An open connection to the fact store.
+    """
+    conn = open_sqlite_db(db_path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS facts (
+            id INTEGER PRIMARY KEY,
+            subject TEXT NOT NULL,
+            fact TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS facts_by_subject ON facts (subject, created_at)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS fact_buckets (
+            band INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            fact_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, fact_id)
+        )
+        """
+    )
+    return conn
+
+
+def find_similar_fact(
+    fact: str,
+    db_path: str = FACT_STORE_PATH,
+    threshold: float = FACT_SIMILARITY_THRESHOLD
+) -> Optional[str]:
+    """
+    Looks up a stored fact that is a near-duplicate of the given one.
+
+    Candidates sharing an LSH bucket with the fact are fetched from the index and compared
+    by exact shingle similarity, so the cost stays small as the store grows.
+
+    Args:
+        fact (str): The new fact.
+        db_path (str, optional): The fact store. Defaults to FACT_STORE_PATH.
+        threshold (float, optional): Minimum Jaccard similarity of a near-duplicate.
+                                     Defaults to FACT_SIMILARITY_THRESHOLD.
+
+    Returns:
+        Optional[str]: The most similar stored fact at or above the threshold, or None.
+    """
+    shingles = get_shingles(fact)
+    buckets = get_lsh_buckets(compute_minhash(shingles))
+    try:
+        conn = _connect(db_path)
+        try:
+            conditions = " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(buckets))
+            rows = conn.execute(
+                f"SELECT DISTINCT f.fact FROM fact_buckets b JOIN facts f ON f.id = b.fact_id WHERE {conditions}",
+                [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+            ).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error reading fact store: {e}")
+        return None
+
+    best, best_similarity = None, threshold
+    for (candidate,) in rows:
+        similarity = jaccard_similarity(shingles, get_shingles(candidate))
+        if similarity >= best_similarity:
+            best, best_similarity = candidate, similarity
+    return best
+
+
+def add_fact(subject: str, fact: str, db_path: str = FACT_STORE_PATH) -> None:
+    """
+    Stores a fact and indexes its LSH buckets.
+
+    Args:
+        subject (str): The subject or theme the fact was generated for.
+        fact (str): The fact.
+        db_path (str, optional): The fact store. Defaults to FACT_STORE_PATH.
+    """
+    buckets = get_lsh_buckets(compute_minhash(get_shingles(fact)))
+    try:
+        conn = _connect(db_path)
+        try:
+            cursor = conn.execute(
+                "INSERT INTO facts (subject, fact, created_at) VALUES (?, ?, ?)",
+                (subject, fact, time.time())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO fact_buckets (band, bucket, fact_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in enumerate(buckets)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error writing fact store: {e}")
+
+
+def get_recent_facts(subject: str, limit: int, db_path: str = FACT_STORE_PATH) -> List[str]:
+    """
+    Returns the most recently stored facts for a subject.
+
+    Args:
+        subject (str): The subject or theme.
+        limit (int): Maximum number of facts.
+        db_path (str, optional): The fact store. Defaults to FACT_STORE_PATH.
+
+    Returns:
+        List[str]: The facts, newest first.
+    """
+    if limit <= 0:
+        return []
+    try:
+        conn = _connect(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT fact FROM facts WHERE subject = ? ORDER BY created_at DESC LIMIT ?",
+                (subject, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error reading fact store: {e}")
+        return []
+    return [fact for (fact,) in rows]
@@ -1,28 +1,87 @@
 import os
+import time
 from typing import List
 
 from gtts import gTTS
 
+from helper_funcs import run_in_thread_pool
+from cache_funcs import get_cached_tts, store_cached_tts
+from config import GTTS_WORKERS, GTTS_MAX_RETRIES
 
-def generate_audio_files_gtts(scripts: List[str], output_dir: str) -> None:
+
+def synthesize_scene_gtts(
+    script: str,
+    idx: int,
+    output_dir: str,
+    max_retries: int = GTTS_MAX_RETRIES
+) -> bool:
+    """
+    Generates the MP3 audio file for a single scene using Google gTTS.
+
+    Failed requests are retried with exponential backoff. Audio already in the TTS cache is
+    reused without a request.
+
+    Args:
+        script (str): The script text of the scene.
+        idx (int): The zero-based index of the scene.
+        output_dir (str): The directory where the audio file will be saved.
+        max_retries (int, optional): Maximum number of retries. Defaults to GTTS_MAX_RETRIES.
+
+    Returns:
+        bool: True if the audio file was saved, False otherwise.
+    """
+    audio_path = os.path.join(output_dir, f'scene_{idx+1}.mp3')
+    cache_params = {"lang": "en", "slow": False, "text": script}
+    if get_cached_tts("gtts", cache_params, audio_path):
+        return True
+
+    temp_path = f"{audio_path}.part"
+    for attempt in range(max_retries + 1):
+        try:
+            tts = gTTS(script, lang='en', slow=False)
+            tts.save(temp_path)
+            os.replace(temp_path, audio_path)
+            store_cached_tts("gtts", cache_params, audio_path)
+            print(f"Audio file saved: {audio_path}")
+            return True
+        except Exception as e:
+            if attempt < max_retries:
+                delay = 2 ** attempt
+                print(f"gTTS request for script {idx+1} failed ({e}), retrying in {delay}s...")
+                time.sleep(delay)
+            else:
+                print(f"Failed to generate audio for script {idx+1} after {max_retries + 1} attempts: {e}")
+
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    return False
+
+
+def generate_audio_files_gtts(
+    scripts: List[str],
+    output_dir: str,
+    max_workers: int = GTTS_WORKERS
+) -> List[int]:
     """
     Generates MP3 audio files for each scene using Google gTTS.
 
+    Scenes are synthesized concurrently on a bounded thread pool, since each request is a
+    blocking round-trip that spends most of its time waiting on the network.
+
     Args:
         scripts (List[str]): A list of script texts for each scene.
         output_dir (str): The directory where the audio files will be saved.
+        max_workers (int, optional): Maximum number of concurrent requests. Defaults to GTTS_WORKERS.
 
     Returns:
-        None
+        List[int]: The 1-based numbers of the scenes whose audio could not be generated.
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    for idx, script in enumerate(scripts):
-        audio_path = os.path.join(output_dir, f'scene_{idx+1}.mp3')
-        try:
-            tts = gTTS(script, lang='en', slow=False)
-            tts.save(audio_path)
-            print(f"Audio file saved: {audio_path}")
-        except Exception as e:
-            print(f"Failed to generate audio for script {idx+1}: {e}")
\ No newline at end of file
+    results = run_in_thread_pool(
+        lambda idx: synthesize_scene_gtts(scripts[idx], idx, output_dir),
+        range(len(scripts)),
+        max_workers
+    )
+    return [idx + 1 for idx, ok in enumerate(results) if not ok]
@@ -1,7 +1,15 @@
 import os
 import re
+import shutil
+import sqlite3
 import platform
+import tempfile
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
+import requests
 from moviepy.config import change_settings
 
 
@@ -32,6 +40,153 @@ def clear_files_in_folder(folder_path: str) -> None:
         print(f"An error occurred while clearing '{folder_path}': {e}\n")
 
 
+def create_job_workspace(job_id: str, base_dir: str) -> Dict[str, str]:
+    """
+    Creates an isolated scratch directory for a single job.
+
+    Every job gets its own audio and video subfolders under base_dir/<job_id>, so that
+    concurrent jobs never share, overwrite or clear each other's scene files.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+        base_dir (str): The directory under which job workspaces are created.
+
+    Returns:
+        Dict[str, str]: Paths of the workspace "root", "audio" and "video" directories.
+    """
+    root = os.path.join(base_dir, custom_secure_filename(job_id))
+    workspace = {
+        "root": root,
+        "audio": os.path.join(root, "audio"),
+        "video": os.path.join(root, "video"),
+    }
+    for path in workspace.values():
+        os.makedirs(path, exist_ok=True)
+    return workspace
+
+
+def remove_job_workspace(workspace_root: str) -> None:
+    """
+    Deletes a job workspace and everything in it.
+
+    Args:
+        workspace_root (str): The root directory of the job workspace.
+    """
+    try:
+        shutil.rmtree(workspace_root)
+        print(f"Removed workspace: {workspace_root}\n")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"An error occurred while removing '{workspace_root}': {e}\n")
+
+
+def run_in_thread_pool(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> List[Any]:
+    """
+    Applies a function to every item on a bounded thread pool.
+
+    Intended for I/O-bound per-scene work such as API searches and downloads. Results are
+    returned in the same order as the input items, regardless of completion order.
+
+    Args:
+        func (Callable[[Any], Any]): The function to apply to each item.
+        items (Iterable[Any]): The items to process.
+        max_workers (int): The maximum number of concurrent threads.
+
+    Returns:
+        List[Any]: The results of func, in input order.
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(func, items))
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Runs independent pipeline stages at the same time and collects their results.
+
+    Each task runs on its own thread in a copy of the caller's context, so context
+    variables (such as the current job) stay visible inside the stages. All tasks are
+    allowed to finish before an error is raised.
+
+    Args:
+        tasks (Dict[str, Callable[[], Any]]): The stages to run, keyed by name.
+
+    Returns:
+        Dict[str, Any]: The result of each stage, keyed by name.
+
+    Raises:
+        Exception: The first error raised by a stage, in task order.
+    """
+    if not tasks:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, task)
+            for name, task in tasks.items()
+        }
+        errors = [future.exception() for future in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
+
+
+def open_sqlite_db(db_path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database in WAL mode, creating its directory on first use.
+
+    Callers open a new connection per operation, so the database can be used from any
+    worker thread; WAL lets readers proceed while another thread or process writes.
+
+    Args:
+        db_path (str): The path of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: An open connection.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def stream_download(url: str, output_path: str, session: Optional[requests.Session] = None) -> None:
+    """
+    Streams a remote file to disk atomically.
+
+    The body is written to a temporary file next to output_path and moved into place only
+    once the download has completed, so readers never see a partial file.
+
+    Args:
+        url (str): The URL of the file to download.
+        output_path (str): The file system path where the file will be saved.
+        session (Optional[requests.Session]): The session to download with. Defaults to a
+                                              one-off request.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            resp = (session or requests).get(url, stream=True)
+            resp.raise_for_status()
+            for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                if chunk:
+                    f.write(chunk)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def get_local_ffmpeg_path() -> str:
     """
     Determines the operating system and returns the path to the appropriate ffmpeg binary.
@@ -66,6 +221,67 @@ def get_local_ffmpeg_path() -> str:
     return ffmpeg_path
 
 
+def run_ffmpeg(args: List[str]) -> bool:
+    """
+    Runs the bundled ffmpeg binary with the given arguments.
+
+    Args:
+        args (List[str]): The ffmpeg arguments, without the binary itself.
+
+    Returns:
+        bool: True if ffmpeg exited successfully, False otherwise.
+    """
+    try:
+        command = [get_local_ffmpeg_path(), "-y", "-hide_banner", "-loglevel", "error"] + args
+        completed = subprocess.run(command, capture_output=True, text=True)
+    except Exception as e:
+        print(f"Error running ffmpeg: {e}")
+        return False
+    if completed.returncode != 0:
+        print(f"ffmpeg failed with exit code {completed.returncode}: {completed.stderr.strip()[-2000:]}")
+        return False
+    return True
+
+
+def fetch_trimmed_clip(url: str, output_path: str, duration: float) -> bool:
+    """
+    Copies only the first seconds of a remote video into a local file.
+
+    The bundled ffmpeg reads the remote URL (using range requests where the server allows
+    them) and stream-copies the video track up to the requested duration, so the rest of the
+    file is never downloaded. Audio is dropped since scenes use the narration track.
+
+    Args:
+        url (str): The URL of the remote video.
+        output_path (str): The file system path where the trimmed clip will be saved.
+        duration (float): The number of seconds to keep from the start of the video.
+
+    Returns:
+        bool: True if a non-empty trimmed clip was written, False if the caller should fall
+              back to a full download (e.g. the container cannot be stream-copied to MP4).
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix=".part")
+    os.close(fd)
+    success = run_ffmpeg([
+        "-t", f"{duration:.3f}",
+        "-i", url,
+        "-map", "0:v:0",
+        "-an",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",
+        "-f", "mp4",
+        temp_path
+    ])
+    if success and os.path.getsize(temp_path) > 0:
+        os.replace(temp_path, output_path)
+        return True
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    return False
+
+
 def configure_moviepy() -> None:
     """
     Configures MoviePy to use the specified ffmpeg binary.
@@ -97,7 +313,7 @@ def custom_secure_filename(filename: str) -> str:
     return re.sub(r"[^A-Za-z0-9_.\-\[\]\' ]+", '_', filename)
 
 
-def get_final_filename(audio_tech: str, video_tech: str, video_title: str) -> str:
+def get_final_filename(audio_tech: str, video_tech: str, video_title: str, unique_id: str = "") -> str:
     """
     Constructs a sanitized and formatted filename for the final video.
 
@@ -108,13 +324,18 @@ def get_final_filename(audio_tech: str, video_tech: str, video_title: str) -> st
         audio_tech (str): The audio technology used (e.g., "voiceover").
         video_tech (str): The video technology used (e.g., "LumaAI").
         video_title (str): The title of the video.
+        unique_id (str, optional): Appended in brackets so that concurrent jobs with the same
+                                   title get different files (e.g. the job ID).
 
     Returns:
-        str: A formatted and sanitized filename in the format "[audio_tech][video_tech] video_title.mp4".
+        str: A formatted and sanitized filename in the format
+             "[audio_tech][video_tech] video_title.mp4" or "[audio_tech][video_tech] video_title [unique_id].mp4".
     """
     safe_audio = custom_secure_filename(audio_tech)
     safe_video = custom_secure_filename(video_tech)
     safe_title = custom_secure_filename(video_title)
+    if unique_id:
+        return f"[{safe_audio}][{safe_video}] {safe_title} [{custom_secure_filename(unique_id)}].mp4"
     return f"[{safe_audio}][{safe_video}] {safe_title}.mp4"
 
 
@@ -0,0 +1,99 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+                    HTTP_RETRIES, HTTP_BACKOFF_FACTOR)
+
+
+# Transient responses that are worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Methods retried by default; POSTs may be paid and are not idempotent, so callers opt in
+RETRY_METHODS = frozenset(["GET", "HEAD"])
+
+# One pooled session per provider and retry policy, shared by all worker threads
+_sessions: Dict[Tuple[str, int, bool], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that applies a default timeout to every request sent through it.
+    """
+
+    def __init__(self, *args: Any, timeout: Optional[tuple] = None, **kwargs: Any) -> None:
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(retries: int = HTTP_RETRIES, retry_post: bool = False) -> requests.Session:
+    """
+    Creates a connection-pooled session with timeouts and backoff-based retries.
+
+    Connections are kept alive and reused, so repeated calls to the same host skip the
+    TCP and TLS handshakes. Connection errors and 429/5xx responses of GET and HEAD
+    requests are retried with exponential backoff, honouring Retry-After headers.
+
+    Args:
+        retries (int): Maximum number of retries per request.
+        retry_post (bool): Whether POST requests are retried too. Only for providers whose
+                           POSTs are safe to repeat.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=(RETRY_METHODS | {"POST"}) if retry_post else RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry,
+        timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(provider: str, retries: int = HTTP_RETRIES, retry_post: bool = False) -> requests.Session:
+    """
+    Returns the shared session for a provider and retry policy, creating it on first use.
+
+    Sessions are cached per (provider, retries, retry_post), so a caller that implements its
+    own retry policy and passes 0 never gets a session whose transport retries stack on top
+    of it.
+
+    Args:
+        provider (str): The name of the provider (e.g. "pexels").
+        retries (int): Maximum number of transport-level retries. Providers that implement
+                       their own retry policy pass 0.
+        retry_post (bool): Whether POST requests are retried too. Defaults to False.
+
+    Returns:
+        requests.Session: The provider's pooled session.
+    """
+    with _sessions_lock:
+        key = (provider, retries, retry_post)
+        session = _sessions.get(key)
+        if session is None:
+            session = create_session(retries, retry_post)
+            _sessions[key] = session
+        return session
@@ -0,0 +1,111 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import MAX_JOB_WORKERS, JOB_RETENTION_SECS
+
+
+# Background worker pool and in-memory job registry
+_executor = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix="video-job")
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def _prune_jobs() -> None:
+    """
+    Removes finished jobs that are older than the configured retention period.
+
+    Must be called while holding the jobs lock.
+    """
+    cutoff = time.time() - JOB_RETENTION_SECS
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job["status"] in ("completed", "failed") and job["updated_at"] < cutoff
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def update_job(job_id: str, **fields: Any) -> None:
+    """
+    Updates the stored state of a job.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+        **fields (Any): The job fields to overwrite (e.g. stage, progress, status).
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job["updated_at"] = time.time()
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns a snapshot of the job state.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+
+    Returns:
+        Optional[Dict[str, Any]]: A copy of the job state, or None if the job is unknown.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def _run_job(job_id: str, func: Callable[..., Dict[str, Any]], args: tuple) -> None:
+    """
+    Executes a job function on a worker thread and records its outcome.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+        func (Callable[..., Dict[str, Any]]): The job function, called as func(job_id, *args).
+        args (tuple): Additional positional arguments for the job function.
+    """
+    update_job(job_id, status="running", stage="starting")
+    try:
+        result = func(job_id, *args)
+        update_job(job_id, status="completed", stage="done", progress=100, result=result)
+        print(f"Job {job_id} completed.")
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e))
+        print(f"Job {job_id} failed: {e}")
+
+
+def submit_job(func: Callable[..., Dict[str, Any]], *args: Any) -> str:
+    """
+    Enqueues a job on the background worker pool.
+
+    The job function receives the job ID as its first argument so that it can report
+    progress through update_job, and returns a dictionary that becomes the job result.
+
+    Args:
+        func (Callable[..., Dict[str, Any]]): The job function to run.
+        *args (Any): Additional positional arguments for the job function.
+
+    Returns:
+        str: The unique identifier of the enqueued job.
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job_id] = {
+            "id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0,
+            "error": None,
+            "result": None,
+            "metrics": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+    _executor.submit(_run_job, job_id, func, args)
+    return job_id
@@ -1,46 +1,153 @@
 import os
 import time
+import threading
 from typing import List, Dict, Optional, Any, Union
 
-import requests
 from lumaai import LumaAI
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips, vfx
 
+from audio_funcs import get_scene_manifest, probe_duration_ffmpeg
+from cache_funcs import get_cached_generation, store_cached_generation
+from helper_funcs import run_in_thread_pool, stream_download
+from http_funcs import get_session
+from render_funcs import render_scenes
+from config import (SCENE_FETCH_WORKERS, LUMA_POLL_MIN_SECS, LUMA_POLL_MAX_SECS, LUMA_POLL_TIMEOUT_SECS,
+                    LUMA_POLL_MAX_ERRORS, LUMA_MODEL, LUMA_RENDER_ENGINE, LUMA_RETIME_INTERPOLATION)
 
-def poll_generation(client: LumaAI, generation_id: str, max_retries: int = 3) -> Any:
+
+# One client (and connection pool) per API key, shared by all jobs
+_clients: Dict[str, LumaAI] = {}
+_clients_lock = threading.Lock()
+
+
+def get_luma_client(api_key: str) -> LumaAI:
     """
-    Polls the LumaAI generation status until it is completed or fails.
-    
-    This function repeatedly checks the status of a video generation request. If the generation
-    is completed, it returns the generation object. If it fails, it retries up to a specified
-    number of times before raising an error.
-    
+    Returns the shared LumaAI client for an API key, creating it on first use.
+
+    Args:
+        api_key (str): The API key for authenticating with LumaAI.
+
+    Returns:
+        LumaAI: The client instance.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = LumaAI(auth_token=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def get_generation_params(prompt: str, aspect_ratio: str) -> Dict[str, str]:
+    """
+    Returns the request parameters that determine a Luma clip, used as its cache key.
+
+    Args:
+        prompt (str): The text prompt describing the desired video content.
+        aspect_ratio (str): The aspect ratio of the video (e.g., "9:16").
+
+    Returns:
+        Dict[str, str]: The prompt, aspect ratio and model.
+    """
+    return {"prompt": prompt, "aspect_ratio": aspect_ratio, "model": LUMA_MODEL or "default"}
+
+
+def poll_generations(
+    client: LumaAI,
+    generation_ids: Dict[int, str],
+    min_interval: float = LUMA_POLL_MIN_SECS,
+    max_interval: float = LUMA_POLL_MAX_SECS,
+    timeout: float = LUMA_POLL_TIMEOUT_SECS,
+    max_errors: int = LUMA_POLL_MAX_ERRORS
+) -> Dict[int, Optional[Any]]:
+    """
+    Tracks a batch of LumaAI generations with a single poller until each one finishes.
+
+    Every round checks all pending generations. The interval between rounds starts at
+    min_interval and grows by half each round in which nothing finishes, up to max_interval,
+    so long generations are not polled needlessly often while finished clips are still
+    picked up promptly.
+
+    A generation is given up on when it has not finished within timeout seconds, or when
+    max_errors status checks in a row failed (e.g. a revoked key or a deleted generation).
+
     Args:
         client (LumaAI): The LumaAI client instance used to interact with the API.
-        generation_id (str): The unique identifier of the generation request.
-        max_retries (int, optional): The maximum number of retries allowed if the generation fails. Defaults to 3.
-    
+        generation_ids (Dict[int, str]): The generation ID of each scene, keyed by scene number.
+        min_interval (float, optional): Initial seconds between polling rounds. Defaults to LUMA_POLL_MIN_SECS.
+        max_interval (float, optional): Maximum seconds between polling rounds. Defaults to LUMA_POLL_MAX_SECS.
+        timeout (float, optional): Maximum seconds to wait for the batch. Defaults to LUMA_POLL_TIMEOUT_SECS.
+        max_errors (int, optional): Consecutive failed status checks after which a generation
+                                    is given up on. Defaults to LUMA_POLL_MAX_ERRORS.
+
     Returns:
-        Any: The completed generation object.
-    
-    Raises:
-        RuntimeError: If the generation fails after the maximum number of retries.
+        Dict[int, Optional[Any]]: The final generation object of each scene, keyed by scene
+                                  number. Its state is either "completed" or "failed"; None
+                                  means polling gave up on it.
+    """
+    pending = dict(generation_ids)
+    finished = {}
+    errors = {idx: 0 for idx in generation_ids}
+    deadline = time.monotonic() + timeout
+    interval = min_interval
+    while pending:
+        time.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+        progressed = False
+        for idx, generation_id in list(pending.items()):
+            try:
+                generation = client.generations.get(id=generation_id)
+                errors[idx] = 0
+            except Exception as e:
+                errors[idx] += 1
+                print(f"Error polling Luma generation for scene {idx} ({errors[idx]}/{max_errors}): {e}")
+                if errors[idx] >= max_errors:
+                    finished[idx] = None
+                    del pending[idx]
+                continue
+            if generation.state in ("completed", "failed"):
+                finished[idx] = generation
+                del pending[idx]
+                progressed = True
+
+        if pending and time.monotonic() >= deadline:
+            print(f"Timed out after {timeout:.0f}s waiting for Luma clips of scene(s) "
+                  f"{', '.join(map(str, sorted(pending)))}.")
+            finished.update({idx: None for idx in pending})
+            break
+        if pending:
+            interval = min_interval if progressed else min(interval * 1.5, max_interval)
+            print(f"Dreaming... {len(finished)}/{len(generation_ids)} Luma clips done, "
+                  f"next check in {interval:.0f}s")
+    return finished
+
+
+def settle_abandoned_generation(client: LumaAI, idx: int, generation_id: str) -> Optional[Any]:
+    """
+    Checks once more on a generation the poller gave up on, and cancels it if unfinished.
+
+    A generation that timed out or could not be polled may still finish (and be billed) at
+    Luma, so it is never resubmitted; deleting it stops it from running on.
+
+    Args:
+        client (LumaAI): The LumaAI client instance used to interact with the API.
+        idx (int): The scene number, for log messages.
+        generation_id (str): The ID of the generation.
+
+    Returns:
+        Optional[Any]: The generation object if it has reached "completed" or "failed"
+                       by now, otherwise None.
     """
-    retries = 0
-    while True:
+    try:
         generation = client.generations.get(id=generation_id)
-        if generation.state == "completed":
+        if generation.state in ("completed", "failed"):
             return generation
-        elif generation.state == "failed":
-            retries += 1
-            if retries >= max_retries:
-                raise RuntimeError(f"Generation failed: {generation.failure_reason}")
-            else:
-                print(f"Generation failed, retrying... attempt {retries}/{max_retries}")
-                time.sleep(3)
-                continue
-        print("Dreaming...")
-        time.sleep(3)
+    except Exception as e:
+        print(f"Final status check of Luma generation for scene {idx} failed: {e}")
+    try:
+        client.generations.delete(id=generation_id)
+        print(f"Cancelled unfinished Luma generation {generation_id} for scene {idx}.")
+    except Exception as e:
+        print(f"Error cancelling Luma generation {generation_id} for scene {idx}: {e}")
+    return None
 
 
 def download_luma_video(generation: Any, output_path: str) -> bool:
@@ -48,7 +155,8 @@ def download_luma_video(generation: Any, output_path: str) -> bool:
     Downloads the generated LumaAI video to the specified output path.
     
     This function retrieves the video URL from the generation object and downloads the video
-    file, saving it to the designated location on the local file system.
+    file, saving it to the designated location on the local file system. Caching is done by
+    the caller, keyed by the generation request.
     
     Args:
         generation (Any): The generation object containing information about the video.
@@ -58,13 +166,79 @@ def download_luma_video(generation: Any, output_path: str) -> bool:
         bool: True if the download was successful, False otherwise.
     """
     video_url = generation.assets.video
-    response = requests.get(video_url, stream=True)
-    response.raise_for_status()
-    with open(output_path, 'wb') as file:
-        for chunk in response.iter_content(chunk_size=1024*1024):
-            if chunk:
-                file.write(chunk)
+    try:
+        stream_download(video_url, output_path, session=get_session("luma"))
+    except Exception as e:
+        print(f"Error downloading Luma clip {generation.id}: {e}")
+        return False
     print(f"File downloaded as {output_path}")
+    return True
+
+
+def generate_luma_videos(
+    prompts: Dict[int, str],
+    aspect_ratio: str = "9:16",
+    max_retries: int = 3,
+    api_key: str = None
+) -> Dict[int, Any]:
+    """
+    Generates LumaAI videos for several prompts at once.
+
+    All generations are created up front and then tracked by one poller, so the wall-clock
+    time is close to that of the slowest single generation. Generations that reached the
+    "failed" state are submitted again, up to max_retries attempts per prompt. Those the
+    poller gave up on are checked once more and cancelled if still unfinished, but never
+    resubmitted, so one slow scene cannot bill several generations.
+
+    Args:
+        prompts (Dict[int, str]): The text prompt of each scene, keyed by scene number.
+        aspect_ratio (str, optional): The aspect ratio for the generated videos (e.g., "9:16"). Defaults to "9:16".
+        max_retries (int, optional): The maximum number of attempts per prompt. Defaults to 3.
+        api_key (str): The API key for authenticating with LumaAI. Defaults to None.
+
+    Returns:
+        Dict[int, Any]: The completed generation object of each scene that succeeded, keyed by scene number.
+    """
+    client = get_luma_client(api_key)
+    create_args = {"model": LUMA_MODEL} if LUMA_MODEL else {}
+    attempts = {idx: 0 for idx in prompts}
+    completed = {}
+    remaining = dict(prompts)
+
+    while remaining:
+        generation_ids = {}
+        for idx, prompt in remaining.items():
+            while attempts[idx] < max_retries:
+                attempts[idx] += 1
+                try:
+                    generation = client.generations.create(prompt=prompt, aspect_ratio=aspect_ratio, **create_args)
+                    generation_ids[idx] = generation.id
+                    break
+                except Exception as e:
+                    print(f"LumaAI generation attempt {attempts[idx]} for scene {idx} failed: {e}")
+        if not generation_ids:
+            break
+
+        retry = {}
+        for idx, generation in poll_generations(client, generation_ids).items():
+            if generation is None:
+                generation = settle_abandoned_generation(client, idx, generation_ids[idx])
+                if generation is None:
+                    print(f"Gave up on the generation for scene {idx}; it is not resubmitted.")
+                    continue
+            if generation.state == "completed":
+                completed[idx] = generation
+                continue
+            reason = generation.failure_reason
+            if attempts[idx] < max_retries:
+                print(f"Generation for scene {idx} failed ({reason}), "
+                      f"retrying... attempt {attempts[idx]}/{max_retries}")
+                retry[idx] = prompts[idx]
+            else:
+                print(f"Generation for scene {idx} failed: {reason}. Max retries reached.")
+        remaining = retry
+
+    return completed
 
 
 def generate_luma_video(
@@ -74,119 +248,122 @@ def generate_luma_video(
     api_key: str = None
 ) -> Optional[Any]:
     """
-    Generates a LumaAI video based on the provided prompt.
-    
-    This function sends a prompt to the LumaAI API to generate a video clip with the specified
-    aspect ratio. It handles retries in case of failures and returns the generation object upon success.
-    
+    Generates a single LumaAI video based on the provided prompt.
+
     Args:
         prompt (str): The text prompt describing the desired video content.
         aspect_ratio (str, optional): The aspect ratio for the generated video (e.g., "9:16"). Defaults to "9:16".
-        max_retries (int, optional): The maximum number of retries allowed if the generation fails. Defaults to 3.
+        max_retries (int, optional): The maximum number of attempts. Defaults to 3.
         api_key (str): The API key for authenticating with LumaAI. Defaults to None.
-    
+
     Returns:
         Optional[Any]: The completed generation object if successful, or None if all retries fail.
     """
-    client = LumaAI(auth_token=api_key)
-    retries = 0
-    while retries < max_retries:
-        try:
-            generation = client.generations.create(prompt=prompt, aspect_ratio=aspect_ratio)
-            generation = poll_generation(client, generation.id, max_retries=max_retries)
-            return generation
-        except Exception as e:
-            retries += 1
-            print(f"LumaAI generation attempt {retries} failed: {e}")
-            if retries == max_retries:
-                print("Max retries reached. Generation failed.")
-                return None
-    return None
+    return generate_luma_videos({1: prompt}, aspect_ratio, max_retries, api_key).get(1)
 
 
-def process_videos_luma(detailed_prompts, audio_dir, output_path, max_retries=3, api_key=None):
+def process_videos_luma(
+    detailed_prompts: List[str],
+    audio_dir: str,
+    output_path: str,
+    work_dir: str,
+    max_retries: int = 3,
+    api_key: str = None,
+    max_workers: int = SCENE_FETCH_WORKERS
+) -> None:
     """
     Generates a single final Luma video at 'output_path' using a list of detailed prompts.
+
     We create exactly one ~5s Luma clip per scene, then speed up or slow it down to match
-    the entire audio duration (no extra clips, no multi-clip logic).
+    the entire audio duration (no extra clips, no multi-clip logic). All clips are generated
+    concurrently and downloaded in parallel; the scenes are still assembled in order. The
+    retiming is done by ffmpeg while each scene is pre-rendered to its own segment
+    (LUMA_RENDER_ENGINE), optionally with frame blending or motion interpolation
+    (LUMA_RETIME_INTERPOLATION).
+    Clips for a prompt, aspect ratio and model that were generated before are taken from
+    the persistent clip cache instead.
+
+    Args:
+        detailed_prompts (List[str]): The Luma prompt for each scene.
+        audio_dir (str): Directory containing audio files for each scene.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): The job workspace; downloaded clips go into its "video" subfolder.
+        max_retries (int, optional): The maximum number of generation attempts per scene. Defaults to 3.
+        api_key (str): The API key for authenticating with LumaAI. Defaults to None.
+        max_workers (int): Maximum number of clips downloaded at once.
     """
-    temp_folder = 'temp'
-    temp_video_dir = os.path.join(temp_folder, 'video')
+    temp_video_dir = os.path.join(work_dir, 'video')
     os.makedirs(temp_video_dir, exist_ok=True)
 
-    final_clips = []
-    video_clips_to_close = []
-    audio_clips_to_close = []
-
-    for idx, prompt in enumerate(detailed_prompts, start=1):
-        audio_file = os.path.join(audio_dir, f"scene_{idx}.mp3")
-        if not os.path.exists(audio_file):
-            print(f"Audio file {audio_file} does not exist. Skipping scene {idx}.")
-            continue
-
-        try:
-            audio_clip = AudioFileClip(audio_file)
-            audio_duration = audio_clip.duration
-        except Exception as e:
-            print(f"Error loading audio file {audio_file}: {e}")
+    scenes = []
+    for entry in get_scene_manifest(detailed_prompts, audio_dir):
+        if entry["idx"] > len(detailed_prompts):
+            print(f"No prompt for scene {entry['idx']}. Skipping.")
             continue
+        scenes.append(entry)
 
-        print(f"\nProcessing scene {idx}: Audio duration = {audio_duration:.2f}s")
+    # Reuse clips generated earlier for the same prompt
+    video_paths = {}
+    prompts = {}
+    for entry in scenes:
+        idx = entry["idx"]
+        scene_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
+        if get_cached_generation("luma", get_generation_params(detailed_prompts[idx - 1], "9:16"), scene_path):
+            print(f"Luma cache hit for scene {idx}")
+            video_paths[idx] = scene_path
+        else:
+            prompts[idx] = detailed_prompts[idx - 1]
 
-        # Generate exactly one Luma clip
-        generation = generate_luma_video(prompt, 
-                                         aspect_ratio="9:16", 
-                                         max_retries=max_retries,
-                                         api_key=api_key)
-        if not generation:
+    generations = {}
+    if prompts:
+        print(f"\nGenerating {len(prompts)} Luma clips...")
+        generations = generate_luma_videos(prompts, aspect_ratio="9:16", max_retries=max_retries, api_key=api_key)
+    for idx in prompts:
+        if idx not in generations:
             print(f"Failed to generate Luma clip for scene {idx}.")
-            audio_clip.close()
+
+    # Download the ~5s Luma clips
+    def download_scene(idx: int) -> Optional[str]:
+        scene_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
+        if not download_luma_video(generations[idx], scene_path):
+            return None
+        store_cached_generation("luma", get_generation_params(prompts[idx], "9:16"), scene_path)
+        return scene_path
+
+    downloaded_ids = list(generations)
+    for idx, downloaded_path in zip(downloaded_ids, run_in_thread_pool(download_scene, downloaded_ids, max_workers)):
+        if downloaded_path:
+            video_paths[idx] = downloaded_path
+
+    # Retime each ~5s clip so it spans the whole narration of its scene
+    ready_scenes = [entry for entry in scenes if entry["idx"] in video_paths]
+    source_durations = run_in_thread_pool(
+        lambda entry: probe_duration_ffmpeg(video_paths[entry["idx"]]),
+        ready_scenes,
+        max_workers
+    )
+
+    render_list = []
+    for entry, source_duration in zip(ready_scenes, source_durations):
+        idx = entry["idx"]
+        if not source_duration:
+            print(f"Could not read the duration of the Luma clip for scene {idx}. Skipping.")
             continue
+        speed = source_duration / entry["duration"]
+        print(f"Scene {idx}: Luma clip {source_duration:.2f}s, audio {entry['duration']:.2f}s, speed x{speed:.2f}")
+        render_list.append({
+            "idx": idx,
+            "video_path": video_paths[idx],
+            "start": 0,
+            "duration": entry["duration"],
+            "speed": speed,
+            "interpolation": LUMA_RETIME_INTERPOLATION,
+            "crop": None,  # centered 9:16
+            "audio_path": entry["audio_path"]
+        })
 
-        # Download the ~5s Luma clip
-        downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}_{generation.id}.mp4")
-        download_luma_video(generation, downloaded_path)
-
-        try:
-            luma_clip = VideoFileClip(downloaded_path)
-            original_luma_duration = luma_clip.duration
-            print(f" - Original Luma clip duration: {original_luma_duration:.2f}s")
-
-            # Calculate speed factor so final matches audio length
-            speed_factor = original_luma_duration / audio_duration
-            # Speed up or slow down the Luma clip
-            final_clip = luma_clip.fx(vfx.speedx, factor=speed_factor)
-            # Then subclip to exactly the audio length
-            final_clip = final_clip.subclip(0, audio_duration)
-            final_clip = final_clip.set_audio(audio_clip)
-
-            final_clips.append(final_clip)
-            video_clips_to_close.append(luma_clip)
-            audio_clips_to_close.append(audio_clip)
-        except Exception as e:
-            print(f"Error processing Luma clip for scene {idx}: {e}")
-            audio_clip.close()
-            if 'luma_clip' in locals():
-                luma_clip.close()
-
-    if final_clips:
-        try:
-            print("\nConcatenating all Luma scenes into final video...")
-            temp_audio_file = os.path.join(temp_folder, 'temp_moviepy.mp4')
-            final_video = concatenate_videoclips(final_clips, method="compose")
-            final_video.write_videofile(output_path, codec='libx264', audio_codec='aac',
-                                        temp_audiofile=temp_audio_file, remove_temp=True)
-            final_video.close()
-            print(f"Final Luma video written to {output_path}")
-
-            for clip in final_clips:
-                clip.close()
-            for vc in video_clips_to_close:
-                vc.close()
-            for ac in audio_clips_to_close:
-                ac.close()
-
-        except Exception as e:
-            print(f"Error finalizing Luma video: {e}")
+    print("\nConcatenating all Luma scenes into final video...")
+    if render_scenes(render_list, output_path, work_dir, engine=LUMA_RENDER_ENGINE):
+        print(f"Final Luma video written to {output_path}")
     else:
-        print("No final Luma clips to concatenate.")
+        print("Error finalizing Luma video.")
@@ -0,0 +1,148 @@
+import time
+import threading
+import contextvars
+from typing import Any, Dict, Optional
+
+
+# The job whose work is running in the current context; copied into stage threads
+current_job_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_job_id", default=None)
+
+# LLM call statistics per calling function (process-wide) and per job
+_caller_metrics: Dict[str, Dict[str, Any]] = {}
+_job_metrics: Dict[str, Dict[str, Dict[str, Any]]] = {}
+_metrics_lock = threading.Lock()
+_started_at = time.time()
+
+
+def _empty_stats() -> Dict[str, Any]:
+    """
+    Returns a zeroed statistics record for one calling function.
+
+    Returns:
+        Dict[str, Any]: Counters for calls, tokens, latency, cache outcomes, errors and retries.
+    """
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latency_secs": 0.0,
+        "max_latency_secs": 0.0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "errors": 0,
+        "retries": 0,
+        "models": {},
+    }
+
+
+def _add_call(stats: Dict[str, Any], call: Dict[str, Any]) -> None:
+    """
+    Adds one call to a statistics record.
+
+    Args:
+        stats (Dict[str, Any]): The record from _empty_stats.
+        call (Dict[str, Any]): The call, as built by record_llm_call.
+    """
+    stats["calls"] += 1
+    stats["prompt_tokens"] += call["prompt_tokens"]
+    stats["completion_tokens"] += call["completion_tokens"]
+    stats["latency_secs"] += call["latency_secs"]
+    stats["max_latency_secs"] = max(stats["max_latency_secs"], call["latency_secs"])
+    if call["cache_status"] == "hit":
+        stats["cache_hits"] += 1
+    elif call["cache_status"] == "miss":
+        stats["cache_misses"] += 1
+    if call["error"]:
+        stats["errors"] += 1
+    stats["retries"] += call["retries"]
+    stats["models"][call["model"]] = stats["models"].get(call["model"], 0) + 1
+
+
+def record_llm_call(
+    caller: str,
+    model: str,
+    latency_secs: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cache_status: str = "disabled",
+    error: Optional[str] = None,
+    retries: int = 0
+) -> None:
+    """
+    Records one LLM call for its calling function and, if it runs inside a job, for that job.
+
+    Args:
+        caller (str): The generator function that made the call (e.g. "generate_script").
+        model (str): The model name.
+        latency_secs (float): Wall-clock time of the call, including retries.
+        prompt_tokens (int): Prompt tokens reported by the API (0 for cache hits).
+        completion_tokens (int): Completion tokens reported by the API (0 for cache hits).
+        cache_status (str): "hit", "miss", "bypassed" or "disabled".
+        error (Optional[str]): The error message if the call failed.
+        retries (int): Number of retries before the call succeeded or gave up.
+    """
+    call = {
+        "model": model,
+        "latency_secs": latency_secs,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cache_status": cache_status,
+        "error": error,
+        "retries": retries,
+    }
+    job_id = current_job_id.get()
+    with _metrics_lock:
+        _add_call(_caller_metrics.setdefault(caller, _empty_stats()), call)
+        if job_id:
+            job_stats = _job_metrics.setdefault(job_id, {})
+            _add_call(job_stats.setdefault(caller, _empty_stats()), call)
+
+
+def _summarize(per_caller: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds totals over all calling functions, alongside a copy of the per-caller records.
+
+    Args:
+        per_caller (Dict[str, Dict[str, Any]]): Statistics records keyed by calling function.
+
+    Returns:
+        Dict[str, Any]: "total" and "by_caller" statistics.
+    """
+    total = _empty_stats()
+    by_caller = {}
+    for caller, stats in per_caller.items():
+        by_caller[caller] = {**stats, "models": dict(stats["models"])}
+        for key in ("calls", "prompt_tokens", "completion_tokens", "latency_secs",
+                    "cache_hits", "cache_misses", "errors", "retries"):
+            total[key] += stats[key]
+        total["max_latency_secs"] = max(total["max_latency_secs"], stats["max_latency_secs"])
+        for model, count in stats["models"].items():
+            total["models"][model] = total["models"].get(model, 0) + count
+    return {"total": total, "by_caller": by_caller}
+
+
+def get_llm_metrics() -> Dict[str, Any]:
+    """
+    Returns the LLM call statistics of this process, for the metrics endpoint.
+
+    Returns:
+        Dict[str, Any]: Uptime plus "total" and "by_caller" statistics.
+    """
+    with _metrics_lock:
+        summary = _summarize(_caller_metrics)
+    summary["uptime_secs"] = time.time() - _started_at
+    return summary
+
+
+def pop_job_metrics(job_id: str) -> Dict[str, Any]:
+    """
+    Returns the LLM call statistics of a job and stops tracking it.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+
+    Returns:
+        Dict[str, Any]: "total" and "by_caller" statistics of the job.
+    """
+    with _metrics_lock:
+        return _summarize(_job_metrics.pop(job_id, {}))
@@ -1,45 +1,379 @@
 import json
-from typing import List, Dict, Optional, Any, Union
+import time
+import asyncio
+import threading
+from typing import Callable, List, Dict, Optional, Any, Tuple, Union
 
-from openai import OpenAI
+from openai import (OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError, InternalServerError,
+                    RateLimitError)
 
+from cache_funcs import get_cached_chat, store_cached_chat
+from metrics_funcs import record_llm_call
+from fact_funcs import get_shingles, jaccard_similarity, find_similar_fact, get_recent_facts
+from config import (OPENAI_CACHE, OPENAI_CACHE_MAX_TEMPERATURE, OPENAI_MAX_RETRIES, OPENAI_BACKOFF_SECS,
+                    FACT_STORE_PATH, FACT_PROMPT_SAMPLE, FACT_SIMILARITY_THRESHOLD, FACT_MAX_ATTEMPTS)
 
-# Initialize the OpenAI client
-client = None
 
+# Decodes one JSON value at a time from streamed function arguments
+_json_decoder = json.JSONDecoder()
 
-def init_openai_client(api_key: str) -> None:
+# Script generation settings, shared by the plain and streaming calls so they hit the same cache entries
+SCRIPT_MODEL = "gpt-4o"
+SCRIPT_MAX_TOKENS = 1600
+SCRIPT_TEMPERATURE = 0.7
+SCRIPT_FUNCTION_CALL = {"name": "generate_scene_list"}
+
+# Transient errors that are retried with backoff (connection errors include timeouts)
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+# One client (and connection pool) per API key, shared by all jobs using that key
+_clients: Dict[str, OpenAI] = {}
+# Asynchronous clients per API key, with the event loop their connection pool belongs to
+_async_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = {}
+_clients_lock = threading.Lock()
+
+# Response cache counters for this process
+_cache_stats = {"hits": 0, "misses": 0, "bypassed": 0}
+_cache_stats_lock = threading.Lock()
+
+
+def get_openai_client(api_key: str) -> OpenAI:
     """
-    Initializes the OpenAI client with the provided API key.
-    
-    This function sets up the global OpenAI client instance, which is used for making API calls.
-    
+    Returns the shared OpenAI client for an API key, creating it on first use.
+
+    Each job passes its own client to the generator functions, so concurrent jobs never
+    run on each other's keys.
+
     Args:
         api_key (str): The OpenAI API key for authentication.
-    
+
     Returns:
-        None
+        OpenAI: The client instance.
     """
-    global client
-    client = OpenAI(api_key=api_key)
-    
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # Retries are done by call_openai_chat, so they can be counted
+            client = OpenAI(api_key=api_key, max_retries=0)
+            _clients[api_key] = client
+        return client
+
+
+def get_async_openai_client(api_key: str) -> AsyncOpenAI:
+    """
+    Returns the shared asynchronous OpenAI client for an API key, creating it on first use.
+
+    The client's connection pool belongs to the event loop it is first used on, so it must
+    be called from a running loop; a loop that does not own the pooled client (e.g. the next
+    asyncio.run) gets a new one in its place.
+
+    Args:
+        api_key (str): The OpenAI API key for authentication.
+
+    Returns:
+        AsyncOpenAI: The client instance.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        entry = _async_clients.get(api_key)
+        if entry is None or entry[0] is not loop:
+            # Retries are done by call_openai_chat_async, so they can be counted
+            entry = (loop, AsyncOpenAI(api_key=api_key, max_retries=0))
+            _async_clients[api_key] = entry
+        return entry[1]
+
+
+def _count_cache(outcome: str) -> None:
+    """
+    Increments one of the response cache counters.
+
+    Args:
+        outcome (str): "hits", "misses" or "bypassed".
+    """
+    with _cache_stats_lock:
+        _cache_stats[outcome] += 1
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Returns the response cache counters of this process.
+
+    Returns:
+        Dict[str, int]: The number of cache hits, misses and bypassed calls.
+    """
+    with _cache_stats_lock:
+        return dict(_cache_stats)
+
+
+def build_chat_payload(
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    functions: Optional[List[Dict[str, Any]]] = None,
+    function_call: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Builds the Chat Completions request arguments, which also serve as the response cache key.
+
+    Args:
+        prompt (str): The input prompt to the model.
+        model (str): The model name to use.
+        max_tokens (int): The maximum tokens for the response.
+        temperature (float): Sampling temperature.
+        functions (Optional[List[Dict[str, Any]]], optional): Function definitions for structured output.
+        function_call (Optional[Dict[str, Any]], optional): Function call specification.
+
+    Returns:
+        Dict[str, Any]: The request keyword arguments.
+    """
+    request_payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+
+    # Add function definitions if provided
+    if functions:
+        request_payload["functions"] = functions
+    if function_call:
+        request_payload["function_call"] = function_call
+    return request_payload
+
+
+def parse_chat_response(response: Any, structured: bool) -> Union[Dict[str, Any], str]:
+    """
+    Extracts the result from a Chat Completions response.
+
+    Args:
+        response (Any): The API response.
+        structured (bool): Whether the request used function definitions.
+
+    Returns:
+        Union[Dict[str, Any], str]: The function arguments as a dictionary for structured
+                                    requests, otherwise the text content.
+    """
+    if structured:
+        function_call_data = response.choices[0].message.function_call
+        return json.loads(function_call_data.arguments)
+
+    # Return the text content for normal prompts
+    return response.choices[0].message.content.strip()
+
+
+def _get_cache_status(temperature: float) -> str:
+    """
+    Decides whether a call may be answered from the response cache, and counts bypasses.
+
+    Args:
+        temperature (float): The sampling temperature of the call.
+
+    Returns:
+        str: "miss" if the cache should be consulted, otherwise "disabled" or "bypassed".
+    """
+    if not OPENAI_CACHE:
+        return "disabled"
+    if temperature > OPENAI_CACHE_MAX_TEMPERATURE:
+        _count_cache("bypassed")
+        return "bypassed"
+    return "miss"
+
+
+def _get_retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Determines how long to wait before retrying an OpenAI call.
+
+    Uses the Retry-After header of rate-limit responses when present, otherwise exponential
+    backoff starting at OPENAI_BACKOFF_SECS.
+
+    Args:
+        error (Exception): The retryable error.
+        attempt (int): The zero-based number of the failed attempt.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+    return OPENAI_BACKOFF_SECS * 2 ** attempt
+
+
+def _get_usage(response: Any) -> Tuple[int, int]:
+    """
+    Reads the token usage of a Chat Completions response.
+
+    Args:
+        response (Any): The API response.
+
+    Returns:
+        Tuple[int, int]: The prompt and completion token counts (0 if not reported).
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+def _run_chat_request(
+    client: OpenAI,
+    request_payload: Dict[str, Any],
+    caller: str,
+    read_response: Callable[[Any], Tuple[Any, Tuple[int, int]]],
+    **create_args: Any
+) -> Any:
+    """
+    Sends a Chat Completions request through the response cache, the retry loop and metrics.
+
+    Shared by call_openai_chat and generate_script_streaming, so both use the same cache
+    keys, retry policy and metrics; _run_chat_request_async is its asynchronous counterpart. Only creating the request is retried; an error while
+    reading the response (e.g. a stream that breaks off) fails the call.
+
+    Args:
+        client (OpenAI): The job's client from get_openai_client.
+        request_payload (Dict[str, Any]): The request from build_chat_payload, also the cache key.
+        caller (str): The calling function, used to group metrics.
+        read_response (Callable[[Any], Tuple[Any, Tuple[int, int]]]): Turns the API response
+            into the result and its prompt and completion token counts.
+        **create_args (Any): Extra API arguments that do not affect the result (e.g. stream=True).
+
+    Returns:
+        Any: The result, from the cache or the API, or None if the call failed.
+    """
+    model = request_payload["model"]
+    cache_status = _get_cache_status(request_payload["temperature"])
+    started = time.perf_counter()
+    retries = 0
+    try:
+        if cache_status == "miss":
+            cached = get_cached_chat(request_payload)
+            if cached is not None:
+                _count_cache("hits")
+                record_llm_call(caller, model, time.perf_counter() - started, cache_status="hit")
+                return cached
+            _count_cache("misses")
+
+        # Make the API call
+        while True:
+            try:
+                response = client.chat.completions.create(**request_payload, **create_args)
+                break
+            except RETRYABLE_ERRORS as e:
+                if retries >= OPENAI_MAX_RETRIES:
+                    raise
+                delay = _get_retry_delay(e, retries)
+                retries += 1
+                print(f"OpenAI call from {caller} failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+        result, (prompt_tokens, completion_tokens) = read_response(response)
+
+        if cache_status == "miss":
+            store_cached_chat(request_payload, result)
+        record_llm_call(caller, model, time.perf_counter() - started, prompt_tokens, completion_tokens,
+                        cache_status=cache_status, retries=retries)
+        return result
+    except Exception as e:
+        print(f"An error occurred during the OpenAI API call: {e}")
+        record_llm_call(caller, model, time.perf_counter() - started, cache_status=cache_status,
+                        error=str(e), retries=retries)
+        return None
+
+
+async def _run_chat_request_async(
+    client: AsyncOpenAI,
+    request_payload: Dict[str, Any],
+    caller: str,
+    read_response: Callable[[Any], Tuple[Any, Tuple[int, int]]],
+    **create_args: Any
+) -> Any:
+    """
+    Asynchronous counterpart of _run_chat_request, with the same cache, retries and metrics.
+
+    Cache lookups and writes run on a worker thread to keep the event loop responsive.
+
+    Args:
+        client (AsyncOpenAI): The client from get_async_openai_client.
+        request_payload (Dict[str, Any]): The request from build_chat_payload, also the cache key.
+        caller (str): The calling function, used to group metrics.
+        read_response (Callable[[Any], Tuple[Any, Tuple[int, int]]]): Turns the API response
+            into the result and its prompt and completion token counts.
+        **create_args (Any): Extra API arguments that do not affect the result.
+
+    Returns:
+        Any: The result, from the cache or the API, or None if the call failed.
+    """
+    model = request_payload["model"]
+    cache_status = _get_cache_status(request_payload["temperature"])
+    started = time.perf_counter()
+    retries = 0
+    try:
+        if cache_status == "miss":
+            cached = await asyncio.to_thread(get_cached_chat, request_payload)
+            if cached is not None:
+                _count_cache("hits")
+                record_llm_call(caller, model, time.perf_counter() - started, cache_status="hit")
+                return cached
+            _count_cache("misses")
+
+        while True:
+            try:
+                response = await client.chat.completions.create(**request_payload, **create_args)
+                break
+            except RETRYABLE_ERRORS as e:
+                if retries >= OPENAI_MAX_RETRIES:
+                    raise
+                delay = _get_retry_delay(e, retries)
+                retries += 1
+                print(f"OpenAI call from {caller} failed ({e}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+        result, (prompt_tokens, completion_tokens) = read_response(response)
+
+        if cache_status == "miss":
+            await asyncio.to_thread(store_cached_chat, request_payload, result)
+        record_llm_call(caller, model, time.perf_counter() - started, prompt_tokens, completion_tokens,
+                        cache_status=cache_status, retries=retries)
+        return result
+    except Exception as e:
+        print(f"An error occurred during the OpenAI API call: {e}")
+        record_llm_call(caller, model, time.perf_counter() - started, cache_status=cache_status,
+                        error=str(e), retries=retries)
+        return None
+
 
 def call_openai_chat(
     prompt: str,
+    client: OpenAI,
     model: str = "gpt-4o",
     max_tokens: int = 1600,
     temperature: float = 0.7,
     functions: Optional[List[Dict[str, Any]]] = None,
     function_call: Optional[Dict[str, Any]] = None,
+    caller: str = "call_openai_chat",
 ) -> Union[Dict[str, Any], str, None]:
     """
     Calls the OpenAI Chat API and supports structured outputs with functions.
     
     This function sends a prompt to the OpenAI Chat API and handles both standard text completions
     and structured outputs using function calls.
+
+    With OPENAI_CACHE enabled, responses are cached on disk keyed by the model, prompt,
+    function schema, temperature and max_tokens, so byte-identical re-runs are answered
+    locally. Calls with a temperature above OPENAI_CACHE_MAX_TEMPERATURE are creative by
+    design and always go to the API.
+
+    Rate limits, connection errors and server errors are retried up to OPENAI_MAX_RETRIES
+    times. Tokens, latency, cache status, errors and retries of every call are recorded in
+    metrics_funcs under the calling function and the current job.
     
     Args:
         prompt (str): The input prompt to the model.
+        client (OpenAI): The job's client from get_openai_client.
         model (str, optional): The model name to use. Defaults to "gpt-4o".
         max_tokens (int, optional): The maximum tokens for the response. Defaults to 1600.
         temperature (float, optional): Sampling temperature. Defaults to 0.7.
@@ -47,59 +381,97 @@ def call_openai_chat(
             List of function definitions for structured output. Defaults to None.
         function_call (Optional[Dict[str, Any]], optional): 
             Optional function call specification. Defaults to None.
+        caller (str, optional): The calling function, used to group metrics.
     
     Returns:
         Union[Dict[str, Any], str, None]: 
             Returns a structured response as a dictionary if functions are used, 
             a string for normal text completions, or None if an error occurs.
     """
-    try:
-        # Build the base request
-        request_payload = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
-        
-        # Add function definitions if provided
-        if functions:
-            request_payload["functions"] = functions
-        if function_call:
-            request_payload["function_call"] = function_call
+    request_payload = build_chat_payload(prompt, model, max_tokens, temperature, functions, function_call)
 
-        # Make the API call
-        response = client.chat.completions.create(**request_payload)
-        
-        # Check if the response includes a function call
-        if functions:
-            function_call_data = response.choices[0].message.function_call
-            function_response = json.loads(function_call_data.arguments)
-            return function_response
-        
-        # Return the text content for normal prompts
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"An error occurred during the OpenAI API call: {e}")
-        return None
+    def read_response(response: Any) -> Tuple[Any, Tuple[int, int]]:
+        return parse_chat_response(response, structured=bool(functions)), _get_usage(response)
+
+    return _run_chat_request(client, request_payload, caller, read_response)
 
 
-def generate_video_topic(subject_or_theme: str, previous_facts: Optional[List[str]] = None) -> str:
+async def call_openai_chat_async(
+    prompt: str,
+    client: AsyncOpenAI,
+    model: str = "gpt-4o",
+    max_tokens: int = 1600,
+    temperature: float = 0.7,
+    functions: Optional[List[Dict[str, Any]]] = None,
+    function_call: Optional[Dict[str, Any]] = None,
+    caller: str = "call_openai_chat_async",
+) -> Union[Dict[str, Any], str, None]:
+    """
+    Asynchronous variant of call_openai_chat, so one event loop can drive many jobs' calls
+    without a thread per call.
+
+    Uses the same request building, response cache, retries and metrics as call_openai_chat.
+
+    Args:
+        prompt (str): The input prompt to the model.
+        client (AsyncOpenAI): The client from get_async_openai_client.
+        model (str, optional): The model name to use. Defaults to "gpt-4o".
+        max_tokens (int, optional): The maximum tokens for the response. Defaults to 1600.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+        functions (Optional[List[Dict[str, Any]]], optional):
+            List of function definitions for structured output. Defaults to None.
+        function_call (Optional[Dict[str, Any]], optional):
+            Optional function call specification. Defaults to None.
+        caller (str, optional): The calling function, used to group metrics.
+
+    Returns:
+        Union[Dict[str, Any], str, None]:
+            Returns a structured response as a dictionary if functions are used,
+            a string for normal text completions, or None if an error occurs.
+    """
+    request_payload = build_chat_payload(prompt, model, max_tokens, temperature, functions, function_call)
+
+    def read_response(response: Any) -> Tuple[Any, Tuple[int, int]]:
+        return parse_chat_response(response, structured=bool(functions)), _get_usage(response)
+
+    return await _run_chat_request_async(client, request_payload, caller, read_response)
+
+
+def generate_video_topic(
+    subject_or_theme: str,
+    client: OpenAI,
+    previous_facts: Optional[List[str]] = None
+) -> str:
     """
     Generates a very specific, interesting, and lesser-known fact related to the given subject or theme.
 
+    Only a bounded sample of earlier facts is put in the prompt: the most recent of
+    previous_facts and of the fact store, FACT_PROMPT_SAMPLE in total. Older repeats are
+    caught locally instead; a near-duplicate of any previous or stored fact is rejected and
+    regenerated, up to FACT_MAX_ATTEMPTS times; if every attempt is a repeat, "No new fact
+    found." is returned instead. The new fact is not stored here: the caller adds it with
+    fact_funcs.add_fact once the video is made, so a failed job does not use it up.
+
     Args:
         subject_or_theme (str): The main subject or theme for generating the fact.
+        client (OpenAI): The job's client from get_openai_client.
         previous_facts (Optional[List[str]]): A list of previously generated facts to avoid repetition.
 
     Returns:
-        str: A single, concise fact related to the subject or "No new fact found."
+        str: A single, concise fact related to the subject, "No new fact found." or None if
+             the call failed.
     """
-    if previous_facts is None:
-        previous_facts = []
-    previous_facts_text = "\n".join(f"- {fact}" for fact in previous_facts)
+    previous_facts = list(previous_facts or [])
+    previous_shingles = [get_shingles(fact) for fact in previous_facts]
+    excluded_facts = previous_facts[-FACT_PROMPT_SAMPLE:] if FACT_PROMPT_SAMPLE > 0 else []
+    if FACT_STORE_PATH:
+        excluded_facts += get_recent_facts(subject_or_theme, FACT_PROMPT_SAMPLE - len(excluded_facts))
 
-    prompt = f"""
+    video_topic = None
+    for attempt in range(max(1, FACT_MAX_ATTEMPTS)):
+        previous_facts_text = "\n".join(f"- {fact}" for fact in excluded_facts)
+
+        prompt = f"""
     Generate a very specific, interesting, and lesser-known fact related to the following subject: "{subject_or_theme}".
     The fact should be engaging, surprising, and not commonly known. Provide the fact as a single, concise sentence.
 
@@ -114,7 +486,24 @@ def generate_video_topic(subject_or_theme: str, previous_facts: Optional[List[st
 
     """
 
-    video_topic = call_openai_chat(prompt, temperature=0.9)
+        video_topic = call_openai_chat(prompt, temperature=0.9, client=client, caller="generate_video_topic")
+        if not video_topic or "No new fact found" in video_topic:
+            break
+
+        shingles = get_shingles(video_topic)
+        duplicate = next((fact for fact, fact_shingles in zip(previous_facts, previous_shingles)
+                          if jaccard_similarity(shingles, fact_shingles) >= FACT_SIMILARITY_THRESHOLD), None)
+        if duplicate is None and FACT_STORE_PATH:
+            duplicate = find_similar_fact(video_topic)
+        if duplicate is None:
+            break
+
+        print(f"Generated fact repeats \"{duplicate}\" (attempt {attempt + 1} of {FACT_MAX_ATTEMPTS}).")
+        # Name the repeated fact explicitly on the next attempt
+        excluded_facts.append(duplicate)
+    else:
+        # Every attempt was a repeat; never hand one on as a new fact
+        video_topic = "No new fact found."
 
     print("\nGenerated Video Topic:")
     print(video_topic)
@@ -123,15 +512,19 @@ def generate_video_topic(subject_or_theme: str, previous_facts: Optional[List[st
     return video_topic
 
 
-def generate_script(video_topic: str, video_duration_secs: int) -> List[str]:
+def build_script_request(video_topic: str, video_duration_secs: int) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Generates a structured script for a YouTube video based on the given topic.
+    Builds the prompt and function schema for script generation.
+
+    Shared by generate_script and generate_script_streaming, so both send identical requests
+    and share response cache entries.
 
     Args:
         video_topic (str): The topic of the video.
+        video_duration_secs (int): The target length of the video in seconds.
 
     Returns:
-        list: A list of scenes as strings, each containing 1-2 sentences.
+        Tuple[str, List[Dict[str, Any]]]: The prompt and the function definitions.
     """
     # Define the function schema for structured output
     function_definition = [
@@ -174,27 +567,153 @@ def generate_script(video_topic: str, video_duration_secs: int) -> List[str]:
     Fact: "{video_topic}"
     """
 
+    return prompt, function_definition
+
+
+def generate_script(video_topic: str, video_duration_secs: int, client: OpenAI) -> List[str]:
+    """
+    Generates a structured script for a YouTube video based on the given topic.
+
+    Args:
+        video_topic (str): The topic of the video.
+        video_duration_secs (int): The target length of the video in seconds.
+        client (OpenAI): The job's client from get_openai_client.
+
+    Returns:
+        list: A list of scenes as strings, each containing 1-2 sentences.
+    """
+    prompt, function_definition = build_script_request(video_topic, video_duration_secs)
+
     # Call the chat function with structured output
     response = call_openai_chat(
         prompt=prompt,
+        model=SCRIPT_MODEL,
+        max_tokens=SCRIPT_MAX_TOKENS,
+        temperature=SCRIPT_TEMPERATURE,
         functions=function_definition,
-        function_call={"name": "generate_scene_list"}
+        function_call=SCRIPT_FUNCTION_CALL,
+        client=client,
+        caller="generate_script"
     )
+    scenes = (response or {}).get("scenes", [])
 
     print("\nGenerated Script:")
-    print(response.get("scenes", []))
+    print(scenes)
     print("\n")
 
-    return response.get("scenes", [])
+    return scenes
 
 
-def generate_search_terms(video_topic: str, scripts: List[str]) -> List[str]:
+def parse_streamed_scenes(arguments: str, position: int) -> Tuple[List[str], int]:
+    """
+    Extracts the scenes that are complete so far from partially streamed function arguments.
+
+    The arguments grow towards {"scenes": ["...", "...", ...]}. Each string element is
+    decoded with raw_decode as soon as its closing quote has arrived; a string that is still
+    being written raises a decode error and is picked up on a later call.
+
+    Args:
+        arguments (str): The function-call arguments received so far.
+        position (int): Where parsing stopped on the previous call (0 initially).
+
+    Returns:
+        Tuple[List[str], int]: The newly completed scenes and the position to resume from.
+    """
+    if position == 0:
+        array_start = arguments.find("[", arguments.find('"scenes"') + 1) if '"scenes"' in arguments else -1
+        if array_start < 0:
+            return [], 0
+        position = array_start + 1
+
+    scenes = []
+    while True:
+        while position < len(arguments) and arguments[position] in " \t\r\n,":
+            position += 1
+        if position >= len(arguments) or arguments[position] != '"':
+            return scenes, position
+        try:
+            scene, end = _json_decoder.raw_decode(arguments, position)
+        except json.JSONDecodeError:
+            return scenes, position
+        scenes.append(scene)
+        position = end
+
+
+def generate_script_streaming(
+    video_topic: str,
+    video_duration_secs: int,
+    on_scene: Callable[[int, str], None],
+    client: OpenAI
+) -> List[str]:
+    """
+    Generates the script like generate_script, but streams the response and reports each
+    scene as soon as it is complete.
+
+    Lets downstream stages such as TTS start on the first scene while the model is still
+    writing the rest. The request is the same as generate_script's, so both share response
+    cache entries; a cached script reports all its scenes at once.
+
+    Args:
+        video_topic (str): The topic of the video.
+        video_duration_secs (int): The target length of the video in seconds.
+        on_scene (Callable[[int, str], None]): Called with the zero-based index and text of
+                                               each scene, in order, as soon as it is complete.
+        client (OpenAI): The job's client from get_openai_client.
+
+    Returns:
+        List[str]: All scenes, or an empty list if the call failed at any point (including a
+                   response cut off by max_tokens). Scenes reported before a failure are not
+                   part of any script, and the caller must discard work started on them.
+    """
+    prompt, function_definition = build_script_request(video_topic, video_duration_secs)
+    request_payload = build_chat_payload(prompt, SCRIPT_MODEL, SCRIPT_MAX_TOKENS, SCRIPT_TEMPERATURE,
+                                         function_definition, SCRIPT_FUNCTION_CALL)
+    streamed: List[str] = []
+
+    def read_stream(stream: Any) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+        arguments = ""
+        position = 0
+        usage = (0, 0)
+        finish_reason = None
+        for chunk in stream:
+            if chunk.usage:
+                usage = _get_usage(chunk)
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if not chunk.choices or not chunk.choices[0].delta.function_call:
+                continue
+            arguments += chunk.choices[0].delta.function_call.arguments or ""
+            new_scenes, position = parse_streamed_scenes(arguments, position)
+            for scene in new_scenes:
+                on_scene(len(streamed), scene)
+                streamed.append(scene)
+        if finish_reason == "length":
+            raise ValueError(f"script cut off at max_tokens ({SCRIPT_MAX_TOKENS})")
+        # The complete arguments are authoritative; a response that broke off fails to parse here
+        return json.loads(arguments), usage
+
+    result = _run_chat_request(client, request_payload, "generate_script", read_stream,
+                               stream=True, stream_options={"include_usage": True})
+    scenes = (result or {}).get("scenes", [])
+    # Report what the incremental parser did not see, or every scene of a cached script
+    for idx in range(len(streamed), len(scenes)):
+        on_scene(idx, scenes[idx])
+
+    print("\nGenerated Script:")
+    print(scenes)
+    print("\n")
+
+    return scenes
+
+
+def generate_search_terms(video_topic: str, scripts: List[str], client: OpenAI) -> List[str]:
     """
     Generates a list of search terms where each search term corresponds to a scene script.
     
     Args:
         video_topic (str): The main topic of the video.
         scripts (list): A list of scene scripts.
+        client (OpenAI): The job's client from get_openai_client.
     
     Returns:
         list: A list of search terms corresponding to each scene.
@@ -258,7 +777,9 @@ def generate_search_terms(video_topic: str, scripts: List[str]) -> List[str]:
     response = call_openai_chat(
         prompt=prompt,
         functions=function_definition,
-        function_call={"name": "generate_search_terms"}
+        function_call={"name": "generate_search_terms"},
+        client=client,
+        caller="generate_search_terms"
     )
 
     print("\nGenerated Search Terms:")
@@ -268,10 +789,17 @@ def generate_search_terms(video_topic: str, scripts: List[str]) -> List[str]:
     return response.get("search_terms", [])
 
 
-def generate_detailed_prompts(scenes: List[str]) -> List[str]:
+def generate_detailed_prompts(scenes: List[str], client: OpenAI) -> List[str]:
     """
     Takes a list of short scene descriptions and returns a list of more detailed prompts,
     suitable for Luma AI generation.
+
+    Args:
+        scenes (List[str]): The script text of each scene.
+        client (OpenAI): The job's client from get_openai_client.
+
+    Returns:
+        List[str]: A detailed visual prompt for each scene.
     """
     # Define the function schema for structured output
     function_definition = [
@@ -310,7 +838,9 @@ def generate_detailed_prompts(scenes: List[str]) -> List[str]:
     response = call_openai_chat(
         prompt=prompt,
         functions=function_definition,
-        function_call={"name": "generate_detailed_prompts_for_luma"}
+        function_call={"name": "generate_detailed_prompts_for_luma"},
+        client=client,
+        caller="generate_detailed_prompts"
     )
 
     print("\nGenerated Detailed Prompts for Luma AI:")
@@ -320,12 +850,13 @@ def generate_detailed_prompts(scenes: List[str]) -> List[str]:
     return response.get("detailed_prompts", [])
 
     
-def generate_video_title_and_hashtags(video_topic: str) -> Dict[str, List[str]]:
+def generate_video_title_and_hashtags(video_topic: str, client: OpenAI) -> Dict[str, List[str]]:
     """
     Generates a catchy video title and 5 relevant hashtags for YouTube based on the given topic.
 
     Args:
         video_topic (str): The topic of the video.
+        client (OpenAI): The job's client from get_openai_client.
 
     Returns:
         dict: A dictionary containing "title" (str) and "hashtags" (list of strings).
@@ -366,7 +897,9 @@ def generate_video_title_and_hashtags(video_topic: str) -> Dict[str, List[str]]:
     response = call_openai_chat(
         prompt=prompt,
         functions=function_definition,
-        function_call={"name": "generate_title_and_hashtags"}
+        function_call={"name": "generate_title_and_hashtags"},
+        client=client,
+        caller="generate_video_title_and_hashtags"
     )
 
     print("Generated Video Title and Hashtags:")
@@ -1,9 +1,11 @@
 import os
 
-import requests
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
-from moviepy.video.fx.all import crop
-from helper_funcs import configure_moviepy
+from audio_funcs import get_scene_manifest
+from helper_funcs import configure_moviepy, run_in_thread_pool
+from render_funcs import render_scenes, select_rendition
+from http_funcs import get_session
+from cache_funcs import fetch_clip, get_cached_search, store_cached_search
+from config import SCENE_FETCH_WORKERS
 from typing import List, Dict, Any, Optional
 
 
@@ -17,6 +19,7 @@ def search_videos_pexels(
 
     This function queries the Pexels API for videos that match the given keyword. It
     allows for filtering by minimum duration and limits the number of results per page.
+    Results are served from the search cache while they are fresh.
 
     Args:
         search_term (str): The keyword to search for in Pexels videos.
@@ -31,8 +34,11 @@ def search_videos_pexels(
         "query": search_term,
         "per_page": 10
     }
+    cached_hits = get_cached_search("pexels", search_term, min_duration, {"per_page": 10})
+    if cached_hits is not None:
+        return cached_hits
     try:
-        response = requests.get(
+        response = get_session("pexels").get(
             base_url, 
             headers={"Authorization": api_key}, 
             params=params
@@ -42,6 +48,7 @@ def search_videos_pexels(
         hits = data.get("videos", [])
         if min_duration is not None:
             hits = [h for h in hits if h.get("duration", 0) >= min_duration]
+        store_cached_search("pexels", search_term, min_duration, {"per_page": 10}, hits)
         return hits
     except Exception as e:
         print(f"Error searching Pexels videos: {e}")
@@ -50,43 +57,43 @@ def search_videos_pexels(
 
 def download_video_pexels(
     video_data: Dict[str, Any],
-    output_path: str
+    output_path: str,
+    max_duration: Optional[float] = None
 ) -> bool:
     """
     Download a single Pexels video to the specified output path.
 
-    This function retrieves the video URL from the provided video data and downloads
-    the video file, saving it to the designated location on the local file system.
+    This function picks the smallest rendition that meets RENDITION_QUALITY_FLOOR,
+    then downloads the video file, saving it to the designated location on the local file system.
+    Clips already present in the persistent clip cache are not downloaded again.
 
     Args:
         video_data (Dict[str, Any]): A dictionary containing information about the Pexels video.
         output_path (str): The file system path where the downloaded video will be saved.
+        max_duration (Optional[float]): Seconds of the clip that will be used. When given, only
+                                        that part of the clip is fetched if possible.
 
     Returns:
         bool: True if the download was successful, False otherwise.
     """
     try:
-        video_files = video_data.get("video_files", [])
-        video_files.sort(
-            key=lambda vf: vf.get("width", 0) * vf.get("height", 0), 
-            reverse=True
-        )
+        video_files = [
+            vf for vf in video_data.get("video_files", [])
+            if vf.get("file_type", "video/mp4") == "video/mp4"
+        ]
         if not video_files:
             print("No video files in Pexels response.")
             return False
         
-        best_file = video_files[0]
+        best_file = select_rendition(video_files)
         video_url = best_file.get("link")
         if not video_url:
             print("No video URL found in the selected video file.")
             return False
 
-        resp = requests.get(video_url, stream=True)
-        resp.raise_for_status()
-        with open(output_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
+        rendition = str(best_file.get("id") or f"{best_file.get('width')}x{best_file.get('height')}")
+        fetch_clip("pexels", video_data.get("id") or video_url, rendition, video_url, output_path,
+                   max_duration=max_duration)
         print(f"Pexels video downloaded to {output_path}")
         return True
     except Exception as e:
@@ -94,12 +101,50 @@ def download_video_pexels(
         return False
 
 
+def fetch_scene_video_pexels(
+    scene: Dict[str, Any],
+    temp_video_dir: str,
+    api_key: str
+) -> Optional[str]:
+    """
+    Search for and download the Pexels clip for a single scene.
+
+    Runs on a worker thread, so it only touches files that belong to the given scene.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "search_term" and "audio_duration" keys.
+        temp_video_dir (str): Directory where the downloaded clip will be saved.
+        api_key (str): The Pexels API key for authentication.
+
+    Returns:
+        Optional[str]: The path of the downloaded clip, or None if no clip could be fetched.
+    """
+    idx = scene["idx"]
+    audio_duration = scene["audio_duration"]
+
+    min_duration = int(audio_duration) + 1
+    hits = search_videos_pexels(scene["search_term"], min_duration=min_duration, api_key=api_key)
+    suitable_hits = [h for h in hits if h.get("duration", 0) >= audio_duration]
+    if not suitable_hits:
+        print(f"No suitable Pexels videos for scene {idx}.")
+        return None
+
+    video_data = suitable_hits[0]
+    downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
+    if not download_video_pexels(video_data, downloaded_path, max_duration=audio_duration):
+        print(f"Failed to download scene {idx} from Pexels.")
+        return None
+    return downloaded_path
+
+
 def process_videos_pexels(
     scripts: List[str],
     search_terms: List[str],
     audio_dir: str,
     output_path: str,
-    api_key: str
+    api_key: str,
+    work_dir: str,
+    max_workers: int = SCENE_FETCH_WORKERS
 ) -> None:
     """
     Create a final video by processing multiple Pexels videos and corresponding audio files.
@@ -111,119 +156,59 @@ def process_videos_pexels(
     4. Synchronizes videos with corresponding audio files.
     5. Concatenates all processed video clips into a single final output video.
 
+    Steps 2 and 3 run concurrently for all scenes on a bounded thread pool; the clips are
+    still assembled in scene order. Steps 4 and 5 are delegated to render_funcs.render_scenes,
+    which uses the configured render engine.
+
     Args:
         scripts (List[str]): A list of script texts for each scene.
         search_terms (List[str]): A list of search terms corresponding to each script.
         audio_dir (str): Directory containing audio files for each scene.
         output_path (str): The file system path where the final video will be saved.
         api_key (str): The Pexels API key for authentication.
+        work_dir (str): The job workspace; downloaded clips go into its "video" subfolder.
+        max_workers (int): Maximum number of scenes searched and downloaded at once.
     """
     configure_moviepy()
-    temp_folder = "temp"
-    temp_video_dir = os.path.join(temp_folder, "video")
+    temp_video_dir = os.path.join(work_dir, "video")
     os.makedirs(temp_video_dir, exist_ok=True)
 
-    final_clips = []
-    video_clips_to_close = []
-    audio_clips_to_close = []
-
-    for idx, script in enumerate(scripts, start=1):
-        audio_file = os.path.join(audio_dir, f"scene_{idx}.mp3")
-        if not os.path.exists(audio_file):
-            print(f"Audio for scene {idx} not found. Skipping.")
-            continue
-        
-        try:
-            audio_clip = AudioFileClip(audio_file)
-            audio_duration = audio_clip.duration
-        except Exception as e:
-            print(f"Error loading audio {audio_file}: {e}")
-            continue
-        
+    scenes = []
+    for entry in get_scene_manifest(scripts, audio_dir):
+        idx = entry["idx"]
         if idx - 1 < len(search_terms):
             search_term = search_terms[idx - 1]
         else:
             search_term = "generic"  # fallback if not enough terms
 
-        min_duration = int(audio_duration) + 1
-        hits = search_videos_pexels(search_term, min_duration=min_duration, api_key=api_key)
-        suitable_hits = [h for h in hits if h.get("duration", 0) >= audio_duration]
-        if not suitable_hits:
-            print(f"No suitable Pexels videos for scene {idx}.")
-            audio_clip.close()
-            continue
-
-        video_data = suitable_hits[0]
-        downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
-        if not download_video_pexels(video_data, downloaded_path):
-            audio_clip.close()
-            print(f"Failed to download scene {idx} from Pexels.")
-            continue
-        
-        try:
-            video_clip = VideoFileClip(downloaded_path)
-            if video_clip.duration >= audio_duration:
-                final_clip = video_clip.subclip(0, audio_duration)
-            else:
-                print(f"Scene {idx} video is shorter than audio.")
-                final_clip = video_clip  # Or skip entirely
-
-            # Crop/resize to 9:16
-            aspect_ratio = final_clip.w / final_clip.h
-            if aspect_ratio < 0.5625:  # narrower
-                new_height = final_clip.w / 0.5625
-                final_clip = crop(
-                    final_clip, 
-                    width=final_clip.w, 
-                    height=new_height,
-                    x_center=final_clip.w/2,
-                    y_center=final_clip.h/2
-                )
-            else:  # wider
-                new_width = 0.5625 * final_clip.h
-                final_clip = crop(
-                    final_clip,
-                    width=new_width,
-                    height=final_clip.h,
-                    x_center=final_clip.w/2,
-                    y_center=final_clip.h/2
-                )
-            
-            final_clip = final_clip.resize((1080, 1920))
-            final_clip = final_clip.set_audio(audio_clip)
-            final_clips.append(final_clip)
-            video_clips_to_close.append(video_clip)
-            audio_clips_to_close.append(audio_clip)
-
-            print(f"Scene {idx} processed.")
-        except Exception as e:
-            print(f"Error processing scene {idx}: {e}")
-            audio_clip.close()
-            if "video_clip" in locals():
-                video_clip.close()
-
-    if final_clips:
-        try:
-            print("Concatenating all Pexels clips into final video...")
-            temp_moviepy_path = os.path.join(temp_folder, "temp_moviepy.mp4")
-            final_video = concatenate_videoclips(final_clips, method="compose")
-            final_video.write_videofile(
-                output_path, 
-                codec="libx264", 
-                audio_codec="aac",
-                temp_audiofile=temp_moviepy_path, 
-                remove_temp=True
-            )
-            final_video.close()
-            print(f"Final Pexels video written to {output_path}")
-        except Exception as e:
-            print(f"Error finalizing Pexels video: {e}")
+        scenes.append({
+            "idx": idx,
+            "audio_path": entry["audio_path"],
+            "audio_duration": entry["duration"],
+            "search_term": search_term
+        })
+
+    downloaded_paths = run_in_thread_pool(
+        lambda scene: fetch_scene_video_pexels(scene, temp_video_dir, api_key),
+        scenes,
+        max_workers
+    )
+
+    render_list = [
+        {
+            "idx": scene["idx"],
+            "video_path": downloaded_path,
+            "start": 0,
+            "duration": scene["audio_duration"],
+            "crop": None,  # centered 9:16
+            "audio_path": scene["audio_path"]
+        }
+        for scene, downloaded_path in zip(scenes, downloaded_paths)
+        if downloaded_path
+    ]
+
+    print("Concatenating all Pexels clips into final video...")
+    if render_scenes(render_list, output_path, work_dir):
+        print(f"Final Pexels video written to {output_path}")
     else:
-        print("No final clips to concatenate.")
-
-    for clip in final_clips:
-        clip.close()
-    for vc in video_clips_to_close:
-        vc.close()
-    for ac in audio_clips_to_close:
-        ac.close()
+        print("Error finalizing Pexels video.")
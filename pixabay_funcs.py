@@ -1,12 +1,13 @@
 import os
 from urllib.parse import urlencode
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-import requests
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
-from moviepy.video.fx.all import crop
-
-from helper_funcs import configure_moviepy
+from audio_funcs import get_scene_manifest
+from helper_funcs import configure_moviepy, run_in_thread_pool
+from render_funcs import render_scenes, select_rendition
+from http_funcs import get_session
+from cache_funcs import fetch_clip, get_cached_search, store_cached_search
+from config import SCENE_FETCH_WORKERS
 
 
 def search_videos_pixabay(
@@ -19,6 +20,7 @@ def search_videos_pixabay(
 
     This function queries the Pixabay API for videos that match the given keyword. It
     allows for safe search filtering and limits the number of results per page.
+    Results are served from the search cache while they are fresh.
 
     Args:
         search_term (str): The keyword to search for in Pixabay videos.
@@ -36,12 +38,18 @@ def search_videos_pixabay(
         'safesearch': str(safesearch).lower(),
         'per_page': 10
     }
+    filters = {k: v for k, v in params.items() if k not in ('key', 'q')}
+    cached_hits = get_cached_search('pixabay', search_term, None, filters)
+    if cached_hits is not None:
+        return cached_hits
     try:
         url = f"{base_url}?{urlencode(params)}"
-        response = requests.get(url)
+        response = get_session('pixabay').get(url)
         response.raise_for_status()
         data = response.json()
-        return data.get('hits', [])
+        hits = data.get('hits', [])
+        store_cached_search('pixabay', search_term, None, filters, hits)
+        return hits
     except Exception as e:
         print(f"Error searching Pixabay videos: {e}")
         return []
@@ -49,34 +57,39 @@ def search_videos_pixabay(
 
 def download_video_pixabay(
     video_data: Dict[str, Any],
-    output_path: str
+    output_path: str,
+    max_duration: Optional[float] = None
 ) -> bool:
     """
     Download a single Pixabay video to the specified output path.
 
-    This function retrieves the video URL from the provided video data and downloads
-    the video file, saving it to the designated location on the local file system.
+    This function picks the smallest rendition (tiny, small, medium or large) that meets
+    RENDITION_QUALITY_FLOOR, then downloads the video file, saving it to the designated
+    location on the local file system. Clips already present in the persistent clip cache
+    are not downloaded again.
 
     Args:
         video_data (Dict[str, Any]): A dictionary containing information about the Pixabay video.
         output_path (str): The file system path where the downloaded video will be saved.
+        max_duration (Optional[float]): Seconds of the clip that will be used. When given, only
+                                        that part of the clip is fetched if possible.
 
     Returns:
         bool: True if the download was successful, False otherwise.
     """
     try:
-        medium_info = video_data.get('videos', {}).get('medium', {})
-        video_url = medium_info.get('url')
-        if not video_url:
+        renditions = [
+            dict(info, name=name) for name, info in video_data.get('videos', {}).items()
+            if info.get('url')
+        ]
+        best_info = select_rendition(renditions)
+        if not best_info:
             print("No video URL found in video data.")
             return False
+        video_url = best_info['url']
 
-        resp = requests.get(video_url, stream=True)
-        resp.raise_for_status()
-        with open(output_path, 'wb') as f:
-            for chunk in resp.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
+        fetch_clip('pixabay', video_data.get('id') or video_url, best_info['name'], video_url, output_path,
+                   max_duration=max_duration)
         print(f"Pixabay video downloaded to {output_path}")
         return True
     except Exception as e:
@@ -84,12 +97,49 @@ def download_video_pixabay(
         return False
 
 
+def fetch_scene_video_pixabay(
+    scene: Dict[str, Any],
+    temp_video_dir: str,
+    api_key: str
+) -> Optional[str]:
+    """
+    Search for and download the Pixabay clip for a single scene.
+
+    Runs on a worker thread, so it only touches files that belong to the given scene.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "search_term" and "audio_duration" keys.
+        temp_video_dir (str): Directory where the downloaded clip will be saved.
+        api_key (str): The Pixabay API key for authentication.
+
+    Returns:
+        Optional[str]: The path of the downloaded clip, or None if no clip could be fetched.
+    """
+    idx = scene["idx"]
+    audio_duration = scene["audio_duration"]
+
+    hits = search_videos_pixabay(scene["search_term"], safesearch=True, api_key=api_key)
+    suitable_hits = [h for h in hits if h.get('duration', 0) >= audio_duration]
+    if not suitable_hits:
+        print(f"No suitable Pixabay videos found for scene {idx}.")
+        return None
+
+    video_data = suitable_hits[0]
+    downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
+    if not download_video_pixabay(video_data, downloaded_path, max_duration=audio_duration):
+        print(f"Failed to download scene {idx} from Pixabay.")
+        return None
+    return downloaded_path
+
+
 def process_videos_pixabay(
     scripts: List[str],
     search_terms: List[str],
     audio_dir: str,
     output_path: str,
-    api_key: str
+    api_key: str,
+    work_dir: str,
+    max_workers: int = SCENE_FETCH_WORKERS
 ) -> None:
     """
     Create a final video by processing multiple Pixabay videos and corresponding audio files.
@@ -101,115 +151,59 @@ def process_videos_pixabay(
     4. Synchronizes videos with corresponding audio files.
     5. Concatenates all processed video clips into a single final output video.
 
+    Steps 2 and 3 run concurrently for all scenes on a bounded thread pool; the clips are
+    still assembled in scene order. Steps 4 and 5 are delegated to render_funcs.render_scenes,
+    which uses the configured render engine.
+
     Args:
         scripts (List[str]): A list of script texts for each scene.
         search_terms (List[str]): A list of search terms corresponding to each script.
         audio_dir (str): Directory containing audio files for each scene.
         output_path (str): The file system path where the final video will be saved.
         api_key (str): The Pixabay API key for authentication.
+        work_dir (str): The job workspace; downloaded clips go into its "video" subfolder.
+        max_workers (int): Maximum number of scenes searched and downloaded at once.
     """
     configure_moviepy()
-    temp_folder = 'temp'
-    temp_video_dir = os.path.join(temp_folder, 'video')
+    temp_video_dir = os.path.join(work_dir, 'video')
     os.makedirs(temp_video_dir, exist_ok=True)
 
-    final_clips = []
-    video_clips_to_close = []
-    audio_clips_to_close = []
-
-    for idx, script in enumerate(scripts, start=1):
-        audio_file = os.path.join(audio_dir, f"scene_{idx}.mp3")
-        if not os.path.exists(audio_file):
-            print(f"No audio file for scene {idx}. Skipping.")
-            continue
-
-        try:
-            audio_clip = AudioFileClip(audio_file)
-            audio_duration = audio_clip.duration
-        except Exception as e:
-            print(f"Error loading audio for scene {idx}: {e}")
-            continue
-
+    scenes = []
+    for entry in get_scene_manifest(scripts, audio_dir):
+        idx = entry["idx"]
         if idx - 1 < len(search_terms):
             search_term = search_terms[idx - 1]
         else:
-            search_term = "generic"
-
-        hits = search_videos_pixabay(search_term, safesearch=True, api_key=api_key)
-        suitable_hits = [h for h in hits if h.get('duration', 0) >= audio_duration]
-        if not suitable_hits:
-            print(f"No suitable Pixabay videos found for scene {idx}.")
-            audio_clip.close()
-            continue
-
-        video_data = suitable_hits[0]
-        downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
-        if not download_video_pixabay(video_data, downloaded_path):
-            audio_clip.close()
-            print(f"Failed to download scene {idx} from Pixabay.")
-            continue
-
-        try:
-            video_clip = VideoFileClip(downloaded_path)
-            if video_clip.duration >= audio_duration:
-                final_clip = video_clip.subclip(0, audio_duration)
-            else:
-                print(f"Video shorter than audio for scene {idx}.")
-                final_clip = video_clip  # or skip entirely
-
-            aspect_ratio = final_clip.w / final_clip.h
-            # Crop to 9:16
-            if aspect_ratio < 0.5625:
-                new_height = final_clip.w / 0.5625
-                final_clip = crop(
-                    final_clip,
-                    width=final_clip.w,
-                    height=new_height,
-                    x_center=final_clip.w / 2,
-                    y_center=final_clip.h / 2
-                )
-            else:
-                new_width = 0.5625 * final_clip.h
-                final_clip = crop(
-                    final_clip,
-                    width=new_width,
-                    height=final_clip.h,
-                    x_center=final_clip.w / 2,
-                    y_center=final_clip.h / 2
-                )
-
-            final_clip = final_clip.resize((1080, 1920)).set_audio(audio_clip)
-            final_clips.append(final_clip)
-            video_clips_to_close.append(video_clip)
-            audio_clips_to_close.append(audio_clip)
-            print(f"Scene {idx} processed.")
-        except Exception as e:
-            print(f"Error processing Pixabay scene {idx}: {e}")
-            audio_clip.close()
-            video_clip.close()
-
-    if final_clips:
-        try:
-            print("Concatenating all Pixabay clips into the final video...")
-            temp_moviepy_path = os.path.join(temp_folder, 'temp_moviepy.mp4')
-            final_video = concatenate_videoclips(final_clips, method="compose")
-            final_video.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile=temp_moviepy_path,
-                remove_temp=True
-            )
-            final_video.close()
-            print(f"Final Pixabay video saved to {output_path}")
-        except Exception as e:
-            print(f"Error finalizing Pixabay video: {e}")
+            search_term = "generic"  # fallback if not enough terms
+
+        scenes.append({
+            "idx": idx,
+            "audio_path": entry["audio_path"],
+            "audio_duration": entry["duration"],
+            "search_term": search_term
+        })
+
+    downloaded_paths = run_in_thread_pool(
+        lambda scene: fetch_scene_video_pixabay(scene, temp_video_dir, api_key),
+        scenes,
+        max_workers
+    )
+
+    render_list = [
+        {
+            "idx": scene["idx"],
+            "video_path": downloaded_path,
+            "start": 0,
+            "duration": scene["audio_duration"],
+            "crop": None,  # centered 9:16
+            "audio_path": scene["audio_path"]
+        }
+        for scene, downloaded_path in zip(scenes, downloaded_paths)
+        if downloaded_path
+    ]
+
+    print("Concatenating all Pixabay clips into the final video...")
+    if render_scenes(render_list, output_path, work_dir):
+        print(f"Final Pixabay video saved to {output_path}")
     else:
-        print("No final clips to concatenate.")
-
-    for c in final_clips:
-        c.close()
-    for vc in video_clips_to_close:
-        vc.close()
-    for ac in audio_clips_to_close:
-        ac.close()
+        print("Error finalizing Pixabay video.")
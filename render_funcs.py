@@ -0,0 +1,520 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
+from moviepy.video.fx.all import crop, speedx
+
+from helper_funcs import configure_moviepy, run_ffmpeg, run_in_thread_pool
+from config import (RENDER_ENGINE, RENDER_FPS, RENDER_PROCESSES, FFMPEG_PRESET, FFMPEG_CRF,
+                    RENDITION_QUALITY_FLOOR)
+
+
+OUTPUT_WIDTH = 1080
+OUTPUT_HEIGHT = 1920
+OUTPUT_ASPECT = OUTPUT_WIDTH / OUTPUT_HEIGHT  # 9:16
+
+
+def get_crop_box(width: float, height: float) -> Tuple[float, float, float, float]:
+    """
+    Computes the centered 9:16 crop box for a frame of the given size.
+
+    Args:
+        width (float): The frame width in pixels.
+        height (float): The frame height in pixels.
+
+    Returns:
+        Tuple[float, float, float, float]: The crop box as (x, y, width, height).
+    """
+    if width / height < OUTPUT_ASPECT:  # narrower
+        crop_width, crop_height = width, width / OUTPUT_ASPECT
+    else:  # wider
+        crop_width, crop_height = OUTPUT_ASPECT * height, height
+    return (width - crop_width) / 2, (height - crop_height) / 2, crop_width, crop_height
+
+
+def select_rendition(
+    renditions: List[Dict[str, Any]],
+    quality_floor: float = RENDITION_QUALITY_FLOOR
+) -> Optional[Dict[str, Any]]:
+    """
+    Picks the smallest rendition that is still sharp enough for the 1080x1920 output.
+
+    A rendition qualifies when its centered 9:16 crop is at least quality_floor times the
+    output size, so it never has to be upscaled beyond that factor. If no rendition
+    qualifies, the largest one is used.
+
+    Args:
+        renditions (List[Dict[str, Any]]): Candidate renditions with "width" and "height" keys.
+        quality_floor (float): Fraction of the output size the crop must cover (1.0 = full 1080x1920).
+
+    Returns:
+        Optional[Dict[str, Any]]: The selected rendition, or None if there are no candidates.
+    """
+    sized = [r for r in renditions if r.get("width") and r.get("height")]
+    if not sized:
+        return renditions[0] if renditions else None
+
+    def area(rendition: Dict[str, Any]) -> int:
+        return rendition["width"] * rendition["height"]
+
+    required_width = OUTPUT_WIDTH * quality_floor
+    required_height = OUTPUT_HEIGHT * quality_floor
+    covering = []
+    for rendition in sized:
+        _, _, crop_width, crop_height = get_crop_box(rendition["width"], rendition["height"])
+        # Allow one pixel of rounding slack
+        if crop_width >= required_width - 1 and crop_height >= required_height - 1:
+            covering.append(rendition)
+
+    if covering:
+        return min(covering, key=area)
+    return max(sized, key=area)
+
+
+def build_moviepy_scene(scene: Dict[str, Any], clips_to_close: List[Any]) -> Any:
+    """
+    Builds the MoviePy clip for one scene: trimmed, cropped to 9:16, resized and with audio.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "video_path", "start", "duration",
+                                "crop" and "audio_path" keys, and optionally a "speed" factor.
+        clips_to_close (List[Any]): Receives the opened source clips, which the caller must
+                                    close once the result has been written.
+
+    Returns:
+        Any: The processed 1080x1920 clip.
+    """
+    audio_clip = AudioFileClip(scene["audio_path"])
+    clips_to_close.append(audio_clip)
+    video_clip = VideoFileClip(scene["video_path"])
+    clips_to_close.append(video_clip)
+    if scene.get("speed"):
+        video_clip = video_clip.fx(speedx, factor=scene["speed"])
+
+    start = scene.get("start", 0)
+    duration = scene["duration"]
+    if video_clip.duration >= start + duration:
+        final_clip = video_clip.subclip(start, start + duration)
+    else:
+        print(f"Scene {scene['idx']} video is shorter than audio.")
+        final_clip = video_clip.subclip(start) if start else video_clip
+
+    x, y, crop_width, crop_height = scene.get("crop") or get_crop_box(final_clip.w, final_clip.h)
+    final_clip = crop(final_clip, x1=x, y1=y, width=crop_width, height=crop_height)
+    return final_clip.resize((OUTPUT_WIDTH, OUTPUT_HEIGHT)).set_audio(audio_clip)
+
+
+def render_scenes_moviepy(scenes: List[Dict[str, Any]], output_path: str, work_dir: str) -> bool:
+    """
+    Renders the scene list with MoviePy and writes the final video.
+
+    Each clip is trimmed, cropped to 9:16, resized to 1080x1920 and given its scene audio,
+    then all clips are concatenated and encoded in a single write_videofile call.
+
+    Args:
+        scenes (List[Dict[str, Any]]): Scenes with "idx", "video_path", "start", "duration",
+                                       "crop" and "audio_path" keys. A "crop" of None means
+                                       a centered 9:16 crop.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): Directory for MoviePy's temporary audio file.
+
+    Returns:
+        bool: True if the final video was written, False otherwise.
+    """
+    configure_moviepy()
+    final_clips = []
+    clips_to_close = []
+
+    for scene in scenes:
+        try:
+            final_clips.append(build_moviepy_scene(scene, clips_to_close))
+            print(f"Scene {scene['idx']} processed.")
+        except Exception as e:
+            print(f"Error processing scene {scene['idx']}: {e}")
+
+    success = False
+    if final_clips:
+        try:
+            temp_moviepy_path = os.path.join(work_dir, "temp_moviepy.mp4")
+            final_video = concatenate_videoclips(final_clips, method="compose")
+            final_video.write_videofile(
+                output_path,
+                codec="libx264",
+                audio_codec="aac",
+                temp_audiofile=temp_moviepy_path,
+                remove_temp=True
+            )
+            final_video.close()
+            success = True
+        except Exception as e:
+            print(f"Error finalizing video: {e}")
+    else:
+        print("No final clips to concatenate.")
+
+    for clip in final_clips:
+        clip.close()
+    for clip in clips_to_close:
+        clip.close()
+    return success
+
+
+def build_scene_filter(index: int, scene: Dict[str, Any], video_input: int, audio_input: int) -> str:
+    """
+    Builds the filtergraph chains that normalize one scene to a 1080x1920 segment.
+
+    The video is retimed if the scene has a "speed" factor, converted to a fixed frame rate,
+    cropped to 9:16, scaled and padded by repeating its last frame if it is shorter than the
+    narration. The audio is resampled to a common format and padded or trimmed to the scene
+    duration, so all segments can be joined by the concat filter.
+
+    The frame rate conversion follows the scene's "interpolation" key: "none" (default)
+    drops or repeats frames, "blend" cross-fades neighbouring frames and "minterpolate"
+    synthesizes motion-compensated frames, which is smoothest but much slower.
+
+    Args:
+        index (int): The position of the scene in the output; used for the output pad labels.
+        scene (Dict[str, Any]): The scene, with "duration" and "crop" keys, and optionally
+                                "speed" and "interpolation" keys.
+        video_input (int): The ffmpeg input index of the scene clip.
+        audio_input (int): The ffmpeg input index of the scene audio.
+
+    Returns:
+        str: Filter chains producing the pads [v<index>] and [a<index>].
+    """
+    duration = f"{scene['duration']:.3f}"
+    if scene.get("crop"):
+        x, y, crop_width, crop_height = scene["crop"]
+        crop_filter = f"crop={crop_width:.0f}:{crop_height:.0f}:{x:.0f}:{y:.0f}"
+    else:
+        crop_filter = "crop='min(iw,ih*9/16)':'min(ih,iw*16/9)'"
+
+    if scene.get("speed"):
+        setpts_filter = f"setpts=(PTS-STARTPTS)/{scene['speed']:.6f}"
+    else:
+        setpts_filter = "setpts=PTS-STARTPTS"
+
+    interpolation = scene.get("interpolation", "none")
+    if interpolation == "minterpolate":
+        fps_filter = f"minterpolate=fps={RENDER_FPS}:mi_mode=mci"
+    elif interpolation == "blend":
+        fps_filter = f"framerate=fps={RENDER_FPS}"
+    else:
+        fps_filter = f"fps={RENDER_FPS}"
+
+    # Frame rate conversion runs before scaling, on the smaller source frames
+    video_chain = (
+        f"[{video_input}:v]{setpts_filter},{fps_filter},{crop_filter},"
+        f"scale={OUTPUT_WIDTH}:{OUTPUT_HEIGHT},setsar=1,format=yuv420p,"
+        f"tpad=stop_mode=clone:stop_duration={duration},trim=duration={duration}[v{index}]"
+    )
+    audio_chain = (
+        f"[{audio_input}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,"
+        f"apad,atrim=duration={duration},asetpts=PTS-STARTPTS[a{index}]"
+    )
+    return f"{video_chain};{audio_chain}"
+
+
+def get_encoder_args() -> List[str]:
+    """
+    Returns the ffmpeg output options shared by every native render path.
+
+    Returns:
+        List[str]: H.264/AAC encoder arguments.
+    """
+    return [
+        "-c:v", "libx264",
+        "-preset", FFMPEG_PRESET,
+        "-crf", str(FFMPEG_CRF),
+        "-pix_fmt", "yuv420p",
+        "-r", str(RENDER_FPS),
+        "-c:a", "aac",
+        "-b:a", "192k",
+        "-ar", "44100",
+        "-ac", "2",
+    ]
+
+
+def get_scene_input_args(scene: Dict[str, Any]) -> List[str]:
+    """
+    Returns the ffmpeg input options for a scene's clip and audio.
+
+    The clip is seeked and limited to the source window the scene uses before decoding;
+    for a retimed scene that window is the scene duration scaled by its speed factor.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "video_path", "start", "duration" and
+                                "audio_path" keys, and optionally a "speed" factor.
+
+    Returns:
+        List[str]: Input arguments for the clip (first) and the audio (second).
+    """
+    source_duration = scene["duration"] * (scene.get("speed") or 1.0)
+    return [
+        "-ss", f"{scene.get('start', 0):.3f}",
+        "-t", f"{source_duration:.3f}",
+        "-i", scene["video_path"],
+        "-i", scene["audio_path"],
+    ]
+
+
+def render_scenes_ffmpeg(scenes: List[Dict[str, Any]], output_path: str) -> bool:
+    """
+    Renders the scene list in a single ffmpeg invocation.
+
+    Every scene becomes two inputs (clip and audio); one filter_complex normalizes and
+    concatenates them, so decoding, scaling, concatenation and encoding all stay native.
+    Clip inputs are seeked and limited to the scene window before decoding.
+
+    Args:
+        scenes (List[Dict[str, Any]]): Scenes with "idx", "video_path", "start", "duration",
+                                       "crop" and "audio_path" keys.
+        output_path (str): The file system path where the final video will be saved.
+
+    Returns:
+        bool: True if the final video was written, False otherwise.
+    """
+    inputs = []
+    filters = []
+    for index, scene in enumerate(scenes):
+        inputs += get_scene_input_args(scene)
+        filters.append(build_scene_filter(index, scene, video_input=2 * index, audio_input=2 * index + 1))
+
+    concat_inputs = "".join(f"[v{index}][a{index}]" for index in range(len(scenes)))
+    filters.append(f"{concat_inputs}concat=n={len(scenes)}:v=1:a=1[outv][outa]")
+
+    args = inputs + [
+        "-filter_complex", ";".join(filters),
+        "-map", "[outv]",
+        "-map", "[outa]",
+    ] + get_encoder_args() + ["-movflags", "+faststart", output_path]
+    return run_ffmpeg(args)
+
+
+def render_scene_segment(scene: Dict[str, Any], segment_path: str) -> bool:
+    """
+    Renders one scene to a normalized 1080x1920 H.264/AAC segment with MoviePy.
+
+    All segments are written with the same codec, frame rate, pixel format and audio sample
+    rate, so they can later be joined without re-encoding. Runs in a worker process, so it
+    must stay a top-level function.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "video_path", "start", "duration",
+                                "crop" and "audio_path" keys.
+        segment_path (str): The file system path where the segment will be saved.
+
+    Returns:
+        bool: True if the segment was written, False otherwise.
+    """
+    configure_moviepy()
+    clips_to_close = []
+    try:
+        clip = build_moviepy_scene(scene, clips_to_close)
+        clip.write_videofile(
+            segment_path,
+            fps=RENDER_FPS,
+            codec="libx264",
+            preset=FFMPEG_PRESET,
+            audio_codec="aac",
+            audio_fps=44100,
+            ffmpeg_params=["-crf", str(FFMPEG_CRF), "-pix_fmt", "yuv420p"],
+            temp_audiofile=segment_path.replace(".mp4", "_audio.m4a"),
+            remove_temp=True,
+            logger=None
+        )
+        clip.close()
+        print(f"Scene {scene['idx']} rendered to {segment_path}")
+        return True
+    except Exception as e:
+        print(f"Error rendering scene {scene['idx']}: {e}")
+        return False
+    finally:
+        for source_clip in clips_to_close:
+            source_clip.close()
+
+
+def render_scene_segment_ffmpeg(scene: Dict[str, Any], segment_path: str) -> bool:
+    """
+    Renders one scene to a normalized 1080x1920 H.264/AAC segment with ffmpeg.
+
+    Uses the same filter chain and encoder settings as the single-pass ffmpeg engine, so
+    segments can later be joined without re-encoding.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "video_path", "start", "duration",
+                                "crop" and "audio_path" keys, and optionally "speed" and
+                                "interpolation" keys.
+        segment_path (str): The file system path where the segment will be saved.
+
+    Returns:
+        bool: True if the segment was written, False otherwise.
+    """
+    args = get_scene_input_args(scene) + [
+        "-filter_complex", build_scene_filter(0, scene, video_input=0, audio_input=1),
+        "-map", "[v0]",
+        "-map", "[a0]",
+    ] + get_encoder_args() + [segment_path]
+    if not run_ffmpeg(args):
+        print(f"Error rendering scene {scene['idx']}.")
+        return False
+    print(f"Scene {scene['idx']} rendered to {segment_path}")
+    return True
+
+
+def concat_segments(segment_paths: List[str], output_path: str, work_dir: str) -> bool:
+    """
+    Joins identically encoded segments with ffmpeg's concat demuxer in stream-copy mode.
+
+    Args:
+        segment_paths (List[str]): The segments to join, in playback order.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): Directory for the concat list file.
+
+    Returns:
+        bool: True if the final video was written, False otherwise.
+    """
+    list_path = os.path.join(work_dir, "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for segment_path in segment_paths:
+            escaped_path = os.path.abspath(segment_path).replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+
+    return run_ffmpeg([
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_path,
+        "-c", "copy",
+        "-movflags", "+faststart",
+        output_path
+    ])
+
+
+def render_scenes_segments(
+    scenes: List[Dict[str, Any]],
+    output_path: str,
+    work_dir: str,
+    max_processes: int = RENDER_PROCESSES
+) -> bool:
+    """
+    Renders every scene to its own segment in a process pool, then joins them by stream copy.
+
+    This lets a multi-core machine encode several scenes at once, and the final join only
+    rewrites the container. If any scene fails to render, no video is written, so that
+    render_scenes falls back to MoviePy instead of publishing a video without that scene.
+
+    Args:
+        scenes (List[Dict[str, Any]]): Scenes with "idx", "video_path", "start", "duration",
+                                       "crop" and "audio_path" keys, in playback order.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): The job workspace; segments go into its "segments" subfolder.
+        max_processes (int): Maximum number of scenes rendered at once.
+
+    Returns:
+        bool: True if the final video was written with every scene, False otherwise.
+    """
+    segment_dir = os.path.join(work_dir, "segments")
+    os.makedirs(segment_dir, exist_ok=True)
+    segment_paths = [os.path.join(segment_dir, f"scene_{scene['idx']}.mp4") for scene in scenes]
+
+    # Spawn fresh interpreters rather than forking the multithreaded web server
+    workers = max(1, min(max_processes, len(scenes)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = list(executor.map(render_scene_segment, scenes, segment_paths))
+    except Exception as e:
+        # e.g. BrokenProcessPool when a worker is killed, or a pickling/import error in a child
+        print(f"Segment render pool failed: {e}")
+        return False
+
+    failed = [scene["idx"] for scene, ok in zip(scenes, results) if not ok]
+    if failed:
+        print(f"Segments of scene(s) {', '.join(map(str, failed))} failed to render.")
+        return False
+    return concat_segments(segment_paths, output_path, work_dir)
+
+
+def render_scenes_ffmpeg_segments(
+    scenes: List[Dict[str, Any]],
+    output_path: str,
+    work_dir: str,
+    max_workers: int = RENDER_PROCESSES
+) -> bool:
+    """
+    Pre-renders every scene to its own segment with ffmpeg, then joins them by stream copy.
+
+    Each scene is an independent ffmpeg process, so a thread pool is enough to keep several
+    cores busy. If any scene fails to render, no video is written, so that render_scenes
+    falls back to MoviePy instead of publishing a video without that scene.
+
+    Args:
+        scenes (List[Dict[str, Any]]): Scenes with "idx", "video_path", "start", "duration",
+                                       "crop" and "audio_path" keys, in playback order.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): The job workspace; segments go into its "segments" subfolder.
+        max_workers (int): Maximum number of scenes rendered at once.
+
+    Returns:
+        bool: True if the final video was written with every scene, False otherwise.
+    """
+    segment_dir = os.path.join(work_dir, "segments")
+    os.makedirs(segment_dir, exist_ok=True)
+    segment_paths = [os.path.join(segment_dir, f"scene_{scene['idx']}.mp4") for scene in scenes]
+
+    results = run_in_thread_pool(
+        lambda item: render_scene_segment_ffmpeg(*item),
+        list(zip(scenes, segment_paths)),
+        max_workers
+    )
+
+    failed = [scene["idx"] for scene, ok in zip(scenes, results) if not ok]
+    if failed:
+        print(f"Segments of scene(s) {', '.join(map(str, failed))} failed to render.")
+        return False
+    return concat_segments(segment_paths, output_path, work_dir)
+
+
+def render_scenes(
+    scenes: List[Dict[str, Any]],
+    output_path: str,
+    work_dir: str,
+    engine: str = RENDER_ENGINE
+) -> bool:
+    """
+    Renders the scene list into the final 1080x1920 video with the selected engine.
+
+    Supported engines are "moviepy" (frame-by-frame composition in Python), "ffmpeg"
+    (a single native filtergraph), "segments" (per-scene MoviePy renders in a process
+    pool, joined by stream copy) and "ffmpeg_segments" (per-scene native renders, run in
+    parallel and joined by stream copy). If a faster engine fails, rendering falls back to
+    MoviePy.
+
+    Args:
+        scenes (List[Dict[str, Any]]): Scenes with "idx", "video_path", "start", "duration",
+                                       "crop" and "audio_path" keys, in playback order. A
+                                       "speed" key retimes the clip by that factor.
+        output_path (str): The file system path where the final video will be saved.
+        work_dir (str): The job workspace, used for temporary files.
+        engine (str): The render engine to use. Defaults to the RENDER_ENGINE setting.
+
+    Returns:
+        bool: True if the final video was written, False otherwise.
+    """
+    if not scenes:
+        print("No final clips to concatenate.")
+        return False
+
+    if engine == "ffmpeg":
+        if render_scenes_ffmpeg(scenes, output_path):
+            return True
+        print("ffmpeg render failed, falling back to MoviePy.")
+    elif engine == "segments":
+        if render_scenes_segments(scenes, output_path, work_dir):
+            return True
+        print("Segment render failed, falling back to MoviePy.")
+    elif engine == "ffmpeg_segments":
+        if render_scenes_ffmpeg_segments(scenes, output_path, work_dir):
+            return True
+        print("ffmpeg segment render failed, falling back to MoviePy.")
+    return render_scenes_moviepy(scenes, output_path, work_dir)
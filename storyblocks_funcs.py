@@ -5,11 +5,13 @@ import hashlib
 from urllib.parse import urlencode
 from typing import Optional, List, Dict, Any
 
-import requests
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
-from moviepy.video.fx.all import crop
-
-from helper_funcs import configure_moviepy
+from audio_funcs import get_scene_manifest
+from helper_funcs import configure_moviepy, run_in_thread_pool
+from render_funcs import render_scenes, select_rendition
+from http_funcs import get_session
+from cache_funcs import (fetch_clip, get_cached_clip, get_cached_search, store_cached_search, make_cache_key,
+                         kv_get, kv_set)
+from config import SCENE_FETCH_WORKERS, RENDITION_QUALITY_FLOOR, CACHE_DB_PATH
 
 
 BASE_URL = "https://api.storyblocks.com"
@@ -36,6 +38,28 @@ def generate_hmac(private_key: str, resource: str, expires: str) -> str:
     return hmac_builder.hexdigest()
 
 
+def resolution_height(res_key: str) -> int:
+    """
+    Converts a Storyblocks format key such as "_720p" or "_4k" to a frame height.
+
+    Args:
+        res_key (str): The format key from the download response.
+
+    Returns:
+        int: The frame height in pixels, or 0 if the key is not recognized.
+    """
+    label = res_key.strip("_").lower()
+    if label.endswith("k"):
+        try:
+            return {"2k": 1440, "4k": 2160, "8k": 4320}[label]
+        except KeyError:
+            return 0
+    try:
+        return int(label.rstrip("p"))
+    except ValueError:
+        return 0
+
+
 def search_videos_storyblocks(
     search_term: str,
     min_duration: int,
@@ -45,6 +69,8 @@ def search_videos_storyblocks(
     """
     Search Storyblocks for videos matching the given keyword. Optionally filter by minimum duration.
 
+    Results are served from the search cache while they are fresh.
+
     Args:
         search_term (str): The keyword to search for in Storyblocks.
         min_duration (int, optional): Minimum duration of videos in seconds. Defaults to None.
@@ -70,13 +96,18 @@ def search_videos_storyblocks(
         "project_id": hmac_sig,
         "user_id": f"johtok{hmac_sig}"
     }
+    filters = {"content_type": "all", "sort_by": "most_relevant", "sort_order": "DESC"}
+    cached_hits = get_cached_search("storyblocks", search_term, min_duration, filters)
+    if cached_hits is not None:
+        return cached_hits
     try:
-        response = requests.get(BASE_URL + search_resource, params=params)
+        response = get_session("storyblocks").get(BASE_URL + search_resource, params=params)
         response.raise_for_status()
         data = response.json()
         hits = data.get("results", [])
         if min_duration is not None:
             hits = [hit for hit in hits if hit.get("duration", 0) >= min_duration]
+        store_cached_search("storyblocks", search_term, min_duration, filters, hits)
         return hits
     except Exception as e:
         print(f"Error searching Storyblocks: {e}")
@@ -87,20 +118,35 @@ def download_video_storyblocks(
     video_id: str,
     output_path: str,
     private_api_key: str,
-    public_api_key: str
+    public_api_key: str,
+    max_duration: Optional[float] = None
 ) -> bool:
     """
     Download a Storyblocks video by its video ID and save it to the specified output path.
 
+    The smallest format that meets RENDITION_QUALITY_FLOOR is selected; Storyblocks only
+    reports a height per format, so footage is assumed to be 16:9. Clips already present in
+    the persistent clip cache are not downloaded again. The chosen format of each video is
+    remembered per quality floor, so a cached clip is found without calling the signed
+    download endpoint.
+
     Args:
         video_id (str): The unique identifier of the Storyblocks video to download.
         output_path (str): The file system path where the downloaded video will be saved.
         private_api_key (str): Private API key for authentication.
         public_api_key (str): Public API key for authentication.
+        max_duration (Optional[float]): Seconds of the clip that will be used. When given, only
+                                        that part of the clip is fetched if possible.
 
     Returns:
         bool: True if the download was successful, False otherwise.
     """
+    # A cache hit must not cost an authenticated download request
+    rendition_key = make_cache_key("storyblocks", str(video_id), RENDITION_QUALITY_FLOOR)
+    rendition = kv_get(CACHE_DB_PATH, "storyblocks_rendition", rendition_key)
+    if rendition and get_cached_clip("storyblocks", video_id, rendition, output_path, max_duration):
+        return True
+
     download_resource = f"/api/v2/videos/stock-item/download/{video_id}"
     expires = str(int(time.time()) + 3600)
     hmac_sig = generate_hmac(private_api_key, download_resource, expires)
@@ -114,38 +160,36 @@ def download_video_storyblocks(
     }
 
     try:
-        response = requests.get(BASE_URL + download_resource, params=params)
+        response = get_session("storyblocks").get(BASE_URL + download_resource, params=params)
         response.raise_for_status()
         data = response.json()
 
-        mp4_formats = data.get("MP4", {})
-        if mp4_formats:
-            def resolution_key(res_key):
-                try:
-                    return int(res_key.strip("_p"))
-                except:
-                    return 0
-            sorted_keys = sorted(mp4_formats.keys(), key=resolution_key, reverse=True)
-            video_url = mp4_formats[sorted_keys[0]]
-        else:
-            mov_formats = data.get("MOV", {})
-            if mov_formats:
-                sorted_keys = sorted(mov_formats.keys(), key=lambda k: int(k.strip("_p")), reverse=True)
-                video_url = mov_formats[sorted_keys[0]]
-            else:
-                print("No downloadable video formats found.")
-                return False
+        container = "MP4" if data.get("MP4") else "MOV"
+        formats = data.get(container, {})
+        if not formats:
+            print("No downloadable video formats found.")
+            return False
+
+        renditions = []
+        for res_key, url in formats.items():
+            height = resolution_height(res_key)
+            renditions.append({
+                "key": res_key,
+                "url": url,
+                "width": height * 16 // 9,
+                "height": height
+            })
+        best = select_rendition(renditions)
+        rendition = f"{container}{best['key']}"
+        video_url = best["url"]
 
         if not video_url:
             print("No video URL found in download response.")
             return False
 
-        resp = requests.get(video_url, stream=True)
-        resp.raise_for_status()
-        with open(output_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=1024*1024):
-                if chunk:
-                    f.write(chunk)
+        kv_set(CACHE_DB_PATH, "storyblocks_rendition", rendition_key, rendition)
+        fetch_clip("storyblocks", video_id, rendition, video_url, output_path,
+                   max_duration=max_duration)
         print(f"Storyblocks video downloaded to {output_path}")
         return True
     except Exception as e:
@@ -153,20 +197,74 @@ def download_video_storyblocks(
         return False
 
 
+def fetch_scene_video_storyblocks(
+    scene: Dict[str, Any],
+    temp_video_dir: str,
+    private_api_key: str,
+    public_api_key: str
+) -> Optional[str]:
+    """
+    Search for and download the Storyblocks clip for a single scene.
+
+    Runs on a worker thread, so it only touches files that belong to the given scene.
+
+    Args:
+        scene (Dict[str, Any]): The scene, with "idx", "search_term" and "audio_duration" keys.
+        temp_video_dir (str): Directory where the downloaded clip will be saved.
+        private_api_key (str): Private API key for authentication.
+        public_api_key (str): Public API key for authentication.
+
+    Returns:
+        Optional[str]: The path of the downloaded clip, or None if no clip could be fetched.
+    """
+    idx = scene["idx"]
+    audio_duration = scene["audio_duration"]
+
+    min_duration = int(audio_duration) + 1
+    hits = search_videos_storyblocks(scene["search_term"], 
+                                     min_duration=min_duration,
+                                     private_api_key=private_api_key, 
+                                     public_api_key=public_api_key)
+    suitable_hits = [h for h in hits if h.get("duration", 0) >= audio_duration]
+    if not suitable_hits:
+        print(f"No suitable Storyblocks video found for scene {idx}.")
+        return None
+
+    chosen_hit = suitable_hits[0]
+    video_id = chosen_hit.get("id")
+    if not video_id:
+        print("No video ID in chosen Storyblocks hit.")
+        return None
+
+    downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
+    if not download_video_storyblocks(video_id, 
+                                      downloaded_path,
+                                      private_api_key=private_api_key, 
+                                      public_api_key=public_api_key,
+                                      max_duration=audio_duration):
+        print(f"Failed to download storyblocks scene {idx}.")
+        return None
+    return downloaded_path
+
+
 def process_videos_storyblocks(
     scripts: List[str],
     search_terms: List[str],
     audio_dir: str,
     output_path: str,
     private_api_key: str,
-    public_api_key: str
+    public_api_key: str,
+    work_dir: str,
+    max_workers: int = SCENE_FETCH_WORKERS
 ) -> None:
     """
     Create a final video by processing multiple Storyblocks videos and corresponding audio files.
 
     This function searches for videos on Storyblocks based on the provided search terms and scripts,
     downloads the selected videos, synchronizes them with audio files, and concatenates them into
-    a single output video.
+    a single output video. Searches and downloads run concurrently for all scenes on a bounded
+    thread pool; the clips are still assembled in scene order by render_funcs.render_scenes,
+    which uses the configured render engine.
 
     Args:
         scripts (List[str]): A list of script texts for each scene.
@@ -175,111 +273,51 @@ def process_videos_storyblocks(
         output_path (str): The file system path where the final video will be saved.
         private_api_key (str): Private API key for authentication.
         public_api_key (str): Public API key for authentication.
+        work_dir (str): The job workspace; downloaded clips go into its "video" subfolder.
+        max_workers (int): Maximum number of scenes searched and downloaded at once.
     """
     configure_moviepy()
-    temp_folder = "temp"
-    temp_video_dir = os.path.join(temp_folder, "video")
+    temp_video_dir = os.path.join(work_dir, "video")
     os.makedirs(temp_video_dir, exist_ok=True)
 
-    final_clips = []
-    video_clips_to_close = []
-    audio_clips_to_close = []
-
-    for idx, script in enumerate(scripts, start=1):
-        audio_file = os.path.join(audio_dir, f"scene_{idx}.mp3")
-        if not os.path.exists(audio_file):
-            print(f"No audio file for scene {idx}.")
-            continue
-
-        try:
-            audio_clip = AudioFileClip(audio_file)
-            audio_duration = audio_clip.duration
-        except Exception as e:
-            print(f"Error loading audio for scene {idx}: {e}")
-            continue
-
+    scenes = []
+    for entry in get_scene_manifest(scripts, audio_dir):
+        idx = entry["idx"]
         if idx - 1 < len(search_terms):
             search_term = search_terms[idx - 1]
         else:
-            search_term = "generic"
-
-        min_duration = int(audio_duration) + 1
-        hits = search_videos_storyblocks(search_term, 
-                                         min_duration=min_duration,
-                                         private_api_key=private_api_key, 
-                                         public_api_key=public_api_key)
-        suitable_hits = [h for h in hits if h.get("duration", 0) >= audio_duration]
-        if not suitable_hits:
-            print(f"No suitable Storyblocks video found for scene {idx}.")
-            audio_clip.close()
-            continue
-
-        chosen_hit = suitable_hits[0]
-        video_id = chosen_hit.get("id")
-        if not video_id:
-            print("No video ID in chosen Storyblocks hit.")
-            audio_clip.close()
-            continue
-
-        downloaded_path = os.path.join(temp_video_dir, f"scene_{idx}.mp4")
-        if not download_video_storyblocks(video_id, 
-                                          downloaded_path,
-                                          private_api_key=private_api_key, 
-                                          public_api_key=public_api_key):
-            print(f"Failed to download storyblocks scene {idx}.")
-            audio_clip.close()
-            continue
+            search_term = "generic"  # fallback if not enough terms
+
+        scenes.append({
+            "idx": idx,
+            "audio_path": entry["audio_path"],
+            "audio_duration": entry["duration"],
+            "search_term": search_term
+        })
+
+    downloaded_paths = run_in_thread_pool(
+        lambda scene: fetch_scene_video_storyblocks(scene, temp_video_dir,
+                                                    private_api_key=private_api_key,
+                                                    public_api_key=public_api_key),
+        scenes,
+        max_workers
+    )
 
-        try:
-            video_clip = VideoFileClip(downloaded_path)
-            if video_clip.duration >= audio_duration:
-                final_clip = video_clip.subclip(0, audio_duration)
-            else:
-                print(f"Video shorter than audio for scene {idx}.")
-                final_clip = video_clip  # or skip entirely
-
-            aspect_ratio = final_clip.w / final_clip.h
-            if aspect_ratio < 0.5625:
-                new_height = final_clip.w / 0.5625
-                final_clip = crop(final_clip, width=final_clip.w, height=new_height,
-                                  x_center=final_clip.w/2, y_center=final_clip.h/2)
-            else:
-                new_width = 0.5625 * final_clip.h
-                final_clip = crop(final_clip, width=new_width, height=final_clip.h,
-                                  x_center=final_clip.w/2, y_center=final_clip.h/2)
-
-            final_clip = final_clip.resize((1080, 1920)).set_audio(audio_clip)
-            final_clips.append(final_clip)
-            video_clips_to_close.append(video_clip)
-            audio_clips_to_close.append(audio_clip)
-            print(f"Scene {idx} processed successfully.")
-        except Exception as e:
-            print(f"Error processing Storyblocks scene {idx}: {e}")
-            audio_clip.close()
-            video_clip.close()
-
-    if final_clips:
-        try:
-            print("Concatenating all Storyblocks scenes into final video...")
-            temp_moviepy_path = os.path.join(temp_folder, "temp_moviepy.mp4")
-            final_video = concatenate_videoclips(final_clips, method="compose")
-            final_video.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile=temp_moviepy_path,
-                remove_temp=True
-            )
-            final_video.close()
-            print(f"Final Storyblocks video saved to {output_path}")
-        except Exception as e:
-            print(f"Error finalizing Storyblocks video: {e}")
+    render_list = [
+        {
+            "idx": scene["idx"],
+            "video_path": downloaded_path,
+            "start": 0,
+            "duration": scene["audio_duration"],
+            "crop": None,  # centered 9:16
+            "audio_path": scene["audio_path"]
+        }
+        for scene, downloaded_path in zip(scenes, downloaded_paths)
+        if downloaded_path
+    ]
+
+    print("Concatenating all Storyblocks scenes into final video...")
+    if render_scenes(render_list, output_path, work_dir):
+        print(f"Final Storyblocks video saved to {output_path}")
     else:
-        print("No final clips to concatenate.")
-
-    for clip in final_clips:
-        clip.close()
-    for vc in video_clips_to_close:
-        vc.close()
-    for ac in audio_clips_to_close:
-        ac.close()
\ No newline at end of file
+        print("Error finalizing Storyblocks video.")
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("moviepy")
+
+from audio_funcs import get_mp3_duration
+
+# MPEG-1 Layer III, 128 kbps, 44100 Hz, stereo: 417-byte frames of 1152 samples
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+FRAME_LENGTH = 417
+FRAME_SECS = 1152 / 44100
+
+
+def _mp3_chunk(frames):
+    # A LAME-style Info frame with the frame count, followed by that many audio frames
+    info = bytearray(FRAME_HEADER + bytes(FRAME_LENGTH - 4))
+    info[36:40] = b"Info"
+    info[43] = 0x01
+    info[44:48] = frames.to_bytes(4, "big")
+    audio = (FRAME_HEADER + bytes(FRAME_LENGTH - 4)) * frames
+    return bytes(info) + audio
+
+
+def test_mp3_duration_uses_info_frame_count(tmp_path):
+    path = tmp_path / "single.mp3"
+    path.write_bytes(_mp3_chunk(200))
+
+    assert get_mp3_duration(str(path)) == pytest.approx(200 * FRAME_SECS)
+
+
+def test_mp3_duration_walks_frames_of_concatenated_chunks(tmp_path):
+    path = tmp_path / "joined.mp3"
+    path.write_bytes(_mp3_chunk(100) + _mp3_chunk(300))
+
+    # The first Info header covers only 100 frames; every frame of both chunks is counted
+    assert get_mp3_duration(str(path)) == pytest.approx(402 * FRAME_SECS)
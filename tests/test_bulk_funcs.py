@@ -0,0 +1,146 @@
+import json
+import asyncio
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+pytest.importorskip("requests")
+pytest.importorskip("moviepy")
+
+import bulk_funcs
+import openai_funcs
+from fact_funcs import get_recent_facts
+from bulk_funcs import generate_bundles, run_requests_chat, read_batch_output, read_bundle_manifest, write_bundle_manifest
+
+
+@pytest.mark.parametrize("batch_size", [0, 1, 2, 5])
+def test_local_bundles_round_trip_through_manifest(tmp_path, batch_size):
+    themes = ["octopuses", "volcanoes", "honey bees"]
+
+    bundles = generate_bundles(themes, backend="local", work_dir=str(tmp_path / "work"),
+                               batch_size=batch_size, video_duration_secs=20)
+
+    assert [bundle["theme"] for bundle in bundles] == themes
+    for bundle in bundles:
+        assert isinstance(bundle["topic"], str) and bundle["topic"]
+        assert bundle["scripts"] and all(isinstance(scene, str) for scene in bundle["scripts"])
+        assert isinstance(bundle["title"], str) and bundle["title"]
+        assert isinstance(bundle["hashtags"], list)
+        assert len(bundle["search_terms"]) == len(bundle["scripts"])
+    # Every video gets its own answer, even when several share a prompt
+    assert len({bundle["topic"] for bundle in bundles}) == len(themes)
+
+    manifest_path = str(tmp_path / "out" / "bundles.jsonl")
+    write_bundle_manifest(bundles, manifest_path)
+    assert read_bundle_manifest(manifest_path) == bundles
+
+
+def _output_line(custom_id, status_code=200, arguments="{}", error=None):
+    body = {"choices": [{"message": {"function_call": {"name": "f", "arguments": arguments}}}]}
+    return json.dumps({
+        "custom_id": custom_id,
+        "response": {"status_code": status_code, "body": body} if status_code else None,
+        "error": error,
+    })
+
+
+def test_read_batch_output_maps_failed_requests_to_none(tmp_path):
+    output_path = tmp_path / "results.jsonl"
+    output_path.write_text("\n".join([
+        _output_line("ok", arguments=json.dumps({"topics": ["a", "b"]})),
+        _output_line("api-error", status_code=None, error={"code": "server_error", "message": "boom"}),
+        _output_line("http-error", status_code=429),
+        _output_line("bad-arguments", arguments="{\"topics\": [\"a\""),
+        json.dumps({"custom_id": "no-choices", "response": {"status_code": 200, "body": {"choices": []}}}),
+        "",
+    ]), encoding="utf-8")
+
+    results = read_batch_output(str(output_path))
+
+    assert results == {
+        "ok": {"topics": ["a", "b"]},
+        "api-error": None,
+        "http-error": None,
+        "bad-arguments": None,
+        "no-choices": None,
+    }
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def create(self, **payload):
+        self.calls += 1
+        if self.calls == 1:
+            # The first call fails once with a retryable error
+            raise openai_funcs.APIConnectionError(request=None)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        arguments = json.dumps({"topics": [payload["messages"][0]["content"]]})
+        message = SimpleNamespace(function_call=SimpleNamespace(arguments=arguments))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def test_run_requests_chat_drives_calls_on_one_event_loop(monkeypatch):
+    completions = _FakeCompletions()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(bulk_funcs, "get_async_openai_client", lambda api_key: fake_client)
+    monkeypatch.setattr(openai_funcs, "OPENAI_CACHE", False)
+    monkeypatch.setattr(openai_funcs, "OPENAI_BACKOFF_SECS", 0.0)
+    requests = [
+        {"custom_id": f"topics-{idx}", "prompt": f"prompt {idx}", "max_tokens": 10, "temperature": 0.9,
+         "functions": [{"name": "f"}], "function_call": {"name": "f"}, "caller": "bulk_topics"}
+        for idx in range(6)
+    ]
+
+    results = run_requests_chat(requests, SimpleNamespace(api_key="key"), max_workers=2)
+
+    assert results == {f"topics-{idx}": {"topics": [f"prompt {idx}"]} for idx in range(6)}
+    assert completions.calls == 7
+    assert completions.max_active == 2
+
+
+def test_only_complete_bundles_use_up_their_facts(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "facts.sqlite3")
+    monkeypatch.setattr(bulk_funcs, "FACT_STORE_PATH", db_path)
+    monkeypatch.setattr(bulk_funcs, "find_similar_fact", partial(bulk_funcs.find_similar_fact, db_path=db_path))
+    monkeypatch.setattr(bulk_funcs, "add_fact", partial(bulk_funcs.add_fact, db_path=db_path))
+    topics = {
+        "octopuses": "Octopuses have three hearts and blue copper-based blood.",
+        "cephalopods": "Octopuses have three hearts and blue blood based on copper.",
+        "volcanoes": "Some volcanoes erupt blue flames from burning sulfur gas.",
+        "honey bees": "Honey bees communicate flower locations with a waggle dance.",
+    }
+
+    def fake_run_requests_chat(requests, client):
+        results = {}
+        for request in requests:
+            prompt = request["prompt"]
+            if request["caller"] == "bulk_topics":
+                results[request["custom_id"]] = {"topics": [next(t for th, t in topics.items() if th in prompt)]}
+            elif request["caller"] == "bulk_scripts":
+                results[request["custom_id"]] = {"scripts": [{"scenes": ["A scene."]}]}
+            else:
+                # The metadata stage fails for the volcano video
+                title = "" if topics["volcanoes"] in prompt else "A title"
+                results[request["custom_id"]] = {"videos": [{"title": title, "hashtags": [], "search_terms": ["x"]}]}
+        return results
+
+    monkeypatch.setattr(bulk_funcs, "run_requests_chat", fake_run_requests_chat)
+
+    bundles = generate_bundles(list(topics), backend="chat", client=object(), batch_size=1)
+
+    # The reworded octopus fact repeats an earlier topic of the same run
+    assert [bundle["theme"] for bundle in bundles] == ["octopuses", "honey bees"]
+    assert get_recent_facts("octopuses", 5, db_path) == [topics["octopuses"]]
+    assert get_recent_facts("honey bees", 5, db_path) == [topics["honey bees"]]
+    assert get_recent_facts("volcanoes", 5, db_path) == []
+    assert get_recent_facts("cephalopods", 5, db_path) == []
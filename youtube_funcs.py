@@ -9,12 +9,25 @@ from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from flask import session, flash
+from flask import session, flash, has_request_context
+
+
+def _notify(message: str) -> None:
+    """
+    Flashes an error message when running inside a request; background jobs only log it.
+
+    Args:
+        message (str): The message to flash.
+    """
+    if has_request_context():
+        flash(message, "error")
+
 
 def upload_video(
     video_file_path: str,
     video_name: str,
-    video_hashtags: Optional[List[str]] = None
+    video_hashtags: Optional[List[str]] = None,
+    token_json: Optional[str] = None
 ) -> Tuple[bool, str]:
     """
     Uploads a video to YouTube.
@@ -23,6 +36,8 @@ def upload_video(
         video_file_path (str): The file path to the video to be uploaded.
         video_name (str): The name/title of the video.
         video_hashtags (Optional[List[str]]): A list of hashtags associated with the video.
+        token_json (Optional[str]): Stored YouTube credentials. Read from the session when omitted,
+                                    which requires a request context.
 
     Returns:
         Tuple[bool, str]: A tuple where the first element is a boolean indicating success,
@@ -31,19 +46,20 @@ def upload_video(
     SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
     time_now = datetime.datetime.now(pytz.timezone('Europe/Stockholm')).strftime('%Y-%m-%d %H:%M')
 
-    # Retrieve token from session
-    token_json = session.get('YOUTUBE_TOKEN', '')
+    # Retrieve token from session unless it was passed in by a background job
+    if token_json is None:
+        token_json = session.get('YOUTUBE_TOKEN', '')
     
     if not token_json:
         print("No stored YouTube credentials.")
-        flash("You need to authorize YouTube in settings.", "error")
+        _notify("You need to authorize YouTube in settings.")
         return False, "No YouTube credentials. Please authorize."
 
     try:
         creds = Credentials.from_authorized_user_info(json.loads(token_json), SCOPES)
     except Exception as e:
         print(f"Error parsing stored token: {e}")
-        flash("Invalid YouTube credentials. Please re-authorize.", "error")
+        _notify("Invalid YouTube credentials. Please re-authorize.")
         return False, "Invalid YouTube credentials."
 
     # Refresh token if expired
@@ -51,14 +67,15 @@ def upload_video(
         if creds.expired and creds.refresh_token:
             try:
                 creds.refresh(Request())
-                session['YOUTUBE_TOKEN'] = creds.to_json()
+                if has_request_context():
+                    session['YOUTUBE_TOKEN'] = creds.to_json()
             except Exception as e:
                 print(f"Error refreshing token: {e}")
-                flash("Token refresh failed. Please re-authorize YouTube.", "error")
+                _notify("Token refresh failed. Please re-authorize YouTube.")
                 return False, "Token refresh failed. Please re-authorize YouTube."
         else:
             print("Credentials are invalid. User needs to authorize again.")
-            flash("Credentials are invalid. Please re-authorize YouTube.", "error")
+            _notify("Credentials are invalid. Please re-authorize YouTube.")
             return False, "Credentials are invalid. Please re-authorize YouTube."
 
     # Build YouTube client
@@ -66,7 +83,7 @@ def upload_video(
         youtube = build('youtube', 'v3', credentials=creds)
     except Exception as e:
         print(f"Error building YouTube client: {e}")
-        flash("Failed to build YouTube client.", "error")
+        _notify("Failed to build YouTube client.")
         return False, "Failed to build YouTube client."
 
     # Define video metadata
@@ -99,5 +116,5 @@ def upload_video(
         return True, video_url
     except Exception as e:
         print(f"Error uploading video: {e}")
-        flash(f"Error uploading video: {e}", "error")
+        _notify(f"Error uploading video: {e}")
         return False, str(e)